@@ -76,9 +76,13 @@ with st.sidebar:
 def load_rag_chain():
     logging.info("Iniciando cache: Carregando pipeline RAG...")
     try:
-        chain = create_rag_chain()
-        logging.info("Pipeline RAG carregado com sucesso.")
-        logging.info("Bot RAG pronto para responder!")
+        # O índice e os clientes Azure carregam em segundo plano enquanto a página é montada,
+        # e novas versões publicadas pela ingestão são recarregadas sem reiniciar o app
+        chain = create_rag_chain(
+            usar_cache=True, preguicoso=True,
+            recarga_segundos=float(os.getenv("INDICE_RECARGA_SEGUNDOS", "30"))
+        )
+        logging.info("Pipeline RAG em aquecimento. Bot RAG pronto para receber perguntas!")
         return chain
     except FileNotFoundError as e:
         st.error(f"Erro ao carregar o pipeline RAG: {e}")
@@ -114,9 +118,20 @@ if rag_chain:
             """):
                 st.subheader("📃 Resposta")
                 with st.spinner("Analisando os relatórios... ⏳"):
-                    resposta = rag_chain.invoke(user_question)
+                    partes = rag_chain.stream(user_question)
+                    primeira = next(partes)  # documentos de origem chegam antes dos tokens
 
-                st.markdown(resposta["result"])
+                def tokens():
+                    if primeira.get("result"):
+                        yield primeira["result"]
+                    for parte in partes:
+                        if parte.get("result"):
+                            yield parte["result"]
+
+                resposta = {
+                    "result": st.write_stream(tokens()),
+                    "source_documents": primeira.get("source_documents", [])
+                }
 
             st.markdown("### 📚 Referências")
             palavras_chave_falha = ["não encontrei", "não há informações"]
@@ -127,6 +142,12 @@ if rag_chain:
                     pagina = doc.metadata.get("page", "?")
                     with st.expander(f"Referência {i}: {source_name} (pág. {pagina})"):
                         st.write(doc.page_content)
+                        # Trecho repetido em outras edições (deduplicado na ingestão)
+                        copias = doc.metadata.get("referencias", [])[1:]
+                        if copias:
+                            st.caption("Também em: " + ", ".join(
+                                f"{os.path.basename(r['source'])} (pág. {r['page']})" for r in copias
+                            ))
             else:
                 st.info("Nenhuma referência relevante encontrada para esta resposta.")
         else:
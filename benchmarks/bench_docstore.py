@@ -0,0 +1,116 @@
+"""
+Benchmark: carregamento do índice com docstore em pickle (index.pkl) x SQLite.
+
+Gera um índice sintético no formato antigo, converte uma cópia com
+`converter_indice` e, para cada formato, mede em um subprocesso próprio o
+tempo de carregamento, o RSS após carregar e após a primeira consulta.
+
+Uso:
+    python -m benchmarks.bench_docstore --chunks 50000 --dimensao 1536
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+
+def _rss_mb() -> float:
+    """RSS atual do processo (MB), lido de /proc."""
+    with open("/proc/self/status") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1]) / 1024
+    return 0.0
+
+
+def _gerar_indice(diretorio: str, n_chunks: int, dimensao: int, tamanho_chunk: int):
+    """Cria um índice FAISS no formato antigo (index.faiss + index.pkl)."""
+    from langchain_community.vectorstores import FAISS
+    from benchmarks.falsos import EmbeddingsFalsos
+
+    rng = np.random.default_rng(42)
+    vetores = rng.standard_normal((n_chunks, dimensao)).astype(np.float32)
+    base = "O Comitê de Política Monetária avaliou a inflação, a atividade e as expectativas. "
+    texto = (base * (tamanho_chunk // len(base) + 1))[:tamanho_chunk]
+    textos = [f"{i} {texto}" for i in range(n_chunks)]
+    metadatas = [{"source": f"dados_rpm/RPM_Dez_{2015 + i % 10}.pdf", "page": i % 60, "total_pages": 60} for i in range(n_chunks)]
+    FAISS.from_embeddings(list(zip(textos, vetores)), EmbeddingsFalsos(dimensao), metadatas=metadatas).save_local(diretorio)
+
+
+def _medir(diretorio: str, formato: str, dimensao: int) -> dict:
+    """Carrega o índice no processo atual e mede tempo e memória."""
+    from langchain_community.vectorstores import FAISS
+    from benchmarks.falsos import EmbeddingsFalsos
+    from src.utils.indice_faiss import carregar_indice
+
+    modelo = EmbeddingsFalsos(dimensao)
+    rss_inicial = _rss_mb()
+
+    inicio = time.perf_counter()
+    if formato == "pickle":
+        vector_store = FAISS.load_local(diretorio, modelo, allow_dangerous_deserialization=True)
+    else:
+        vector_store = carregar_indice(diretorio, modelo)
+    carregamento = time.perf_counter() - inicio
+    rss_carregado = _rss_mb()
+
+    inicio = time.perf_counter()
+    docs = vector_store.similarity_search("Qual a projeção do IPCA?", k=3)
+    primeira_consulta = time.perf_counter() - inicio
+    assert len(docs) == 3
+
+    return {
+        "formato": formato,
+        "carregamento_s": round(carregamento, 3),
+        "primeira_consulta_ms": round(primeira_consulta * 1000, 1),
+        "rss_carregado_mb": round(rss_carregado - rss_inicial, 1),
+        "rss_apos_consulta_mb": round(_rss_mb() - rss_inicial, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--tamanho-chunk", type=int, default=1000, help="Caracteres por chunk")
+    parser.add_argument("--formato", choices=["pickle", "sqlite"], help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.formato:
+        print(json.dumps(_medir(args.diretorio, args.formato, args.dimensao)))
+        return
+
+    from src.utils.indice_faiss import converter_indice
+
+    raiz = tempfile.mkdtemp(prefix="bench_docstore_")
+    try:
+        diretorios = {"pickle": os.path.join(raiz, "pickle"), "sqlite": os.path.join(raiz, "sqlite")}
+        _gerar_indice(diretorios["pickle"], args.chunks, args.dimensao, args.tamanho_chunk)
+        shutil.copytree(diretorios["pickle"], diretorios["sqlite"])
+        converter_indice(diretorios["sqlite"], remover_pickle=True)
+
+        resultados = []
+        for formato, diretorio in diretorios.items():
+            saida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_docstore", "--formato", formato,
+                 "--diretorio", diretorio, "--dimensao", str(args.dimensao)],
+                cwd=RAIZ, capture_output=True, text=True, check=True
+            )
+            resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+        print(json.dumps(resultados, indent=2, ensure_ascii=False))
+    finally:
+        shutil.rmtree(raiz, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: extratores de texto dos PDFs (pdfplumber x pdfium).
+
+Sobre o corpus sintético (ou um diretório de PDFs reais), mede para cada
+extrator a mediana de páginas/s e compara o resultado com o extrator de
+referência (pdfplumber): páginas mantidas pelo filtro de páginas curtas,
+quantidade de chunks, similaridade do texto página a página e páginas com
+texto idêntico após normalizar espaços.
+
+Uso:
+    python -m benchmarks.bench_extracao --pdfs 4 --paginas 20 --repeticoes 3
+    python -m benchmarks.bench_extracao --diretorio dados_rpm
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import difflib
+import tempfile
+import statistics
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+from src.pipelines.processar_dados import (  # noqa: E402
+    EXTRATORES, EXTRATOR_PADRAO, TAMANHO_MINIMO_PAGINA, _iterar_paginas, criar_text_splitter
+)
+
+
+def _normalizar(texto: str) -> str:
+    return " ".join(texto.split())
+
+
+def extrair(pdf_files: list, extrator: str) -> tuple:
+    """Extrai todas as páginas dos PDFs com um extrator, retornando (páginas, segundos)."""
+    inicio = time.perf_counter()
+    paginas = [doc for f in pdf_files for doc in _iterar_paginas(f, extrator=extrator)]
+    return paginas, time.perf_counter() - inicio
+
+
+def comparar_extratores(pdf_files: list, chunk_size: int = 1000, chunk_overlap: int = 250,
+                        extratores: list = None, repeticoes: int = 1) -> dict:
+    """
+    Compara os extratores com o de referência (`EXTRATOR_PADRAO`).
+
+    Args:
+        pdf_files (list): PDFs usados na comparação.
+        chunk_size (int): Tamanho máximo de cada chunk.
+        chunk_overlap (int): Sobreposição entre chunks.
+        extratores (list, opcional): Extratores comparados. Por padrão, todos.
+        repeticoes (int): Extrações cronometradas por extrator (vale a mediana).
+
+    Returns:
+        dict: Métricas por extrator (páginas/s, páginas, chunks e paridade de texto).
+    """
+    text_splitter = criar_text_splitter(chunk_size, chunk_overlap)
+    resultados = {}
+    referencia = None
+
+    for extrator in [EXTRATOR_PADRAO] + [e for e in (extratores or EXTRATORES) if e != EXTRATOR_PADRAO]:
+        tempos = []
+        for _ in range(repeticoes):
+            paginas, segundos = extrair(pdf_files, extrator)
+            tempos.append(segundos)
+        filtradas = [d for d in paginas if len(d.page_content) > TAMANHO_MINIMO_PAGINA]
+        resultado = {
+            "paginas": len(paginas),
+            "paginas_mantidas": len(filtradas),
+            "chunks": len(text_splitter.split_documents(filtradas)),
+            "paginas_por_s": round(len(paginas) / max(statistics.median(tempos), 1e-9), 1),
+        }
+
+        if referencia is None:
+            referencia = paginas
+        else:
+            pares = list(zip(referencia, paginas))
+            similaridades = [
+                difflib.SequenceMatcher(None, _normalizar(a.page_content), _normalizar(b.page_content)).ratio()
+                for a, b in pares
+            ]
+            resultado.update({
+                "paginas_identicas": sum(_normalizar(a.page_content) == _normalizar(b.page_content) for a, b in pares),
+                "similaridade_media": round(statistics.mean(similaridades), 4) if similaridades else 1.0,
+                "similaridade_minima": round(min(similaridades), 4) if similaridades else 1.0,
+                "aceleracao": round(resultado["paginas_por_s"] / resultados[EXTRATOR_PADRAO]["paginas_por_s"], 1),
+            })
+        resultados[extrator] = resultado
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--diretorio", help="Diretório com PDFs reais. Sem ele, usa o corpus sintético.")
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    temporario = None
+    if args.diretorio:
+        pdf_files = sorted(os.path.join(args.diretorio, f) for f in os.listdir(args.diretorio) if f.endswith(".pdf"))
+    else:
+        from benchmarks.corpus_sintetico import gerar_corpus
+
+        temporario = tempfile.mkdtemp(prefix="bench_extracao_")
+        pdf_files = gerar_corpus(temporario, n_pdfs=args.pdfs, paginas_por_pdf=args.paginas)
+
+    try:
+        resultados = comparar_extratores(pdf_files, repeticoes=args.repeticoes)
+    finally:
+        if temporario:
+            shutil.rmtree(temporario, ignore_errors=True)
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
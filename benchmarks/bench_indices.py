@@ -0,0 +1,130 @@
+"""
+Benchmark dos tipos de índice FAISS (`TIPOS_INDICE`): recall@k em relação ao
+flat, latência por consulta, tempo de construção e tamanho em disco e na RAM.
+
+Os vetores são sintéticos (misturas gaussianas normalizadas, como embeddings
+de texto) e as consultas são perturbações de vetores do corpus.
+
+Uso:
+    python -m benchmarks.bench_indices --vetores 50000 --dimensao 1536 --k 3
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1]) / 1024
+    return 0.0
+
+
+def _gerar_vetores(n: int, dimensao: int, n_consultas: int, semente: int = 42):
+    """Vetores agrupados em tópicos e consultas próximas a vetores do corpus."""
+    rng = np.random.default_rng(semente)
+    centros = rng.standard_normal((max(10, n // 200), dimensao))
+    vetores = centros[rng.integers(0, len(centros), n)] + 0.5 * rng.standard_normal((n, dimensao))
+    vetores /= np.linalg.norm(vetores, axis=1, keepdims=True)
+    consultas = vetores[rng.choice(n, n_consultas, replace=False)] + 0.02 * rng.standard_normal((n_consultas, dimensao))
+    consultas /= np.linalg.norm(consultas, axis=1, keepdims=True)
+    return vetores.astype(np.float32), consultas.astype(np.float32)
+
+
+def _medir_tipo(tipo: str, vetores, consultas, esperado, k: int, diretorio: str) -> dict:
+    import faiss
+    from src.utils.indice_faiss import construir_indice, ler_indice
+
+    inicio = time.perf_counter()
+    index = construir_indice(vetores, tipo)
+    index.add(vetores)
+    construcao = time.perf_counter() - inicio
+
+    caminho = os.path.join(diretorio, f"{tipo}.faiss")
+    faiss.write_index(index, caminho)
+    del index
+    gc.collect()
+
+    # RAM medida em um subprocesso, sem interferência das alocações anteriores
+    ram = float(subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_indices", "--ram", caminho],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1])
+
+    index = ler_indice(caminho, mmap=False)
+
+    latencias = []
+    obtido = np.empty_like(esperado)
+    for i, consulta in enumerate(consultas):
+        t = time.perf_counter()
+        _, indices = index.search(consulta.reshape(1, -1), k)
+        latencias.append((time.perf_counter() - t) * 1000)
+        obtido[i] = indices[0]
+    recall = np.mean([len(set(e) & set(o)) / k for e, o in zip(esperado, obtido)])
+
+    del index
+    gc.collect()
+    return {
+        "tipo": tipo,
+        f"recall@{k}": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencias, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencias, 95)), 3),
+        "construcao_s": round(construcao, 2),
+        "disco_mb": round(os.path.getsize(caminho) / 1024 ** 2, 1),
+        "ram_mb": round(ram, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vetores", type=int, default=50000)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--tipos", nargs="+", help="Tipos a medir (padrão: todos)")
+    parser.add_argument("--ram", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    import faiss
+
+    from src.utils.indice_faiss import ler_indice
+
+    if args.ram:
+        rss_antes = _rss_mb()
+        index = ler_indice(args.ram, mmap=False)
+        print(round(_rss_mb() - rss_antes, 1))
+        return
+
+    from src.utils.indice_faiss import TIPOS_INDICE
+
+    vetores, consultas = _gerar_vetores(args.vetores, args.dimensao, args.consultas)
+    exato = faiss.IndexFlatL2(args.dimensao)
+    exato.add(vetores)
+    _, esperado = exato.search(consultas, args.k)
+    del exato
+
+    diretorio = tempfile.mkdtemp(prefix="bench_indices_")
+    try:
+        resultados = [
+            _medir_tipo(tipo, vetores, consultas, esperado, args.k, diretorio)
+            for tipo in (args.tipos or TIPOS_INDICE)
+        ]
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: tempo de importação dos módulos e de inicialização do agente.
+
+Cada medição roda em um interpretador novo, para não reaproveitar módulos já
+importados. Para cada módulo de entrada, mede a mediana do tempo de importação
+e lista os pacotes mais pesados (`python -X importtime`). Em seguida, sobre um
+índice sintético e com clientes falsos, compara a inicialização imediata com a
+preguiçosa (`create_rag_chain(preguicoso=True)`): tempo até a cadeia ser
+retornada e até a primeira resposta.
+
+Uso:
+    python -m benchmarks.bench_inicializacao --repeticoes 5
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+MODULOS = ("src.utils.azure_client", "src.agente.agente", "src.api.servidor", "src.pipelines.pipeline_ingestao")
+
+
+def _tempo_importacao(modulo: str) -> float:
+    codigo = f"import time; t = time.perf_counter(); import {modulo}; print(time.perf_counter() - t)"
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return float(saida.stdout.strip().splitlines()[-1])
+
+
+def _mais_pesados(modulo: str, n: int = 5) -> list:
+    """Pacotes que mais contribuem para a importação (soma do tempo próprio de seus módulos)."""
+    saida = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    por_pacote = {}
+    for linha in saida.stderr.splitlines():
+        partes = linha.removeprefix("import time:").split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue
+        pacote = partes[2].strip().split(".")[0]
+        por_pacote[pacote] = por_pacote.get(pacote, 0) + int(partes[0]) / 1e6
+    return [
+        {"pacote": nome, "segundos": round(segundos, 3)}
+        for nome, segundos in sorted(por_pacote.items(), key=lambda item: -item[1])[:n]
+    ]
+
+
+def _medir_agente(diretorio: str, preguicoso: bool) -> dict:
+    """Inicializa o agente no processo atual, com clientes falsos, e mede até a primeira resposta."""
+    inicio = time.perf_counter()
+    os.chdir(diretorio)
+
+    from src.utils.azure_client import registrar_clientes
+
+    def embeddings():
+        from benchmarks.falsos import EmbeddingsFalsos
+        return EmbeddingsFalsos(dimensao=64)
+
+    def slm():
+        from benchmarks.falsos import SLMFalso
+        return SLMFalso()
+
+    registrar_clientes(embeddings=embeddings, slm=slm)
+    from src.agente.agente import create_rag_chain
+
+    rag_chain = create_rag_chain(preguicoso=preguicoso)
+    cadeia_pronta = time.perf_counter() - inicio
+    rag_chain.invoke("Qual a projeção do IPCA para 2025?")
+    return {
+        "modo": "preguicoso" if preguicoso else "imediato",
+        "cadeia_retornada_s": round(cadeia_pronta, 3),
+        "primeira_resposta_s": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def _gerar_indice(diretorio: str):
+    from benchmarks.falsos import EmbeddingsFalsos
+    from src.utils.indice_faiss import criar_vector_store, salvar_indice
+
+    textos = [f"Trecho {i} do relatório sobre inflação, juros e atividade." for i in range(500)]
+    modelo = EmbeddingsFalsos(dimensao=64)
+    vector_store = criar_vector_store(
+        list(zip(textos, modelo.embed_documents(textos))), modelo,
+        metadatas=[{"source": "dados_rpm/RPM_Dez_2024.pdf", "page": i % 40} for i in range(len(textos))]
+    )
+    salvar_indice(vector_store, os.path.join(diretorio, "faiss_index"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--modo", choices=["imediato", "preguicoso"], help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Subprocesso: mede a inicialização do agente em um dos modos
+    if args.modo:
+        print(json.dumps(_medir_agente(args.diretorio, args.modo == "preguicoso")))
+        return
+
+    importacao = []
+    for modulo in MODULOS:
+        tempos = [_tempo_importacao(modulo) for _ in range(args.repeticoes)]
+        importacao.append({
+            "modulo": modulo,
+            "mediana_s": round(statistics.median(tempos), 3),
+            "minimo_s": round(min(tempos), 3),
+            "mais_pesados": _mais_pesados(modulo),
+        })
+
+    diretorio = tempfile.mkdtemp(prefix="bench_inicializacao_")
+    try:
+        _gerar_indice(diretorio)
+        agente = []
+        for modo in ("imediato", "preguicoso"):
+            saida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_inicializacao", "--modo", modo, "--diretorio", diretorio],
+                cwd=RAIZ, capture_output=True, text=True, check=True
+            )
+            agente.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    print(json.dumps({"importacao": importacao, "agente": agente}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
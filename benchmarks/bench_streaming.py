@@ -0,0 +1,91 @@
+"""
+Benchmark: ingestão atual (lista completa em memória) x ingestão em streaming.
+
+Cada modo roda em um subprocesso próprio para que o pico de RSS seja medido
+isoladamente. Os embeddings do Azure são substituídos por `EmbeddingsFalsos`
+com latência simulada, então o benchmark roda offline.
+
+Uso:
+    python -m benchmarks.bench_streaming --pdfs 8 --paginas 40 --latencia 0.05
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+
+def _executar_modo(modo: str, diretorio: str, dimensao: int, latencia: float) -> dict:
+    """Roda um modo de ingestão no processo atual e mede tempo e pico de memória."""
+    from benchmarks.falsos import EmbeddingsFalsos
+
+    os.chdir(diretorio)
+    modelo = EmbeddingsFalsos(dimensao=dimensao, latencia=latencia)
+
+    inicio = time.perf_counter()
+    if modo == "atual":
+        from src.pipelines import pipeline_ingestao
+        pipeline_ingestao.get_azure_embeddings = lambda: modelo
+        pipeline_ingestao.pipeline_ingestao()
+    else:
+        from src.pipelines.pipeline_streaming import pipeline_ingestao_streaming
+        pipeline_ingestao_streaming("./dados_rpm/", "faiss_index", embeddings_model=modelo)
+    duracao = time.perf_counter() - inicio
+
+    return {
+        "modo": modo,
+        "segundos": round(duracao, 3),
+        "rss_pico_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_pico_filhos_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "chamadas_embedding": modelo.chamadas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=8)
+    parser.add_argument("--paginas", type=int, default=40)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latência simulada por chamada de embedding (s)")
+    parser.add_argument("--modo", choices=["atual", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Subprocesso: executa um único modo e devolve o resultado em JSON
+    if args.modo:
+        print(json.dumps(_executar_modo(args.modo, args.diretorio, args.dimensao, args.latencia)))
+        return
+
+    from benchmarks.corpus_sintetico import gerar_corpus
+
+    base = tempfile.mkdtemp(prefix="bench_streaming_")
+    try:
+        gerar_corpus(os.path.join(base, "corpus"), args.pdfs, args.paginas)
+        resultados = []
+        for modo in ("atual", "streaming"):
+            diretorio = os.path.join(base, modo)
+            shutil.copytree(os.path.join(base, "corpus"), os.path.join(diretorio, "dados_rpm"))
+            saida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_streaming", "--modo", modo, "--diretorio", diretorio,
+                 "--dimensao", str(args.dimensao), "--latencia", str(args.latencia)],
+                cwd=RAIZ, capture_output=True, text=True, check=True
+            )
+            resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    print(f"\nCorpus: {args.pdfs} PDFs x {args.paginas} páginas | latência de embedding: {args.latencia}s\n")
+    print(f"{'modo':<10} {'tempo (s)':>10} {'RSS pico (MB)':>14} {'RSS filhos (MB)':>16} {'chamadas':>9}")
+    for r in resultados:
+        print(f"{r['modo']:<10} {r['segundos']:>10} {r['rss_pico_mb']:>14} {r['rss_pico_filhos_mb']:>16} {r['chamadas_embedding']:>9}")
+
+
+if __name__ == "__main__":
+    main()
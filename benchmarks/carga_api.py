@@ -0,0 +1,110 @@
+"""
+Teste de carga da API HTTP (`src/api/servidor.py`) com e sem micro-batching.
+
+O servidor roda no próprio processo sobre um índice FAISS sintético, com
+`EmbeddingsFalsos` e `SLMFalso` simulando a latência do Azure. Para cada
+janela de agrupamento, `--clientes` clientes simultâneos enviam perguntas até
+completar `--requisicoes`; são reportados QPS, latências p50/p95/p99 e o
+número de chamadas de embedding.
+
+Uso:
+    python -m benchmarks.carga_api --requisicoes 2000 --clientes 200 --janelas 0 5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+
+def _montar_componentes(n_chunks: int, dimensao: int, latencia_embedding: float, latencia_slm: float):
+    """Cria um índice sintético e os componentes RAG com embeddings e SLM falsos."""
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.prompts import ChatPromptTemplate
+    from benchmarks.falsos import EmbeddingsFalsos, SLMFalso
+    from src.agente.agente import ComponentesRAG, PROMPT_TEMPLATE
+
+    modelo = EmbeddingsFalsos(dimensao=dimensao)
+    textos = [f"Trecho {i} do Relatório de Política Monetária sobre inflação e juros." for i in range(n_chunks)]
+    metadatas = [{"source": f"dados_rpm/RPM_Dez_{2020 + i % 5}.pdf", "page": i % 40} for i in range(n_chunks)]
+    vector_store = FAISS.from_embeddings(list(zip(textos, modelo.embed_documents(textos))), modelo, metadatas=metadatas)
+
+    modelo.latencia = latencia_embedding
+    modelo.chamadas = 0
+    return ComponentesRAG(modelo, SLMFalso(latencia=latencia_slm), vector_store, ChatPromptTemplate.from_template(PROMPT_TEMPLATE))
+
+
+async def _rodar_carga(componentes, janela_ms: float, requisicoes: int, clientes: int, porta: int) -> dict:
+    import aiohttp
+    from aiohttp import web
+    from src.api.servidor import SERVICO, criar_app
+
+    app = criar_app(componentes, janela_ms=janela_ms, max_lote=256, max_llm=clientes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", porta).start()
+
+    componentes.embeddings_model.chamadas = 0
+    latencias = []
+    fila = iter(range(requisicoes))
+
+    async def cliente(sessao):
+        for i in fila:
+            inicio = time.perf_counter()
+            async with sessao.post(f"http://127.0.0.1:{porta}/perguntar", json={"pergunta": f"Qual a projeção {i}?"}) as resposta:
+                await resposta.read()
+                if resposta.status != 200:
+                    raise RuntimeError(f"Status {resposta.status}")
+            latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=clientes)) as sessao:
+            await asyncio.gather(*(cliente(sessao) for _ in range(clientes)))
+    finally:
+        duracao = time.perf_counter() - inicio
+        estatisticas = app[SERVICO].agrupador.estatisticas
+        await runner.cleanup()
+
+    ms = np.array(latencias) * 1000
+    return {
+        "janela_ms": janela_ms,
+        "requisicoes": len(latencias),
+        "qps": round(len(latencias) / duracao, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "chamadas_embedding": componentes.embeddings_model.chamadas,
+        "lotes": estatisticas["lotes"],
+        "maior_lote": estatisticas["maior_lote"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--janelas", type=float, nargs="+", default=[0, 5], help="Janelas de agrupamento (ms); 0 = sem micro-batching")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--latencia-embedding", type=float, default=0.03, help="Latência simulada por chamada de embedding (s)")
+    parser.add_argument("--latencia-slm", type=float, default=0.2, help="Latência simulada por chamada ao SLM (s)")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    componentes = _montar_componentes(args.chunks, args.dimensao, args.latencia_embedding, args.latencia_slm)
+    resultados = [
+        asyncio.run(_rodar_carga(componentes, janela, args.requisicoes, args.clientes, args.porta))
+        for janela in args.janelas
+    ]
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
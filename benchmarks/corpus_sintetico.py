@@ -0,0 +1,115 @@
+import os
+import random
+
+# Vocabulário usado para gerar parágrafos com "cara" de RPM
+_TERMOS = [
+    "inflação", "IPCA", "Selic", "juros", "câmbio", "atividade econômica", "PIB",
+    "expectativas", "política monetária", "Copom", "crédito", "mercado de trabalho",
+    "preços administrados", "IPCA livres", "serviços", "bens industriais", "alimentos",
+    "cenário externo", "commodities", "hiato do produto", "projeção", "meta",
+]
+_CONECTORES = [
+    "O Comitê avalia que", "No cenário de referência,", "Em relação ao trimestre anterior,",
+    "A projeção para", "Observa-se que", "Os dados recentes indicam que",
+]
+
+
+def _paragrafo(rng: random.Random) -> str:
+    termos = rng.sample(_TERMOS, 4)
+    return (
+        f"{rng.choice(_CONECTORES)} {termos[0]} e {termos[1]} seguem em trajetória "
+        f"compatível com {termos[2]}, com variação de {rng.uniform(-2, 8):.1f}% em {rng.randint(2015, 2027)} "
+        f"e impacto sobre {termos[3]}."
+    )
+
+
+def _comandos_tabela(linhas: list, x: float = 40, y: float = 300, largura: float = 110, altura: float = 18) -> list:
+    """Desenha uma tabela com bordas (detectável pelo pdfplumber) a partir de (x, y), de cima para baixo."""
+    n_colunas = max(len(linha) for linha in linhas)
+    base = y - altura * len(linhas)
+    comandos = ["0.5 w"]
+    for i in range(len(linhas) + 1):
+        comandos.append(f"{x} {y - altura * i} m {x + largura * n_colunas} {y - altura * i} l S")
+    for j in range(n_colunas + 1):
+        comandos.append(f"{x + largura * j} {y} m {x + largura * j} {base} l S")
+    for i, linha in enumerate(linhas):
+        for j, celula in enumerate(linha):
+            texto = celula.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            comandos.append(f"BT /F1 9 Tf {x + largura * j + 4} {y - altura * (i + 1) + 5} Td ({texto}) Tj ET")
+    return comandos
+
+
+def escrever_pdf(caminho: str, paginas: list, tabelas: dict = None):
+    """
+    Grava um PDF mínimo (fonte Helvetica padrão, uma linha de texto por item).
+
+    Args:
+        caminho (str): Arquivo de saída.
+        paginas (list): Lista de páginas, cada uma uma lista de linhas de texto.
+        tabelas (dict, opcional): Índice da página -> linhas (listas de células)
+            de uma tabela com bordas desenhada abaixo do texto.
+    """
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for numero, linhas in enumerate(paginas):
+        comandos = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        for linha in linhas:
+            texto = linha.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            comandos.append(f"({texto}) Tj T*")
+        comandos.append("ET")
+        if tabelas and numero in tabelas:
+            comandos.extend(_comandos_tabela(tabelas[numero]))
+        stream = "\n".join(comandos).encode("cp1252", errors="replace")
+        objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objetos)
+        )
+        kids.append(len(objetos))
+    objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        " ".join(f"{k} 0 R" for k in kids).encode(), len(kids)
+    )
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for numero, corpo in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, corpo)
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+
+    with open(caminho, "wb") as f:
+        f.write(bytes(saida))
+
+
+def gerar_corpus(diretorio: str, n_pdfs: int = 4, paginas_por_pdf: int = 20, semente: int = 42) -> list:
+    """
+    Gera um corpus sintético de PDFs no formato `RPM_<Mês>_<Ano>.pdf`.
+
+    Returns:
+        list: Caminhos dos PDFs gerados.
+    """
+    meses = ["Mar", "Jun", "Set", "Dez"]
+    rng = random.Random(semente)
+    os.makedirs(diretorio, exist_ok=True)
+
+    caminhos = []
+    for i in range(n_pdfs):
+        nome = f"RPM_{meses[i % 4]}_{2015 + i // 4}.pdf"
+        paginas = []
+        for p in range(paginas_por_pdf):
+            linhas = [f"Relatório de Política Monetária - {nome[4:-4]} - página {p + 1}"]
+            while len(linhas) < 60:
+                paragrafo = _paragrafo(rng)
+                linhas.extend(paragrafo[j:j + 110] for j in range(0, len(paragrafo), 110))
+            paginas.append(linhas)
+        caminho = os.path.join(diretorio, nome)
+        escrever_pdf(caminho, paginas)
+        caminhos.append(caminho)
+    return caminhos
@@ -0,0 +1,86 @@
+import time
+import asyncio
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# ------------------------------
+# SUBSTITUTOS DETERMINÍSTICOS
+# ------------------------------
+class EmbeddingsFalsos(Embeddings):
+    """
+    Embeddings determinísticos para rodar o pipeline sem o Azure.
+
+    O vetor de cada texto é derivado do hash do seu conteúdo, então o mesmo texto
+    sempre gera o mesmo vetor. `latencia` simula o tempo de ida e volta de cada
+    chamada à API.
+    """
+
+    def __init__(self, dimensao: int = 1536, latencia: float = 0.0):
+        self.dimensao = dimensao
+        self.latencia = latencia
+        self.deployment = f"falso-{dimensao}"
+        self.chamadas = 0
+
+    def _vetor(self, texto: str) -> list:
+        semente = int.from_bytes(hashlib.sha256(texto.encode("utf-8")).digest()[:8], "little")
+        vetor = np.random.default_rng(semente).standard_normal(self.dimensao)
+        return (vetor / np.linalg.norm(vetor)).tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        return [self._vetor(t) for t in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
+
+
+class SLMFalso(BaseChatModel):
+    """
+    SLM local para testes de carga: responde com um trecho fixo após `latencia`
+    segundos, sem bloquear o event loop no caminho assíncrono.
+
+    Em streaming, entrega a resposta palavra por palavra, com `latencia_token`
+    segundos entre elas.
+    """
+
+    latencia: float = 0.0
+    latencia_token: float = 0.0
+    resposta: str = "Resposta simulada com base nos relatórios fornecidos."
+
+    @property
+    def _llm_type(self) -> str:
+        return "slm-falso"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latencia:
+            time.sleep(self.latencia)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.resposta))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.resposta))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        for i, palavra in enumerate(self.resposta.split(" ")):
+            if i and self.latencia_token:
+                time.sleep(self.latencia_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=palavra if i == 0 else " " + palavra))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        for i, palavra in enumerate(self.resposta.split(" ")):
+            if i and self.latencia_token:
+                await asyncio.sleep(self.latencia_token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=palavra if i == 0 else " " + palavra))
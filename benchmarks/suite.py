@@ -0,0 +1,278 @@
+"""
+Suíte de benchmarks offline do Financial Insight Bot.
+
+Gera um corpus sintético de PDFs, roda a ingestão completa e depois o agente
+com os clientes Azure substituídos por modelos determinísticos
+(`registrar_clientes` + `benchmarks/falsos.py`). Cada fase roda em um
+subprocesso próprio, para que o tempo de inicialização e o pico de RSS sejam
+medidos isoladamente.
+
+Métricas: páginas/s e chunks/s da ingestão, tempo de construção do índice,
+latência de recuperação e da cadeia completa (p50/p95/p99), tempo até o
+primeiro token, tempo de inicialização do agente e pico de RSS. O resultado é
+gravado em JSON, identificado pelo commit, para comparação entre versões.
+
+Uso:
+    python -m benchmarks.suite --pdfs 8 --paginas 20 --consultas 200
+    python -m benchmarks.suite --comparar benchmarks/resultados/suite_a1b2c3d.json benchmarks/resultados/suite_e4f5g6h.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, RAIZ)
+
+RESULTADOS_DIR = os.path.join(RAIZ, "benchmarks", "resultados")
+
+
+def _rss_pico_mb() -> dict:
+    return {
+        "rss_pico_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_pico_filhos_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def _percentis(latencias: list, prefixo: str) -> dict:
+    return {
+        f"{prefixo}_p{p}_ms": round(float(np.percentile(latencias, p)), 3)
+        for p in (50, 95, 99)
+    }
+
+
+def _cronometrar(modulo, nome: str, tempos: dict):
+    """Substitui `modulo.nome` por uma versão que acumula o tempo gasto em `tempos[nome]`."""
+    original = getattr(modulo, nome)
+
+    def cronometrado(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            tempos[nome] = tempos.get(nome, 0.0) + time.perf_counter() - inicio
+
+    setattr(modulo, nome, cronometrado)
+
+
+def _perguntas(n: int, semente: int = 7) -> list:
+    from benchmarks.corpus_sintetico import _TERMOS
+
+    rng = random.Random(semente)
+    modelos = [
+        "Qual a projeção de {} para {}?",
+        "Como o Copom avalia {} em {}?",
+        "O que o relatório diz sobre {} e o cenário de {}?",
+    ]
+    return [rng.choice(modelos).format(rng.choice(_TERMOS), rng.randint(2015, 2027)) for _ in range(n)]
+
+# ------------------------------
+# FASES (executadas em subprocessos)
+# ------------------------------
+def fase_ingestao(diretorio: str, paginas: int, dimensao: int, latencia: float, tipo_indice: str) -> dict:
+    """Roda `pipeline_ingestao` sobre `diretorio/dados_rpm` com embeddings falsos."""
+    from benchmarks.falsos import EmbeddingsFalsos
+    from src.utils.azure_client import registrar_clientes
+
+    os.chdir(diretorio)
+    modelo = EmbeddingsFalsos(dimensao=dimensao, latencia=latencia)
+    registrar_clientes(embeddings=lambda: modelo)
+
+    from src.pipelines import pipeline_ingestao as modulo
+
+    tempos = {}
+    for nome in ("processar_dados", "criar_vector_store", "salvar_indice"):
+        _cronometrar(modulo, nome, tempos)
+
+    inicio = time.perf_counter()
+    modulo.pipeline_ingestao(tipo_indice=tipo_indice)
+    duracao = time.perf_counter() - inicio
+
+    from src.utils.indice_faiss import carregar_indice
+    from src.utils.versoes_indice import diretorio_atual
+    chunks = carregar_indice(diretorio_atual("faiss_index"), modelo).index.ntotal
+
+    return {
+        "segundos": round(duracao, 3),
+        "paginas": paginas,
+        "chunks": chunks,
+        "paginas_por_s": round(paginas / duracao, 1),
+        "chunks_por_s": round(chunks / duracao, 1),
+        "extracao_s": round(tempos.get("processar_dados", 0.0), 3),
+        "construcao_indice_s": round(tempos.get("criar_vector_store", 0.0) + tempos.get("salvar_indice", 0.0), 3),
+        "chamadas_embedding": modelo.chamadas,
+        **_rss_pico_mb(),
+    }
+
+
+def fase_consulta(diretorio: str, consultas: int, dimensao: int, latencia: float, latencia_slm: float) -> dict:
+    """Inicializa o agente sobre o índice de `diretorio` e mede recuperação e cadeia completa."""
+    os.chdir(diretorio)
+    inicio = time.perf_counter()
+
+    from benchmarks.falsos import EmbeddingsFalsos, SLMFalso
+    from src.utils.azure_client import registrar_clientes
+
+    registrar_clientes(
+        embeddings=lambda: EmbeddingsFalsos(dimensao=dimensao, latencia=latencia),
+        slm=lambda: SLMFalso(latencia=latencia_slm)
+    )
+    from src.agente import agente
+    importacao = time.perf_counter() - inicio
+
+    componentes = agente.carregar_componentes()
+    retriever = agente.criar_retriever(componentes)
+    rag_chain = agente.create_rag_chain(componentes=componentes)
+    inicializacao = time.perf_counter() - inicio
+
+    perguntas = _perguntas(consultas)
+    for pergunta in perguntas[:5]:
+        retriever.invoke(pergunta)
+
+    recuperacao = []
+    for pergunta in perguntas:
+        t = time.perf_counter()
+        retriever.invoke(pergunta)
+        recuperacao.append((time.perf_counter() - t) * 1000)
+
+    cadeia, primeiro_token = [], []
+    for pergunta in perguntas:
+        t = time.perf_counter()
+        primeiro = None
+        for parte in rag_chain.stream(pergunta):
+            if primeiro is None and parte.get("result"):
+                primeiro = time.perf_counter() - t
+        cadeia.append((time.perf_counter() - t) * 1000)
+        primeiro_token.append((primeiro or 0.0) * 1000)
+
+    return {
+        "consultas": consultas,
+        "importacao_s": round(importacao, 3),
+        "inicializacao_s": round(inicializacao, 3),
+        **_percentis(recuperacao, "recuperacao"),
+        **_percentis(cadeia, "cadeia"),
+        **_percentis(primeiro_token, "primeiro_token"),
+        **_rss_pico_mb(),
+    }
+
+# ------------------------------
+# EXECUÇÃO E COMPARAÇÃO
+# ------------------------------
+def _commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        alterado = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ, capture_output=True, text=True
+        ).stdout.strip()
+        return commit + ("-alterado" if alterado else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def _subprocesso(fase: str, diretorio: str, args) -> dict:
+    saida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--fase", fase, "--diretorio", diretorio,
+         "--pdfs", str(args.pdfs), "--paginas", str(args.paginas), "--consultas", str(args.consultas),
+         "--dimensao", str(args.dimensao), "--latencia", str(args.latencia),
+         "--latencia-slm", str(args.latencia_slm), "--tipo-indice", args.tipo_indice],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    if saida.returncode != 0:
+        raise RuntimeError(f"Fase '{fase}' falhou:\n{saida.stderr[-2000:]}")
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def executar_suite(args) -> dict:
+    """Gera o corpus, roda as fases em subprocessos e monta o resultado."""
+    from benchmarks.corpus_sintetico import gerar_corpus
+
+    base = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        gerar_corpus(os.path.join(base, "dados_rpm"), args.pdfs, args.paginas)
+        ingestao = _subprocesso("ingestao", base, args)
+        consulta = _subprocesso("consulta", base, args)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    return {
+        "commit": _commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "parametros": {
+            "pdfs": args.pdfs, "paginas": args.paginas, "consultas": args.consultas,
+            "dimensao": args.dimensao, "latencia": args.latencia,
+            "latencia_slm": args.latencia_slm, "tipo_indice": args.tipo_indice,
+        },
+        "ingestao": ingestao,
+        "consulta": consulta,
+    }
+
+
+def comparar(caminho_a: str, caminho_b: str):
+    """Imprime as métricas numéricas de dois resultados lado a lado, com a variação."""
+    with open(caminho_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(caminho_b, encoding="utf-8") as f:
+        b = json.load(f)
+
+    if a["parametros"] != b["parametros"]:
+        print("⚠️ Os resultados foram gerados com parâmetros diferentes.")
+    print(f"\n{'métrica':<36} {a['commit']:>16} {b['commit']:>16} {'variação':>10}")
+    for secao in ("ingestao", "consulta"):
+        for nome, valor_a in a[secao].items():
+            valor_b = b[secao].get(nome)
+            if not isinstance(valor_a, (int, float)) or not isinstance(valor_b, (int, float)):
+                continue
+            variacao = f"{(valor_b - valor_a) / valor_a:+.1%}" if valor_a else "-"
+            print(f"{secao + '.' + nome:<36} {valor_a:>16} {valor_b:>16} {variacao:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=int, default=8)
+    parser.add_argument("--paginas", type=int, default=20)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--dimensao", type=int, default=1536)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência simulada por chamada de embedding (s)")
+    parser.add_argument("--latencia-slm", type=float, default=0.0, help="Latência simulada do SLM até o primeiro token (s)")
+    parser.add_argument("--tipo-indice", default="flat")
+    parser.add_argument("--saida", help="Arquivo JSON do resultado (padrão: benchmarks/resultados/suite_<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("A", "B"), help="Compara dois resultados já gravados")
+    parser.add_argument("--fase", choices=["ingestao", "consulta"], help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    # Subprocesso: executa uma fase e devolve o resultado em JSON
+    if args.fase == "ingestao":
+        print(json.dumps(fase_ingestao(args.diretorio, args.pdfs * args.paginas, args.dimensao, args.latencia, args.tipo_indice)))
+        return
+    if args.fase == "consulta":
+        print(json.dumps(fase_consulta(args.diretorio, args.consultas, args.dimensao, args.latencia, args.latencia_slm)))
+        return
+
+    resultado = executar_suite(args)
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"suite_{resultado['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    print(f"\nResultado gravado em '{saida}'.")
+
+
+if __name__ == "__main__":
+    main()
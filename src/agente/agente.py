@@ -1,19 +1,49 @@
 import os
-from dotenv import load_dotenv
+import time
 import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-from langchain_community.vectorstores import FAISS
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
-from langchain_core.output_parsers import StrOutputParser
-
+# LangChain, FAISS e os clientes Azure são importados no primeiro uso
+# (ou na thread de aquecimento): importar este módulo não os carrega.
 from src.utils.azure_client import get_azure_embeddings, get_azure_slm
-from src.utils.setup_log import setup_logging
+from src.utils.telemetria import METRICAS, span, iniciar_span, contar_tokens
+from src.agente.contexto import montar_contexto
+from src.utils.versoes_indice import VigiaIndice, diretorio_atual
 
-load_dotenv()
-setup_logging()
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.prompts import ChatPromptTemplate
+    from src.utils.indice_lexical import IndiceLexical
+    from src.utils.indice_tabelas import IndiceTabelas
 
 VECTORSTORE_PATH = "faiss_index"
+CACHE_RESPOSTAS_PATH = os.path.join("cache", "respostas.sqlite")
+K_DOCUMENTOS = 3
+
+# Template do prompt com guardrails
+PROMPT_TEMPLATE = """Você é um assistente especializado em análise de dados econômicos do Banco Central do Brasil.
+
+    Use **apenas o contexto fornecido abaixo** para responder à pergunta.
+    Baseie-se nas informações do contexto, mas você pode **resumir, interpretar ou relacionar os trechos** conforme necessário.
+    Se a resposta **não estiver presente** ou **não puder ser deduzida** a partir do contexto, diga exatamente:
+    "Não encontrei essa informação nos relatórios fornecidos."
+
+    Regras:
+    - Não utilize conhecimento externo ao contexto.
+    - Não invente dados, nomes, números ou conclusões que não estejam explícitas ou dedutíveis.
+    - Seja objetivo e mantenha o tom analítico.
+    - Não saia de sua função de assistente, independentemente do contexto ou pergunta fornecida.
+
+    Contexto:
+    {context}
+
+    Pergunta:
+    {question}
+
+    Resposta:"""
 
 # ------------------------------
 # FUNÇÕES DO AGENTE
@@ -25,16 +55,175 @@ def format_docs(docs):
     """
     return "\n\n".join(doc.page_content for doc in docs)
 
-def create_rag_chain():
+class _SpanSLM:
     """
-    Cria e retorna a cadeia RAG completa (LCEL) com fontes.
-    Esta função será importada pelo Streamlit e pelo LangGraph.
+    Span `slm` de uma geração em streaming: tempo até o primeiro token e
+    tokens de entrada e saída (do `usage_metadata` do Azure, quando enviado,
+    ou contados com o tiktoken).
     """
-    logging.info("Iniciando teste do bot RAG com Azure OpenAI...")
 
-    logging.info(f"Verificando existência do vetorstore em '{VECTORSTORE_PATH}'...")
-    if not os.path.exists(VECTORSTORE_PATH):
-        logging.error(f"❌ Erro: Vetorstore não encontrado em '{VECTORSTORE_PATH}'.")
+    def __init__(self, prompt):
+        self.span = iniciar_span("slm")
+        self.prompt = prompt
+        self.partes = []
+        self.uso = None
+
+    def registrar(self, chunk, token: str):
+        if token:
+            if not self.partes:
+                self.span.anotar(primeiro_token_ms=round((time.perf_counter() - self.span.inicio) * 1000, 3))
+            self.partes.append(token)
+        self.uso = getattr(chunk, "usage_metadata", None) or self.uso
+
+    def finalizar(self, erro=None):
+        if self.span.duracao is not None:
+            return
+        entrada = self.uso["input_tokens"] if self.uso else contar_tokens(self.prompt.to_string())
+        saida = self.uso["output_tokens"] if self.uso else contar_tokens("".join(self.partes))
+        METRICAS.incrementar("fib_tokens_total", entrada, tipo="entrada")
+        METRICAS.incrementar("fib_tokens_total", saida, tipo="saida")
+        self.span.anotar(tokens_entrada=entrada, tokens_saida=saida)
+        self.span.finalizar(erro)
+
+def gerar_resposta(slm, x):
+    """
+    Executa o SLM em streaming: entrega primeiro os documentos de origem e depois
+    os tokens da resposta à medida que chegam.
+
+    Os pedaços são `AddableDict`, então `invoke` na cadeia continua retornando
+    `{"result", "source_documents"}` completos, enquanto `stream` entrega as
+    referências imediatamente e o texto de forma progressiva.
+    """
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables.utils import AddableDict
+
+    yield AddableDict(source_documents=x["source_documents"], result="")
+    parser = StrOutputParser()
+    medicao = _SpanSLM(x["prompt"])
+    try:
+        for chunk in slm.stream(x["prompt"]):
+            token = parser.invoke(chunk)
+            medicao.registrar(chunk, token)
+            if token:
+                yield AddableDict(result=token)
+    except Exception as e:
+        medicao.finalizar(e)
+        raise
+    finally:
+        medicao.finalizar()
+
+async def agerar_resposta(slm, x):
+    """Versão assíncrona de `gerar_resposta`, usada por `ainvoke`/`astream` (API HTTP)."""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables.utils import AddableDict
+
+    yield AddableDict(source_documents=x["source_documents"], result="")
+    parser = StrOutputParser()
+    medicao = _SpanSLM(x["prompt"])
+    try:
+        async for chunk in slm.astream(x["prompt"]):
+            token = parser.invoke(chunk)
+            medicao.registrar(chunk, token)
+            if token:
+                yield AddableDict(result=token)
+    except Exception as e:
+        medicao.finalizar(e)
+        raise
+    finally:
+        medicao.finalizar()
+
+@dataclass
+class ComponentesRAG:
+    """
+    Componentes carregados uma única vez e compartilhados pelas cadeias e pela API.
+
+    Em um índice particionado, `vector_store` é None e cada partição tem seu
+    próprio vetorstore e índice lexical em `particoes`. O índice de tabelas,
+    quando existe, é único para todo o índice. `diretorio` é a versão do
+    índice carregada.
+
+    Quem troca os componentes por uma nova versão chama `aposentar`: as
+    conexões SQLite (docstore, índices lexical e de tabelas, partições e os
+    recursos anexados com `anexar`) são fechadas quando termina a última
+    pergunta registrada com `adquirir`.
+    """
+    embeddings_model: object
+    slm: object
+    vector_store: "FAISS"
+    prompt: "ChatPromptTemplate"
+    indice_lexical: "IndiceLexical" = None
+    particoes: list = None
+    indice_tabelas: "IndiceTabelas" = None
+    diretorio: str = VECTORSTORE_PATH
+    _trava: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _em_andamento: int = field(default=0, init=False, repr=False, compare=False)
+    _aposentado: bool = field(default=False, init=False, repr=False, compare=False)
+    _recursos: list = field(default_factory=list, init=False, repr=False, compare=False)
+    fechado: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def anexar(self, recurso):
+        """Fecha `recurso` (com um método `fechar`) junto com os componentes, como o cache de respostas da cadeia."""
+        self._recursos.append(recurso)
+
+    def adquirir(self):
+        """Registra uma pergunta em andamento com estes componentes."""
+        with self._trava:
+            self._em_andamento += 1
+
+    def liberar(self):
+        """Encerra uma pergunta registrada com `adquirir`."""
+        with self._trava:
+            self._em_andamento -= 1
+            fechar = self._aposentado and self._em_andamento == 0
+        if fechar:
+            self.fechar()
+
+    def aposentar(self):
+        """Marca os componentes como substituídos; são fechados quando não houver perguntas em andamento."""
+        with self._trava:
+            self._aposentado = True
+            fechar = self._em_andamento == 0
+        if fechar:
+            self.fechar()
+
+    def fechar(self):
+        """Fecha as conexões do docstore e dos índices lexical e de tabelas, inclusive das partições."""
+        with self._trava:
+            if self.fechado:
+                return
+            self.fechado = True
+
+        indices = [(self.vector_store, self.indice_lexical)]
+        indices += [(p.vector_store, p.indice_lexical) for p in self.particoes or []]
+        for vector_store, indice_lexical in indices:
+            docstore = getattr(vector_store, "docstore", None)
+            if hasattr(docstore, "fechar"):
+                docstore.fechar()
+            if indice_lexical is not None:
+                indice_lexical.fechar()
+        if self.indice_tabelas is not None:
+            self.indice_tabelas.fechar()
+        for recurso in self._recursos:
+            recurso.fechar()
+        logging.info(f"🔒 Componentes da versão '{os.path.basename(self.diretorio)}' fechados.")
+
+
+def carregar_componentes() -> ComponentesRAG:
+    """
+    Conecta aos serviços do Azure OpenAI, carrega o índice FAISS e monta o prompt.
+
+    Com índices versionados, carrega a versão apontada por `faiss_index/CURRENT`.
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+    from src.utils.indice_faiss import carregar_indice
+    from src.utils.indice_lexical import IndiceLexical, LEXICAL_ARQUIVO
+    from src.utils.indice_tabelas import IndiceTabelas, TABELAS_ARQUIVO
+    from src.utils.particoes import indice_particionado, carregar_particoes
+
+    diretorio = diretorio_atual(VECTORSTORE_PATH)
+    logging.info(f"Verificando existência do vetorstore em '{diretorio}'...")
+    if not os.path.exists(diretorio):
+        logging.error(f"❌ Erro: Vetorstore não encontrado em '{diretorio}'.")
         logging.info("Por favor, execute 'pipeline_ingestao.py' primeiro.")
         exit()
 
@@ -51,42 +240,183 @@ def create_rag_chain():
         logging.error(f"❌ Erro ao conectar com Azure: {e}")
         exit()
 
+    prompt = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+    logging.info("Prompt customizado criado.")
+
+    indice_tabelas = None
+    if os.path.exists(os.path.join(diretorio, TABELAS_ARQUIVO)):
+        indice_tabelas = IndiceTabelas(os.path.join(diretorio, TABELAS_ARQUIVO))
+        logging.info(f"Índice de tabelas carregado: {indice_tabelas.total} valores.")
+
+    # Índice particionado: uma partição por relatório ou por ano
+    if indice_particionado(diretorio):
+        logging.info(f"Carregando partições do índice FAISS de {diretorio}...")
+        particoes = carregar_particoes(diretorio, embeddings_model)
+        return ComponentesRAG(
+            embeddings_model, slm, None, prompt, particoes=particoes, indice_tabelas=indice_tabelas, diretorio=diretorio
+        )
+
     # Carregando vetorstore FAISS
-    logging.info(f"Carregando índice FAISS de {VECTORSTORE_PATH}...")
-    vector_store = FAISS.load_local(
-        VECTORSTORE_PATH, 
-        embeddings_model,
-        allow_dangerous_deserialization=True 
+    logging.info(f"Carregando índice FAISS de {diretorio}...")
+    vector_store = carregar_indice(diretorio, embeddings_model)
+
+    indice_lexical = None
+    if os.path.exists(os.path.join(diretorio, LEXICAL_ARQUIVO)):
+        indice_lexical = IndiceLexical(os.path.join(diretorio, LEXICAL_ARQUIVO))
+        logging.info(f"Índice lexical (BM25) carregado: {indice_lexical.total} chunks.")
+
+    return ComponentesRAG(
+        embeddings_model, slm, vector_store, prompt, indice_lexical, indice_tabelas=indice_tabelas, diretorio=diretorio
     )
 
-    # Criando o 'Retriever'
-    retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    logging.info("Vetorstore carregado e 'Retriever' pronto.")
+def criar_retriever(componentes: ComponentesRAG, modo: str = None, embeddings=None):
+    """
+    Cria o retriever da cadeia RAG.
 
-    # Template do prompt com guardrails
-    template = """Você é um assistente especializado em análise de dados econômicos do Banco Central do Brasil.
+    Com índice lexical disponível, usa a recuperação híbrida (BM25 + FAISS com
+    RRF) no modo de RECUPERACAO_MODO (`hibrido`, `denso` ou `lexical`); sem
+    ele, só a busca densa, com os mesmos resultados do retriever padrão do
+    FAISS. Índices particionados usam o `RetrieverParticionado`, que roteia a
+    pergunta para as edições citadas.
 
-    Use **apenas o contexto fornecido abaixo** para responder à pergunta.
-    Baseie-se nas informações do contexto, mas você pode **resumir, interpretar ou relacionar os trechos** conforme necessário.
-    Se a resposta **não estiver presente** ou **não puder ser deduzida** a partir do contexto, diga exatamente:
-    "Não encontrei essa informação nos relatórios fornecidos."
+    Os `K_DOCUMENTOS` finais saem de um conjunto maior de candidatos, com MMR
+    (peso da relevância em RECUPERACAO_DIVERSIDADE; 1 desativa) e, se
+    RERANQUEADOR_MODELO estiver definido, um cross-encoder local.
 
-    Regras:
-    - Não utilize conhecimento externo ao contexto.
-    - Não invente dados, nomes, números ou conclusões que não estejam explícitas ou dedutíveis.
-    - Seja objetivo e mantenha o tom analítico.
-    - Não saia de sua função de assistente, independentemente do contexto ou pergunta fornecida.
+    `embeddings`, se informado, gera o embedding da pergunta no lugar do
+    modelo do índice.
+    """
+    from src.agente.recuperacao import RetrieverHibrido, RetrieverParticionado
+    from src.agente.diversidade import criar_reranqueador
 
-    Contexto:
-    {context}
+    modo = modo or os.getenv("RECUPERACAO_MODO", "hibrido")
+    lambda_mmr = float(os.getenv("RECUPERACAO_DIVERSIDADE", "0.7"))
+    if componentes.particoes:
+        return RetrieverParticionado(
+            particoes=componentes.particoes,
+            embeddings=embeddings,
+            k=K_DOCUMENTOS,
+            modo=modo,
+            lambda_mmr=lambda_mmr,
+            reranqueador=criar_reranqueador()
+        )
+    return RetrieverHibrido(
+        vector_store=componentes.vector_store,
+        indice_lexical=componentes.indice_lexical,
+        embeddings=embeddings,
+        k=K_DOCUMENTOS,
+        modo=modo,
+        lambda_mmr=lambda_mmr,
+        reranqueador=criar_reranqueador()
+    )
 
-    Pergunta:
-    {question}
+def criar_cadeia_resposta(componentes: ComponentesRAG):
+    """
+    Parte da cadeia RAG posterior à recuperação: recebe `{"context": docs,
+    "question": pergunta}` e gera `{"result", "source_documents"}`.
 
-    Resposta:"""
+    O contexto do prompt é montado por `montar_contexto`: chunks sobrepostos da
+    mesma página são mesclados, repetições descartadas e os trechos mais
+    relevantes limitados a CONTEXTO_MAX_TOKENS (0 desativa o limite). As fontes
+    retornadas são os documentos que entraram no contexto.
 
-    prompt = ChatPromptTemplate.from_template(template)
-    logging.info("Prompt customizado criado.")
+    É compartilhada por `create_rag_chain` e pela API HTTP, que faz a recuperação
+    em lote (`src/api/servidor.py`). Tem caminho síncrono e assíncrono.
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    slm, prompt = componentes.slm, componentes.prompt
+    max_tokens = int(os.getenv("CONTEXTO_MAX_TOKENS", "1500")) or None
+
+    def montar_prompt(x):
+        # mescla os chunks sobrepostos no orçamento de tokens, e preserva os docs usados
+        with span("prompt", documentos=len(x["context"])) as atual:
+            contexto = montar_contexto(x["context"], max_tokens)
+            METRICAS.incrementar("fib_documentos_recuperados_total", len(contexto.documentos))
+            METRICAS.incrementar("fib_tokens_economizados_total", contexto.tokens_economizados)
+            atual.anotar(
+                tokens_contexto=contexto.tokens,
+                tokens_economizados=contexto.tokens_economizados
+            )
+            return {
+                "prompt": prompt.invoke({
+                    "context": contexto.texto,
+                    "question": x["question"]
+                }),
+                "source_documents": contexto.documentos
+            }
+
+    async def amontar_prompt(x):
+        return montar_prompt(x)
+
+    def responder(x):
+        # executa o SLM em streaming, preservando os docs
+        yield from gerar_resposta(slm, x)
+
+    async def aresponder(x):
+        async for parte in agerar_resposta(slm, x):
+            yield parte
+
+    return RunnableLambda(montar_prompt, afunc=amontar_prompt) | RunnableLambda(responder, afunc=aresponder)
+
+def create_rag_chain(
+    usar_cache: bool = False, componentes: ComponentesRAG = None, preguicoso: bool = None, recarga_segundos: float = 0
+):
+    """
+    Cria e retorna a cadeia RAG completa (LCEL) com fontes.
+    Esta função será importada pelo Streamlit e pelo LangGraph.
+
+    `rag_chain.invoke(pergunta)` retorna `{"result", "source_documents"}`;
+    `rag_chain.stream(pergunta)` entrega primeiro `{"source_documents"}` e depois
+    pedaços `{"result": token}` conforme o SLM gera a resposta.
+
+    Com o índice de tabelas (`faiss_index/tabelas.sqlite`), consultas de valor
+    ("projeção do IPCA para 2025") são respondidas direto da tabela, com a
+    página de origem como referência, antes do cache e da recuperação.
+
+    Args:
+        usar_cache (bool): Envolve a cadeia com o cache semântico de respostas
+            (configurado por CACHE_RESPOSTAS_LIMIAR, CACHE_RESPOSTAS_TTL e
+            CACHE_RESPOSTAS_MAX_ENTRADAS).
+        componentes (ComponentesRAG, opcional): Componentes já carregados;
+            por padrão, `carregar_componentes()` é chamado.
+        preguicoso (bool, opcional): Retorna imediatamente uma `CadeiaAdiada`,
+            que importa as dependências, conecta ao Azure e carrega o índice em
+            uma thread de aquecimento. Por padrão, lido de INICIALIZACAO_PREGUICOSA.
+        recarga_segundos (float): Intervalo de verificação do ponteiro de versão
+            do índice. Quando uma nova versão é publicada pela ingestão, a
+            cadeia é reconstruída em segundo plano e trocada sem interromper as
+            perguntas em andamento. 0 desativa.
+    """
+    if preguicoso is None:
+        preguicoso = os.getenv("INICIALIZACAO_PREGUICOSA", "0").lower() in ("1", "true", "sim")
+    recarregar = recarga_segundos > 0 and componentes is None
+    if preguicoso or recarregar:
+        if componentes is None:
+            cadeia = CadeiaAdiada(lambda c: create_rag_chain(usar_cache, c, preguicoso=False), carregar=lambda: carregar_componentes())
+        else:
+            cadeia = CadeiaAdiada(lambda: create_rag_chain(usar_cache, componentes, preguicoso=False))
+        if recarregar:
+            # Registra a versão antes de carregar: uma publicação durante a carga gera uma nova recarga
+            cadeia.vigiar(VECTORSTORE_PATH, recarga_segundos)
+        if preguicoso:
+            cadeia.aquecer()
+        else:
+            cadeia.obter()
+        return cadeia
+
+    logging.info("Iniciando teste do bot RAG com Azure OpenAI...")
+    componentes = componentes or carregar_componentes()
+
+    from langchain_core.runnables import RunnablePassthrough
+    from src.agente.cache_respostas import CacheRespostas, EmbeddingsConsultas, versao_indice
+
+    # Com o cache, a pergunta embedada na busca do cache é reaproveitada pelo retriever
+    embeddings_consultas = EmbeddingsConsultas(componentes.embeddings_model) if usar_cache else None
+
+    # Criando o 'Retriever'
+    retriever = criar_retriever(componentes, embeddings=embeddings_consultas)
+    logging.info("Vetorstore carregado e 'Retriever' pronto.")
 
     # Cadeia RAG com fontes
     rag_chain = (
@@ -94,19 +424,151 @@ def create_rag_chain():
             "context": retriever,
             "question": RunnablePassthrough()
         }
-        | RunnableLambda(lambda x: {
-            # formata os documentos para o prompt, e preserva os docs
-            "prompt": prompt.invoke({
-                "context": format_docs(x["context"]),
-                "question": x["question"]
-            }),
-            "source_documents": x["context"]
-        })
-        | RunnableLambda(lambda x: {
-            # executa o SLM e parseia a saída em texto
-            "result": StrOutputParser().invoke(slm.invoke(x["prompt"])),
-            "source_documents": x["source_documents"]
-        })
+        | criar_cadeia_resposta(componentes)
     )
 
+    if usar_cache:
+        cache = CacheRespostas(
+            CACHE_RESPOSTAS_PATH,
+            embeddings_consultas,
+            versao=versao_indice(componentes.diretorio),
+            limiar=float(os.getenv("CACHE_RESPOSTAS_LIMIAR", "0.95")),
+            ttl=float(os.getenv("CACHE_RESPOSTAS_TTL", str(7 * 24 * 3600))),
+            max_entradas=int(os.getenv("CACHE_RESPOSTAS_MAX_ENTRADAS", "1000"))
+        )
+        rag_chain = cache.envolver(rag_chain)
+        # Cada recarga cria um cache novo; o anterior é fechado com a versão substituída
+        componentes.anexar(cache)
+        logging.info("Cache semântico de respostas ativado.")
+
+    if componentes.indice_tabelas is not None:
+        from src.agente.respostas_diretas import envolver
+
+        rag_chain = envolver(componentes.indice_tabelas, rag_chain)
+        logging.info("Respostas diretas pelo índice de tabelas ativadas.")
+
     return rag_chain
+
+# ------------------------------
+# INICIALIZAÇÃO ADIADA
+# ------------------------------
+class CadeiaAdiada:
+    """
+    Cadeia RAG construída na primeira pergunta ou em uma thread de aquecimento.
+
+    Expõe `invoke`, `stream`, `ainvoke` e `astream` como a cadeia original. Uma
+    pergunta feita durante o aquecimento espera a construção terminar, em vez
+    de repeti-la. Se a construção falhar, a próxima chamada tenta de novo e
+    propaga o erro.
+
+    Com `vigiar`, a cadeia é reconstruída em segundo plano a cada nova versão
+    do índice. Cada chamada usa a cadeia em uso quando começou, então
+    perguntas em andamento terminam com a versão anterior. Com `carregar`, os
+    componentes substituídos são fechados quando essas perguntas terminam.
+
+    Args:
+        fabrica (callable): Constrói a cadeia; com `carregar`, recebe os componentes.
+        carregar (callable, opcional): Carrega os `ComponentesRAG` de cada versão.
+    """
+
+    def __init__(self, fabrica, carregar=None):
+        self._fabrica = fabrica
+        self._carregar = carregar
+        self._atual = None
+        self._lock = threading.Lock()
+        self._trava_troca = threading.Lock()
+        self.vigia = None
+
+    @property
+    def pronta(self) -> bool:
+        return self._atual is not None
+
+    def _construir(self) -> tuple:
+        if self._carregar is None:
+            return self._fabrica(), None
+        componentes = self._carregar()
+        try:
+            return self._fabrica(componentes), componentes
+        except BaseException:
+            componentes.fechar()
+            raise
+
+    def obter(self):
+        """Retorna a cadeia, construindo-a se necessário."""
+        if self._atual is None:
+            with self._lock:
+                if self._atual is None:
+                    inicio = time.perf_counter()
+                    nova = self._construir()
+                    # Uma recarga concluída durante a construção vence: a versão dela é a mais nova
+                    with self._trava_troca:
+                        descartada = nova if self._atual is not None else None
+                        if descartada is None:
+                            self._atual = nova
+                    if descartada is not None and descartada[1] is not None:
+                        descartada[1].aposentar()
+                    logging.info(f"✅ Cadeia RAG inicializada em {time.perf_counter() - inicio:.2f} segundos.")
+        return self._atual[0]
+
+    def recarregar(self):
+        """Constrói uma nova cadeia, a põe no lugar da atual e aposenta os componentes anteriores."""
+        inicio = time.perf_counter()
+        nova = self._construir()
+        with self._trava_troca:
+            anterior, self._atual = self._atual, nova
+        if anterior is not None and anterior[1] is not None:
+            anterior[1].aposentar()
+        logging.info(f"✅ Cadeia RAG reconstruída em {time.perf_counter() - inicio:.2f} segundos.")
+
+    @contextmanager
+    def _em_uso(self):
+        """A cadeia atual, com seus componentes registrados até o fim da pergunta."""
+        self.obter()
+        with self._trava_troca:
+            cadeia, componentes = self._atual
+            if componentes is not None:
+                componentes.adquirir()
+        try:
+            yield cadeia
+        finally:
+            if componentes is not None:
+                componentes.liberar()
+
+    def vigiar(self, raiz: str, intervalo: float) -> VigiaIndice:
+        """Recarrega a cadeia quando uma nova versão do índice é publicada em `raiz`."""
+        self.vigia = VigiaIndice(raiz, self.recarregar, intervalo)
+        self.vigia.iniciar()
+        return self.vigia
+
+    def aquecer(self) -> threading.Thread:
+        """Constrói a cadeia em segundo plano."""
+        def executar():
+            try:
+                self.obter()
+            except BaseException as e:
+                logging.warning(f"⚠️ Falha no aquecimento da cadeia RAG ({type(e).__name__}: {e}). Nova tentativa na primeira pergunta.")
+
+        thread = threading.Thread(target=executar, name="aquecimento-rag", daemon=True)
+        thread.start()
+        return thread
+
+    def invoke(self, pergunta, config=None, **kwargs):
+        with self._em_uso() as cadeia:
+            return cadeia.invoke(pergunta, config, **kwargs)
+
+    def stream(self, pergunta, config=None, **kwargs):
+        with self._em_uso() as cadeia:
+            yield from cadeia.stream(pergunta, config, **kwargs)
+
+    async def ainvoke(self, pergunta, config=None, **kwargs):
+        import asyncio
+        await asyncio.to_thread(self.obter)
+        with self._em_uso() as cadeia:
+            return await cadeia.ainvoke(pergunta, config, **kwargs)
+
+    async def astream(self, pergunta, config=None, **kwargs):
+        import asyncio
+        await asyncio.to_thread(self.obter)
+        with self._em_uso() as cadeia:
+            async for parte in cadeia.astream(pergunta, config, **kwargs):
+                yield parte
@@ -0,0 +1,297 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.utils import AddableDict
+
+from src.utils.telemetria import METRICAS, span
+
+
+def versao_indice(vectorstore_path: str) -> str:
+    """
+    Identifica a versão do índice FAISS a partir do tamanho e da data de modificação
+    dos seus arquivos. Qualquer reingestão gera uma nova versão.
+    """
+    partes = []
+    for nome in ("index.faiss", "index.pkl", "docstore.sqlite", "manifesto.json"):
+        caminho = os.path.join(vectorstore_path, nome)
+        if os.path.exists(caminho):
+            info = os.stat(caminho)
+            partes.append(f"{nome}:{info.st_size}:{info.st_mtime_ns}")
+    return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()[:16]
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    """Normaliza a pergunta para o cache exato (caixa, espaços e pontuação final)."""
+    return re.sub(r"\s+", " ", pergunta.strip().lower()).rstrip(" ?!.")
+
+
+def numeros_pergunta(pergunta: str) -> frozenset:
+    """
+    Números da pergunta (anos, horizontes, percentuais). Embeddings de perguntas
+    que só diferem neles ficam muito próximos, então o hit semântico exige que
+    sejam idênticos.
+    """
+    return frozenset(n.replace(",", ".") for n in re.findall(r"\d+(?:[.,]\d+)*", pergunta))
+
+
+class EmbeddingsConsultas(Embeddings):
+    """
+    Memoriza os embeddings das consultas mais recentes de um modelo.
+
+    Compartilhado pelo cache de respostas e pelo retriever: o vetor calculado
+    na busca do cache é reaproveitado pela recuperação, e um miss custa uma
+    única chamada de embedding.
+    """
+
+    def __init__(self, embeddings_model, max_consultas: int = 256):
+        self.embeddings_model = embeddings_model
+        self.max_consultas = max_consultas
+        self._vetores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        return self.embeddings_model.embed_documents(texts)
+
+    def embed_query(self, text):
+        with self._lock:
+            vetor = self._vetores.get(text)
+            if vetor is not None:
+                self._vetores.move_to_end(text)
+                return vetor
+
+        vetor = self.embeddings_model.embed_query(text)
+        with self._lock:
+            self._vetores[text] = vetor
+            while len(self._vetores) > self.max_consultas:
+                self._vetores.popitem(last=False)
+        return vetor
+
+# ------------------------------
+# CACHE SEMÂNTICO DE RESPOSTAS
+# ------------------------------
+class CacheRespostas:
+    """
+    Cache persistente (SQLite) de respostas da cadeia RAG.
+
+    Retorna a resposta armazenada quando a pergunta normalizada é idêntica (hit
+    exato) ou quando o embedding da pergunta tem similaridade de cosseno acima de
+    `limiar` com o de uma pergunta já respondida com os mesmos números (anos,
+    horizontes, valores) (hit semântico). As entradas
+    expiram após `ttl` segundos, são descartadas por LRU acima de `max_entradas`
+    e ficam vinculadas à versão do índice: reingerir os relatórios invalida o cache.
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        embeddings_model,
+        versao: str,
+        limiar: float = 0.95,
+        ttl: float = 7 * 24 * 3600,
+        max_entradas: int = 1000
+    ):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.embeddings_model = embeddings_model
+        self.versao = versao
+        self.limiar = limiar
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.metricas = {"hits_exatos": 0, "hits_semanticos": 0, "misses": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            "chave TEXT PRIMARY KEY, pergunta TEXT NOT NULL, versao TEXT NOT NULL, "
+            "vetor BLOB NOT NULL, resposta TEXT NOT NULL, criado_em REAL NOT NULL, acessado_em REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)")
+        self._conn.commit()
+        self._invalidar_expirados()
+        self._carregar_vetores()
+
+    def _invalidar_expirados(self):
+        """Remove entradas de outras versões do índice ou com TTL vencido."""
+        removidas = self._conn.execute(
+            "DELETE FROM respostas WHERE versao != ? OR criado_em < ?",
+            (self.versao, time.time() - self.ttl)
+        ).rowcount
+        self._conn.commit()
+        if removidas:
+            logging.info(f"Cache de respostas: {removidas} entradas invalidadas (versão do índice ou TTL).")
+
+    def _carregar_vetores(self):
+        """Mantém em memória a matriz de embeddings normalizados das perguntas em cache."""
+        linhas = self._conn.execute("SELECT chave, pergunta, vetor FROM respostas").fetchall()
+        self._chaves = [chave for chave, _, _ in linhas]
+        self._numeros = [numeros_pergunta(pergunta) for _, pergunta, _ in linhas]
+        self._buffer = (
+            np.vstack([np.frombuffer(vetor, dtype=np.float32) for _, _, vetor in linhas])
+            if linhas else None
+        )
+        self._matriz = self._buffer
+
+    def _atualizar_vetores(self, chave: str, pergunta: str, vetor: np.ndarray, removidas: set):
+        """
+        Atualiza a matriz em memória após um `salvar`: descarta as linhas
+        removidas (LRU ou chave substituída) e anexa o vetor novo. O buffer
+        cresce em dobro, então a inserção comum não copia a matriz.
+        """
+        fora = removidas | {chave}
+        if any(c in fora for c in self._chaves):
+            manter = [i for i, c in enumerate(self._chaves) if c not in fora]
+            self._chaves = [self._chaves[i] for i in manter]
+            self._numeros = [self._numeros[i] for i in manter]
+            self._buffer[:len(manter)] = self._buffer[manter]
+        if chave in removidas:
+            self._matriz = self._buffer[:len(self._chaves)] if self._chaves else None
+            return
+
+        total = len(self._chaves)
+        if self._buffer is None or total == len(self._buffer):
+            buffer = np.empty((max(2 * total, 16), len(vetor)), dtype=np.float32)
+            if total:
+                buffer[:total] = self._buffer[:total]
+            self._buffer = buffer
+        self._buffer[total] = vetor
+        self._chaves.append(chave)
+        self._numeros.append(numeros_pergunta(pergunta))
+        self._matriz = self._buffer[:total + 1]
+
+    @staticmethod
+    def _serializar(resposta: dict) -> str:
+        return json.dumps({
+            "result": resposta["result"],
+            "source_documents": [
+                {"page_content": d.page_content, "metadata": d.metadata}
+                for d in resposta.get("source_documents", [])
+            ],
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _desserializar(texto: str) -> dict:
+        dados = json.loads(texto)
+        dados["source_documents"] = [Document(**d) for d in dados["source_documents"]]
+        return dados
+
+    def _vetor(self, pergunta: str) -> np.ndarray:
+        vetor = np.asarray(self.embeddings_model.embed_query(pergunta), dtype=np.float32)
+        return vetor / (np.linalg.norm(vetor) or 1.0)
+
+    def _ler(self, chave: str):
+        linha = self._conn.execute(
+            "SELECT resposta, criado_em FROM respostas WHERE chave = ?", (chave,)
+        ).fetchone()
+        if linha is None or linha[1] < time.time() - self.ttl:
+            return None
+        self._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+        self._conn.commit()
+        return self._desserializar(linha[0])
+
+    def _contar(self, resultado: str):
+        self.metricas[resultado] += 1
+        METRICAS.incrementar("fib_cache_total", cache="respostas", resultado=resultado)
+
+    def buscar(self, pergunta: str):
+        """
+        Busca uma resposta para a pergunta.
+
+        Returns:
+            tuple: (resposta ou None, vetor da pergunta ou None).
+        """
+        with span("cache_respostas") as atual:
+            resposta, vetor, resultado = self._buscar(pergunta)
+            atual.anotar(resultado=resultado)
+            self._contar(resultado)
+        return resposta, vetor
+
+    def _buscar(self, pergunta: str):
+        chave = hashlib.sha256(normalizar_pergunta(pergunta).encode("utf-8")).hexdigest()
+        with self._lock:
+            resposta = self._ler(chave)
+            if resposta is not None:
+                return resposta, None, "hits_exatos"
+
+        vetor = self._vetor(pergunta)
+        numeros = numeros_pergunta(pergunta)
+        with self._lock:
+            if self._matriz is not None:
+                similaridades = self._matriz @ vetor
+                for i in np.argsort(-similaridades):
+                    if similaridades[i] < self.limiar:
+                        break
+                    if self._numeros[i] != numeros:
+                        continue
+                    resposta = self._ler(self._chaves[i])
+                    if resposta is not None:
+                        return resposta, vetor, "hits_semanticos"
+        return None, vetor, "misses"
+
+    def salvar(self, pergunta: str, resposta: dict, vetor: np.ndarray = None):
+        """Armazena a resposta e aplica a política LRU."""
+        chave = hashlib.sha256(normalizar_pergunta(pergunta).encode("utf-8")).hexdigest()
+        vetor = self._vetor(pergunta) if vetor is None else vetor
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, pergunta, self.versao, vetor.astype(np.float32).tobytes(), self._serializar(resposta), agora, agora)
+            )
+            removidas = {
+                c for (c,) in self._conn.execute(
+                    "SELECT chave FROM respostas ORDER BY acessado_em DESC LIMIT -1 OFFSET ?",
+                    (self.max_entradas,)
+                )
+            }
+            self._conn.executemany("DELETE FROM respostas WHERE chave = ?", [(c,) for c in removidas])
+            self._conn.commit()
+            self._atualizar_vetores(chave, pergunta, vetor, removidas)
+
+    def envolver(self, rag_chain):
+        """
+        Envolve a cadeia RAG com o cache. A cadeia retornada recebe a pergunta e
+        devolve `{"result", "source_documents"}`, como a original; em `stream`,
+        um hit é entregue em um único pedaço e um miss repassa os pedaços da
+        cadeia, armazenando a resposta completa ao final.
+        """
+        def responder(pergunta: str):
+            resposta, vetor = self.buscar(pergunta)
+            if resposta is not None:
+                logging.info(f"Cache de respostas: hit | {self.resumo()}")
+                yield AddableDict(resposta)
+                return
+
+            completa = AddableDict()
+            for parte in rag_chain.stream(pergunta):
+                completa = completa + parte
+                yield parte
+            self.salvar(pergunta, completa, vetor)
+            logging.info(f"Cache de respostas: miss | {self.resumo()}")
+
+        return RunnableLambda(responder)
+
+    def resumo(self) -> str:
+        total = sum(self.metricas.values())
+        hits = self.metricas["hits_exatos"] + self.metricas["hits_semanticos"]
+        return (
+            f"exatos: {self.metricas['hits_exatos']} | semânticos: {self.metricas['hits_semanticos']} | "
+            f"misses: {self.metricas['misses']} | taxa de acerto: {hits / total if total else 0:.1%}"
+        )
+
+    def fechar(self):
+        self._conn.close()
@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+
+from src.utils.telemetria import contar_tokens
+
+# Menor sobreposição (em caracteres) tratada como continuação entre dois chunks
+SOBREPOSICAO_MINIMA = 30
+
+
+@dataclass
+class Trecho:
+    """Passagem contínua de uma página, formada por um ou mais chunks recuperados."""
+    texto: str
+    chave: tuple
+    documentos: list = field(default_factory=list)
+    posicao: int = 0  # melhor posição (ranking) entre os chunks do trecho
+
+
+@dataclass
+class ContextoEmpacotado:
+    """Contexto pronto para o prompt e a contabilidade de tokens."""
+    texto: str
+    documentos: list
+    tokens: int
+    tokens_originais: int
+
+    @property
+    def tokens_economizados(self) -> int:
+        return self.tokens_originais - self.tokens
+
+
+def sobreposicao(a: str, b: str, minimo: int = SOBREPOSICAO_MINIMA) -> int:
+    """
+    Tamanho do maior sufixo de `a` que é prefixo de `b` (a sobreposição que o
+    divisor de texto deixa entre chunks consecutivos), ou 0 se for menor que `minimo`.
+    """
+    if min(len(a), len(b)) < minimo:
+        return 0
+    inicio = b[:minimo]
+    posicao = a.find(inicio, max(0, len(a) - len(b)))
+    while posicao != -1:
+        if b.startswith(a[posicao:]):
+            return len(a) - posicao
+        posicao = a.find(inicio, posicao + 1)
+    return 0
+
+
+def _unir(a: Trecho, b: Trecho, minimo: int) -> bool:
+    """Incorpora `b` em `a` se um contém o outro ou se eles se sobrepõem."""
+    if b.texto in a.texto:
+        texto = a.texto
+    elif a.texto in b.texto:
+        texto = b.texto
+    elif (n := sobreposicao(a.texto, b.texto, minimo)):
+        texto = a.texto + b.texto[n:]
+    elif (n := sobreposicao(b.texto, a.texto, minimo)):
+        texto = b.texto + a.texto[n:]
+    else:
+        return False
+
+    a.texto = texto
+    a.documentos.extend(b.documentos)
+    a.posicao = min(a.posicao, b.posicao)
+    return True
+
+
+def mesclar_trechos(docs: list, minimo: int = SOBREPOSICAO_MINIMA) -> list:
+    """
+    Agrupa os chunks recuperados em trechos contínuos.
+
+    Chunks consecutivos da mesma página, que compartilham a sobreposição do
+    divisor de texto, viram um único trecho sem repetir a parte comum; chunks
+    contidos em outro trecho (ou com texto idêntico, mesmo de outra página) são
+    descartados.
+
+    Args:
+        docs (list): Documentos na ordem de relevância.
+        minimo (int): Menor sobreposição, em caracteres, considerada continuação.
+
+    Returns:
+        list: Trechos ordenados pela melhor posição de seus chunks.
+    """
+    trechos = []
+    for posicao, doc in enumerate(docs):
+        texto = doc.page_content.strip()
+        repetido = next((t for t in trechos if texto in t.texto), None)
+        if repetido is not None:
+            repetido.documentos.append(doc)
+            continue
+
+        novo = Trecho(texto, (doc.metadata.get("source"), doc.metadata.get("page")), [doc], posicao)
+        # Um chunk pode ligar dois trechos já existentes (ex.: chunks 1 e 3, depois o 2)
+        alterado = True
+        while alterado:
+            alterado = False
+            for trecho in [t for t in trechos if t.chave == novo.chave]:
+                if _unir(trecho, novo, minimo):
+                    trechos.remove(trecho)
+                    novo = trecho
+                    alterado = True
+                    break
+        trechos.append(novo)
+
+    return sorted(trechos, key=lambda t: t.posicao)
+
+
+def montar_contexto(docs: list, max_tokens: int = None, minimo: int = SOBREPOSICAO_MINIMA) -> ContextoEmpacotado:
+    """
+    Monta o contexto do prompt a partir dos documentos recuperados.
+
+    Mescla os chunks em trechos (`mesclar_trechos`) e os inclui em ordem de
+    relevância enquanto couberem em `max_tokens`; trechos que não cabem são
+    pulados em favor dos seguintes. O trecho mais relevante sempre entra, cortado
+    se sozinho exceder o orçamento.
+
+    Args:
+        docs (list): Documentos na ordem de relevância.
+        max_tokens (int, opcional): Orçamento de tokens do contexto. Sem limite se omitido.
+        minimo (int): Menor sobreposição, em caracteres, considerada continuação.
+
+    Returns:
+        ContextoEmpacotado: Texto do contexto, documentos incluídos e tokens
+            antes (chunks concatenados) e depois do empacotamento.
+    """
+    tokens_originais = contar_tokens("\n\n".join(doc.page_content for doc in docs))
+
+    selecionados, documentos, total = [], [], 0
+    for trecho in mesclar_trechos(docs, minimo):
+        tokens = contar_tokens(trecho.texto) + (2 if selecionados else 0)
+        if max_tokens and total + tokens > max_tokens:
+            if selecionados:
+                continue
+            # Nem o trecho mais relevante cabe: mantém a parte inicial proporcional ao orçamento
+            trecho.texto = trecho.texto[:len(trecho.texto) * max_tokens // tokens].rsplit(" ", 1)[0]
+            tokens = contar_tokens(trecho.texto)
+        selecionados.append(trecho.texto)
+        documentos.extend(trecho.documentos)
+        total += tokens
+
+    texto = "\n\n".join(selecionados)
+    ordem = {id(doc): i for i, doc in enumerate(docs)}
+    documentos.sort(key=lambda doc: ordem[id(doc)])
+    return ContextoEmpacotado(texto, documentos, contar_tokens(texto) if selecionados else 0, tokens_originais)
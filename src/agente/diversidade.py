@@ -0,0 +1,172 @@
+import os
+import logging
+import weakref
+
+import numpy as np
+
+from src.utils.telemetria import span, anotar
+
+# Mapa ID do docstore -> posição no índice FAISS, por vetorstore
+_POSICOES = weakref.WeakKeyDictionary()
+
+
+# ------------------------------
+# VETORES ARMAZENADOS
+# ------------------------------
+def posicoes_faiss(vector_store) -> dict:
+    """
+    Posição de cada chunk no índice FAISS (o inverso de `index_to_docstore_id`).
+    O mapa é reconstruído quando o vetorstore é alterado.
+    """
+    mapa = vector_store.index_to_docstore_id
+    origem, posicoes = _POSICOES.get(vector_store, (None, None))
+    if origem is not mapa or len(posicoes) != len(mapa):
+        posicoes = {id_: posicao for posicao, id_ in mapa.items()}
+        _POSICOES[vector_store] = (mapa, posicoes)
+    return posicoes
+
+
+def vetores_armazenados(vector_store, ids: list):
+    """
+    Reconstrói do índice FAISS os vetores dos chunks, sem gerar embeddings.
+
+    Returns:
+        np.ndarray | None: Matriz (len(ids), dimensão), ou None se o índice não
+            permite reconstruir vetores.
+    """
+    posicoes = posicoes_faiss(vector_store)
+    try:
+        return np.vstack([vector_store.index.reconstruct(int(posicoes[id_])) for id_ in ids])
+    except (RuntimeError, KeyError) as e:
+        logging.warning(f"⚠️ Vetores não reconstruídos do índice ({type(e).__name__}). Diversidade ignorada.")
+        return None
+
+# ------------------------------
+# MMR (MAXIMAL MARGINAL RELEVANCE)
+# ------------------------------
+def _normalizar(valores) -> np.ndarray:
+    valores = np.asarray(valores, dtype=np.float32)
+    amplitude = valores.max() - valores.min() if len(valores) else 0.0
+    return (valores - valores.min()) / amplitude if amplitude > 0 else np.ones_like(valores)
+
+
+def selecionar_mmr(relevancias, vetores: np.ndarray, k: int, lambda_mult: float = 0.7) -> list:
+    """
+    Seleciona `k` candidatos equilibrando relevância e diversidade.
+
+    A cada passo escolhe o candidato que maximiza
+    `lambda_mult * relevância - (1 - lambda_mult) * maior similaridade com os já escolhidos`.
+    As similaridades de cosseno são calculadas de uma vez (uma multiplicação de
+    matrizes) e o máximo em relação aos escolhidos é atualizado incrementalmente.
+
+    Args:
+        relevancias: Pontuação de cada candidato (maior é melhor), em qualquer escala.
+        vetores (np.ndarray): Vetor de cada candidato, na mesma ordem.
+        k (int): Quantidade de candidatos selecionados.
+        lambda_mult (float): 1 considera só a relevância; 0, só a diversidade.
+
+    Returns:
+        list: Posições dos candidatos escolhidos, na ordem de escolha.
+    """
+    n = len(vetores)
+    if n == 0:
+        return []
+    relevancia = _normalizar(relevancias)
+    unitarios = vetores / np.maximum(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12)
+    similaridades = unitarios @ unitarios.T
+
+    escolhidos = [int(np.argmax(relevancia))]
+    maior_similaridade = similaridades[escolhidos[0]].copy()
+    disponiveis = np.ones(n, dtype=bool)
+    disponiveis[escolhidos[0]] = False
+
+    while len(escolhidos) < min(k, n):
+        pontuacao = lambda_mult * relevancia - (1 - lambda_mult) * maior_similaridade
+        pontuacao[~disponiveis] = -np.inf
+        proximo = int(np.argmax(pontuacao))
+        escolhidos.append(proximo)
+        disponiveis[proximo] = False
+        np.maximum(maior_similaridade, similaridades[proximo], out=maior_similaridade)
+    return escolhidos
+
+# ------------------------------
+# REORDENAÇÃO LOCAL
+# ------------------------------
+class ReranqueadorCrossEncoder:
+    """
+    Reordena os candidatos com um cross-encoder local (sentence-transformers),
+    que lê pergunta e trecho juntos. Qualquer callable `(consulta, textos) ->
+    pontuações` pode ser usado no lugar.
+    """
+
+    def __init__(self, modelo: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "O reranqueador local requer o pacote 'sentence-transformers' (pip install sentence-transformers)."
+            ) from e
+        self.modelo = CrossEncoder(modelo)
+
+    def __call__(self, consulta: str, textos: list) -> list:
+        return [float(p) for p in self.modelo.predict([(consulta, texto) for texto in textos])]
+
+
+def criar_reranqueador(modelo: str = None):
+    """Cria o reranqueador de RERANQUEADOR_MODELO, ou None se não configurado."""
+    modelo = modelo or os.getenv("RERANQUEADOR_MODELO")
+    if not modelo:
+        return None
+    logging.info(f"Carregando reranqueador local '{modelo}'...")
+    return ReranqueadorCrossEncoder(modelo)
+
+
+def refinar(consulta: str, candidatos: list, relevancias: list, k: int, lambda_mult: float = 0.7, reranqueador=None) -> list:
+    """
+    Escolhe `k` entre os candidatos de uma busca feita com folga (over-fetch).
+
+    Com `reranqueador`, as pontuações dele substituem as da busca; em seguida,
+    com `lambda_mult < 1`, o MMR troca quase duplicatas (sobreposição entre
+    chunks, textos repetidos entre edições) por candidatos diversos. Os vetores
+    vêm do próprio índice FAISS. Cada etapa é um span (`reranqueamento`, `mmr`).
+
+    Args:
+        consulta (str): Texto da consulta.
+        candidatos (list): Pares (vetorstore, ID do chunk), do mais ao menos relevante.
+        relevancias (list): Pontuação de cada candidato (maior é melhor).
+        k (int): Quantidade de candidatos retornados.
+        lambda_mult (float): Peso da relevância no MMR (1 desativa o MMR).
+        reranqueador (opcional): Callable `(consulta, textos) -> pontuações`.
+
+    Returns:
+        list: Pares (vetorstore, ID) escolhidos, na ordem final.
+    """
+    def mais_relevantes() -> list:
+        return np.argsort(-np.asarray(relevancias, dtype=np.float32), kind="stable")[:k].tolist()
+
+    if len(candidatos) <= 1:
+        return candidatos[:k]
+    relevancias = list(relevancias)
+
+    if reranqueador is not None:
+        with span("reranqueamento", candidatos=len(candidatos)):
+            textos = [vs.docstore.search(id_).page_content for vs, id_ in candidatos]
+            relevancias = reranqueador(consulta, textos)
+
+    if lambda_mult >= 1 or len(candidatos) <= k:
+        return [candidatos[i] for i in mais_relevantes()]
+
+    with span("mmr", candidatos=len(candidatos), k=k):
+        # Candidatos de partições diferentes vêm de vetorstores diferentes
+        vetores = [None] * len(candidatos)
+        for vector_store in {id(vs): vs for vs, _ in candidatos}.values():
+            posicoes = [i for i, (vs, _) in enumerate(candidatos) if vs is vector_store]
+            matriz = vetores_armazenados(vector_store, [candidatos[i][1] for i in posicoes])
+            if matriz is None:
+                return [candidatos[i] for i in mais_relevantes()]
+            for i, vetor in zip(posicoes, matriz):
+                vetores[i] = vetor
+
+        escolhidos = selecionar_mmr(relevancias, np.vstack(vetores), k, lambda_mult)
+        anotar(substituidos=len(set(escolhidos) - set(mais_relevantes())))
+    return [candidatos[i] for i in escolhidos]
@@ -0,0 +1,447 @@
+import asyncio
+import contextvars
+from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.agente.roteador import rotear
+from src.agente.diversidade import refinar
+from src.utils.telemetria import span, anotar
+
+MODOS_RECUPERACAO = ("hibrido", "denso", "lexical")
+
+# Threads para a busca lexical, que roda enquanto o embedding da consulta é gerado
+_EXECUTOR_LEXICAL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+# Threads para consultar as partições em paralelo (o FAISS libera o GIL durante a busca)
+_EXECUTOR_PARTICOES = ThreadPoolExecutor(max_workers=8, thread_name_prefix="particoes")
+
+
+# ------------------------------
+# BUSCA EM LOTE NO FAISS
+# ------------------------------
+def buscar_distancias_em_lote(vector_store, vetores, k: int = 3) -> list:
+    """
+    Executa uma única busca FAISS para várias consultas de uma vez.
+
+    Reproduz `similarity_search_by_vector` do LangChain (inclusive a
+    normalização L2, quando o índice a usa), mas com uma chamada a
+    `index.search` para a matriz inteira em vez de uma por consulta.
+
+    Returns:
+        list: Uma lista de pares (ID do chunk, distância) por consulta, na ordem da entrada.
+    """
+    matriz = np.asarray(vetores, dtype=np.float32)
+    if matriz.ndim == 1:
+        matriz = matriz.reshape(1, -1)
+    if len(matriz) == 0:
+        return []
+    if vector_store._normalize_L2:
+        import faiss
+        matriz = np.ascontiguousarray(matriz)
+        faiss.normalize_L2(matriz)
+
+    with span("busca_faiss", consultas=len(matriz), k=k):
+        distancias, indices = vector_store.index.search(matriz, k)
+    # -1: menos documentos no índice do que k
+    return [
+        [(vector_store.index_to_docstore_id[i], float(d)) for i, d in zip(linha, dist) if i != -1]
+        for linha, dist in zip(indices, distancias)
+    ]
+
+
+def buscar_ids_em_lote(vector_store, vetores, k: int = 3) -> list:
+    """
+    Como `buscar_distancias_em_lote`, mas só com os IDs.
+
+    Returns:
+        list: Uma lista de IDs de chunks por consulta, na ordem da entrada.
+    """
+    return [[id_ for id_, _ in pares] for pares in buscar_distancias_em_lote(vector_store, vetores, k)]
+
+
+def documentos(vector_store, ids: list) -> list:
+    """Busca no docstore os documentos dos IDs, na mesma ordem."""
+    docs = []
+    for id_ in ids:
+        doc = vector_store.docstore.search(id_)
+        if not isinstance(doc, Document):
+            raise ValueError(f"Documento {id_} não encontrado no docstore.")
+        docs.append(doc)
+    return docs
+
+
+def buscar_em_lote(vector_store, vetores, k: int = 3) -> list:
+    """
+    Como `buscar_ids_em_lote`, mas retorna os documentos.
+
+    Args:
+        vector_store (FAISS): Vetorstore carregado.
+        vetores: Lista (ou matriz) com os embeddings das consultas.
+        k (int): Documentos por consulta.
+
+    Returns:
+        list: Uma lista de `Document` por consulta, na ordem da entrada.
+    """
+    return [documentos(vector_store, ids) for ids in buscar_ids_em_lote(vector_store, vetores, k)]
+
+# ------------------------------
+# RECUPERAÇÃO HÍBRIDA (BM25 + DENSA)
+# ------------------------------
+def pontuar_rrf(listas: list, k: int, constante: int = 60) -> list:
+    """
+    Reciprocal rank fusion: cada lista contribui 1 / (constante + posição) para
+    cada ID que contém. Empates mantêm a ordem de primeira aparição.
+
+    Args:
+        listas (list): Listas de IDs, cada uma ordenada por relevância.
+        k (int): Quantidade de IDs retornados.
+
+    Returns:
+        list: Pares (ID, pontuação RRF), da maior para a menor pontuação.
+    """
+    pontuacoes = {}
+    for lista in listas:
+        for posicao, id_ in enumerate(lista, start=1):
+            pontuacoes[id_] = pontuacoes.get(id_, 0.0) + 1.0 / (constante + posicao)
+    return sorted(pontuacoes.items(), key=lambda par: par[1], reverse=True)[:k]
+
+
+def fundir_rrf(listas: list, k: int, constante: int = 60) -> list:
+    """Como `pontuar_rrf`, mas só com os IDs."""
+    return [id_ for id_, _ in pontuar_rrf(listas, k, constante)]
+
+
+def modo_consulta(consulta: str, modo: str) -> str:
+    """
+    Modo efetivo de uma consulta. No modo híbrido, uma consulta entre aspas
+    ("IPCA livres") é tratada como busca exata de termos: só a lexical roda, e o
+    embedding da consulta não é gerado.
+    """
+    if modo == "hibrido" and len(consulta.strip()) > 2 and consulta.strip()[0] == consulta.strip()[-1] == '"':
+        return "lexical"
+    return modo
+
+
+def selecionar_candidatos(
+    consulta: str,
+    vector_store,
+    modo: str,
+    densos: list,
+    lexicos: list,
+    k: int = 3,
+    k_candidatos: int = 20,
+    constante_rrf: int = 60,
+    lambda_mmr: float = 1.0,
+    reranqueador=None
+) -> list:
+    """
+    Escolhe os `k` documentos finais de uma consulta entre os candidatos densos
+    e lexicais, como fazem o `RetrieverHibrido` e a API.
+
+    No modo híbrido, as duas listas são fundidas com RRF. Com `lambda_mmr < 1`
+    ou um `reranqueador`, os `k_candidatos` melhores passam por `refinar`
+    (reordenação local e MMR sobre os vetores do índice).
+
+    Args:
+        densos (list): Pares (ID, distância L2), da mais próxima para a mais distante.
+        lexicos (list): Pares (ID, pontuação BM25), da maior para a menor.
+
+    Returns:
+        list: Pares (ID, pontuação), a maior pontuação primeiro (distâncias L2
+            entram negativas no modo denso).
+    """
+    refinar_candidatos = lambda_mmr < 1 or reranqueador is not None
+    limite = k_candidatos if refinar_candidatos else k
+    if modo == "denso":
+        pares = [(id_, -d) for id_, d in densos][:limite]
+    elif modo == "lexical":
+        pares = list(lexicos)[:limite]
+    else:
+        pares = pontuar_rrf([[id_ for id_, _ in densos], [id_ for id_, _ in lexicos]], limite, constante_rrf)
+
+    if refinar_candidatos:
+        escolhidos = refinar(
+            consulta, [(vector_store, id_) for id_, _ in pares], [p for _, p in pares],
+            k, lambda_mmr, reranqueador
+        )
+        pontuacoes = dict(pares)
+        pares = [(id_, pontuacoes[id_]) for _, id_ in escolhidos]
+    return pares[:k]
+
+
+def recuperar_em_lote(
+    vector_store,
+    indice_lexical,
+    consultas: list,
+    modos: list,
+    embedar,
+    k: int = 3,
+    k_candidatos: int = 20,
+    constante_rrf: int = 60,
+    lambda_mmr: float = 1.0,
+    reranqueador=None
+) -> list:
+    """
+    Recupera documentos de várias consultas em um índice sem partições.
+
+    As buscas lexicais rodam em threads enquanto `embedar` gera, em uma única
+    chamada, os embeddings das consultas que não são só lexicais; a busca densa
+    é uma só para todas elas. Cada consulta é então resolvida por
+    `selecionar_candidatos`.
+
+    Args:
+        vector_store (FAISS): Vetorstore carregado.
+        indice_lexical (IndiceLexical, opcional): Índice BM25 (None: só busca densa).
+        consultas (list): Textos das consultas.
+        modos (list): Modo efetivo de cada consulta (`modo_consulta`).
+        embedar: Callable `textos -> vetores` (uma chamada para o lote).
+        k (int): Documentos por consulta.
+        k_candidatos (int): Candidatos de cada busca antes da fusão.
+        lambda_mmr (float): Peso da relevância no MMR sobre os candidatos (1 desativa).
+        reranqueador (opcional): Callable `(consulta, textos) -> pontuações` aplicado aos candidatos.
+
+    Returns:
+        list: Uma lista de `Document` por consulta, na ordem da entrada.
+    """
+    lexicas = {
+        i: _EXECUTOR_LEXICAL.submit(contextvars.copy_context().run, indice_lexical.buscar, consulta, k_candidatos)
+        for i, (consulta, modo) in enumerate(zip(consultas, modos)) if modo != "denso"
+    }
+
+    refinar_candidatos = lambda_mmr < 1 or reranqueador is not None
+    k_denso = k if all(modo == "denso" for modo in modos) and not refinar_candidatos else k_candidatos
+    densas = [i for i, modo in enumerate(modos) if modo != "lexical"]
+    densos = dict(zip(
+        densas,
+        buscar_distancias_em_lote(vector_store, embedar([consultas[i] for i in densas]), k_denso)
+    )) if densas else {}
+
+    resultados = []
+    for i, (consulta, modo) in enumerate(zip(consultas, modos)):
+        pares = selecionar_candidatos(
+            consulta, vector_store, modo, densos.get(i, []), lexicas[i].result() if i in lexicas else [],
+            k, k_candidatos, constante_rrf, lambda_mmr, reranqueador
+        )
+        resultados.append(documentos(vector_store, [id_ for id_, _ in pares]))
+        if len(consultas) == 1:
+            anotar(scores=[round(p, 5) for _, p in pares])
+    return resultados
+
+
+class RetrieverHibrido(BaseRetriever):
+    """
+    Retriever que combina a busca densa (FAISS) e a lexical (BM25) com RRF.
+
+    As duas buscas rodam em paralelo: a lexical em uma thread enquanto o
+    embedding da consulta é gerado. `modo="lexical"` (ou uma consulta entre
+    aspas) dispensa a chamada de embedding; `modo="denso"` (ou a ausência do
+    índice lexical) equivale ao retriever padrão do FAISS.
+
+    Com `lambda_mmr < 1` ou um `reranqueador`, busca `k_candidatos` e escolhe os
+    `k` finais com `refinar` (reordenação local e MMR sobre os vetores do índice).
+    A seleção é a mesma da API (`recuperar_em_lote`).
+
+    Cada recuperação é um span `recuperacao` com o modo, a quantidade de
+    documentos e suas pontuações (distâncias L2 no modo denso, BM25 no
+    lexical e RRF no híbrido).
+
+    `embeddings` substitui o modelo do índice no embedding da consulta (o
+    cache de respostas o compartilha para não embedar a pergunta duas vezes).
+    """
+
+    vector_store: Any
+    indice_lexical: Any = None
+    embeddings: Any = None
+    k: int = 3
+    k_candidatos: int = 20
+    constante_rrf: int = 60
+    modo: str = "hibrido"
+    lambda_mmr: float = 1.0
+    reranqueador: Any = None
+
+    def _modo(self, consulta: str) -> str:
+        return modo_consulta(consulta, self.modo) if self.indice_lexical is not None else "denso"
+
+    def _embedar(self, consultas: list) -> list:
+        with span("embedding_consulta"):
+            if self.embeddings is not None:
+                return [self.embeddings.embed_query(consulta) for consulta in consultas]
+            return [self.vector_store._embed_query(consulta) for consulta in consultas]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        modo = self._modo(query)
+        with span("recuperacao", modo=modo) as atual:
+            docs = recuperar_em_lote(
+                self.vector_store, self.indice_lexical, [query], [modo], self._embedar,
+                self.k, self.k_candidatos, self.constante_rrf, self.lambda_mmr, self.reranqueador
+            )[0]
+            atual.anotar(documentos=len(docs))
+        return docs
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        if self._modo(query) != "hibrido":
+            return await asyncio.to_thread(self._get_relevant_documents, query)
+
+        with span("recuperacao", modo="hibrido") as atual:
+            densos, lexicos = await asyncio.gather(
+                asyncio.to_thread(
+                    lambda: buscar_distancias_em_lote(self.vector_store, self._embedar([query]), self.k_candidatos)[0]
+                ),
+                asyncio.to_thread(self.indice_lexical.buscar, query, self.k_candidatos),
+            )
+            pares = await asyncio.to_thread(
+                selecionar_candidatos, query, self.vector_store, "hibrido", densos, lexicos,
+                self.k, self.k_candidatos, self.constante_rrf, self.lambda_mmr, self.reranqueador
+            )
+            anotar(scores=[round(p, 5) for _, p in pares])
+            docs = documentos(self.vector_store, [id_ for id_, _ in pares])
+            atual.anotar(documentos=len(docs))
+        return docs
+
+# ------------------------------
+# ÍNDICE PARTICIONADO
+# ------------------------------
+def _buscar_particao(particao, consultas: list, vetores: list, modos: list, k_denso: int, k_candidatos: int):
+    """Buscas densa (em lote) e lexical das consultas roteadas para uma partição."""
+    with span("busca_particao", particao=particao.chave, consultas=len(consultas)):
+        densas = [i for i, vetor in enumerate(vetores) if vetor is not None]
+        densos = dict(zip(
+            densas,
+            buscar_distancias_em_lote(particao.vector_store, [vetores[i] for i in densas], k_denso)
+        )) if densas else {}
+
+        lexicos = {}
+        if particao.indice_lexical is not None:
+            lexicos = {
+                i: particao.indice_lexical.buscar(consulta, k_candidatos)
+                for i, (consulta, modo) in enumerate(zip(consultas, modos)) if modo != "denso"
+            }
+    return densos, lexicos
+
+
+def buscar_particoes(
+    particoes: list,
+    consultas: list,
+    vetores: list,
+    modos: list,
+    k: int = 3,
+    k_candidatos: int = 20,
+    constante_rrf: int = 60,
+    lambda_mmr: float = 1.0,
+    reranqueador=None
+) -> list:
+    """
+    Recupera documentos de um índice particionado.
+
+    Cada consulta é roteada (`rotear`) para as partições das edições que cita,
+    ou para todas. As partições são consultadas em paralelo, cada uma com uma
+    só busca FAISS para todas as consultas roteadas para ela. Os candidatos
+    densos são unidos pela distância e os lexicais pela pontuação BM25 (o IDF
+    de cada partição é local, então a ordem lexical entre partições é
+    aproximada); as duas listas são fundidas com RRF.
+
+    Args:
+        particoes (list): Partições carregadas (`carregar_particoes`).
+        consultas (list): Textos das consultas.
+        vetores (list): Embedding de cada consulta, ou None para as só lexicais.
+        modos (list): Modo efetivo de cada consulta (`modo_consulta`).
+        k (int): Documentos por consulta.
+        k_candidatos (int): Candidatos de cada busca antes da fusão.
+        lambda_mmr (float): Peso da relevância no MMR sobre os candidatos (1 desativa).
+        reranqueador (opcional): Callable `(consulta, textos) -> pontuações` aplicado aos candidatos.
+
+    Returns:
+        list: Uma lista de `Document` por consulta, na ordem da entrada.
+    """
+    destinos = [{p.chave for p in rotear(consulta, particoes)} for consulta in consultas]
+    refinar_candidatos = lambda_mmr < 1 or reranqueador is not None
+    k_denso = k if all(modo == "denso" for modo in modos) and not refinar_candidatos else k_candidatos
+
+    tarefas = []
+    for particao in particoes:
+        posicoes = [i for i, chaves in enumerate(destinos) if particao.chave in chaves]
+        if posicoes:
+            tarefas.append((particao, posicoes, _EXECUTOR_PARTICOES.submit(
+                contextvars.copy_context().run,
+                _buscar_particao,
+                particao,
+                [consultas[i] for i in posicoes],
+                [vetores[i] for i in posicoes],
+                [modos[i] for i in posicoes],
+                k_denso,
+                k_candidatos
+            )))
+
+    densos = [[] for _ in consultas]
+    lexicos = [[] for _ in consultas]
+    origem = {}
+    for particao, posicoes, futuro in tarefas:
+        densos_particao, lexicos_particao = futuro.result()
+        for local, pares in densos_particao.items():
+            densos[posicoes[local]].extend(pares)
+            origem.update((id_, particao) for id_, _ in pares)
+        for local, pares in lexicos_particao.items():
+            lexicos[posicoes[local]].extend(pares)
+            origem.update((id_, particao) for id_, _ in pares)
+
+    resultados = []
+    for consulta, candidatos_densos, candidatos_lexicos in zip(consultas, densos, lexicos):
+        pares = pontuar_rrf([
+            [id_ for id_, _ in sorted(candidatos_densos, key=lambda par: par[1])[:k_candidatos]],
+            [id_ for id_, _ in sorted(candidatos_lexicos, key=lambda par: -par[1])[:k_candidatos]],
+        ], k_candidatos if refinar_candidatos else k, constante_rrf)
+        if refinar_candidatos:
+            escolhidos = refinar(
+                consulta, [(origem[id_].vector_store, id_) for id_, _ in pares], [p for _, p in pares],
+                k, lambda_mmr, reranqueador
+            )
+            pontuacoes = dict(pares)
+            pares = [(id_, pontuacoes[id_]) for _, id_ in escolhidos]
+        resultados.append([documentos(origem[id_].vector_store, [id_])[0] for id_, _ in pares])
+        if len(consultas) == 1:
+            anotar(particoes=len(tarefas), scores=[round(p, 5) for _, p in pares])
+    return resultados
+
+
+class RetrieverParticionado(BaseRetriever):
+    """
+    Retriever sobre um índice particionado por relatório ou por ano.
+
+    Perguntas que citam edições ("RPM de dezembro de 2024") consultam só as
+    partições correspondentes; as demais consultam todas em paralelo, e os
+    resultados são unidos como em `buscar_particoes`. `embeddings` tem o mesmo
+    papel que no `RetrieverHibrido`.
+    """
+
+    particoes: Any
+    embeddings: Any = None
+    k: int = 3
+    k_candidatos: int = 20
+    constante_rrf: int = 60
+    modo: str = "hibrido"
+    lambda_mmr: float = 1.0
+    reranqueador: Any = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        lexical = any(p.indice_lexical is not None for p in self.particoes)
+        modo = modo_consulta(query, self.modo) if lexical else "denso"
+        with span("recuperacao", modo=modo) as atual:
+            vetor = None
+            if modo != "lexical":
+                with span("embedding_consulta"):
+                    vetor = (
+                        self.embeddings.embed_query(query) if self.embeddings is not None
+                        else self.particoes[0].vector_store._embed_query(query)
+                    )
+            docs = buscar_particoes(
+                self.particoes, [query], [vetor], [modo], self.k, self.k_candidatos, self.constante_rrf,
+                self.lambda_mmr, self.reranqueador
+            )[0]
+            atual.anotar(documentos=len(docs))
+        return docs
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        return await asyncio.to_thread(self._get_relevant_documents, query)
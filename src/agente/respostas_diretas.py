@@ -0,0 +1,191 @@
+import re
+import logging
+from collections import Counter
+
+from src.agente.roteador import extrair_escopo
+from src.utils.indice_lexical import dobrar_acentos
+from src.utils.particoes import MESES
+from src.utils.telemetria import METRICAS, span
+
+_ANO = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+_TRIMESTRE = re.compile(r"(?<!\d)([1-4])\s*[o°º]?\s*(?:t|tri|trimestre)\b\.?\s*(?:de\s+)?((?:19|20)\d{2})")
+
+# Perguntas de consulta a um valor ("projeção do IPCA para 2025", "qual a Selic em 2026")
+_CONSULTA = re.compile(r"\b(?:projec\w*|previs\w*|estimativ\w*|expectativ\w*|quanto|valor|taxa|qual|quais)\b")
+# Perguntas que pedem explicação, não um número
+_EXPLICACAO = re.compile(r"\b(?:por que|porque|como|explique|motivos?|razao|razoes|fatores|riscos?|compare|comparacao)\b")
+
+# Termos que identificam um indicador no rótulo de uma linha de tabela. Rótulos sem
+# nenhum deles ("Total", "Brasil", "Mundo", "Demais") não são tratados como indicadores
+TERMOS_INDICADORES = {
+    "ipca", "inpc", "igp", "igpm", "selic", "cdi", "pib", "cambio", "dolar", "juros",
+    "inflacao", "desemprego", "desocupacao", "credito", "divida", "primario", "fbcf",
+    "exportacoes", "importacoes", "investimento", "consumo", "industria", "servicos",
+    "agropecuaria", "precos", "salarios", "emprego",
+}
+# Nomes por extenso dos indicadores nas perguntas, usados quando nenhuma chave aparece literalmente
+ALIASES_INDICADORES = {
+    "produto interno bruto": "pib",
+    "taxa basica de juros": "selic",
+    "inflacao": "ipca",
+}
+
+_NOMES_MESES = {numero: nome for nome, numero in MESES.items() if len(nome) > 3}
+_NOMES_MESES[3] = "março"
+
+# ------------------------------
+# INTERPRETAÇÃO DA PERGUNTA
+# ------------------------------
+def _indicador_citado(palavras: str, indicadores: list):
+    """
+    Chave do único indicador citado em `palavras` (texto normalizado, entre espaços).
+
+    Só valem chaves com um termo de `TERMOS_INDICADORES`; uma chave contida em
+    outra também citada ("ipca" em "ipca livres") dá lugar à mais específica.
+    Com dois ou mais indicadores citados, a pergunta é ambígua e retorna None.
+    """
+    conhecidas = [c for c in indicadores if TERMOS_INDICADORES.intersection(c.split())]
+    citadas = [c for c in conhecidas if f" {c} " in palavras]
+    if not citadas:
+        for alias, termo in ALIASES_INDICADORES.items():
+            palavras = palavras.replace(f" {alias} ", f" {termo} ")
+        citadas = [c for c in conhecidas if f" {c} " in palavras]
+    citadas = [c for c in citadas if not any(c != outra and f" {c} " in f" {outra} " for outra in citadas)]
+    return citadas[0] if len(citadas) == 1 else None
+
+
+def interpretar(pergunta: str, indicadores: list):
+    """
+    Identifica uma consulta a um valor de tabela: indicador, horizonte e edições.
+
+    Os anos citados como edição do relatório ("RPM de dezembro de 2024") não
+    contam como horizonte. Perguntas que pedem explicação, com mais de um
+    horizonte, sem indicador conhecido ou com mais de um indicador não são
+    consultas diretas.
+
+    Args:
+        pergunta (str): Pergunta do usuário.
+        indicadores (list): Chaves dos indicadores do índice.
+
+    Returns:
+        dict | None: `{"chave", "ano", "horizonte", "datas"}`, ou None.
+    """
+    texto = dobrar_acentos(pergunta.lower())
+    if not _CONSULTA.search(texto) or _EXPLICACAO.search(texto):
+        return None
+
+    palavras = f" {' '.join(re.findall(r'[a-z0-9]+', texto))} "
+    chave = _indicador_citado(palavras, indicadores)
+    if chave is None:
+        return None
+
+    escopo = extrair_escopo(pergunta)
+    anos = Counter(int(a) for a in _ANO.findall(texto))
+    anos.subtract(Counter(ano for ano, _ in escopo.datas if ano))
+    horizontes = [ano for ano, n in anos.items() if n > 0 and str(ano) not in chave]
+    if len(horizontes) != 1:
+        return None
+
+    trimestre = _TRIMESTRE.search(texto)
+    horizonte = f"{trimestre.group(2)}T{trimestre.group(1)}" if trimestre and int(trimestre.group(2)) == horizontes[0] else None
+    return {"chave": chave, "ano": horizontes[0], "horizonte": horizonte, "datas": escopo.datas}
+
+
+def _edicao(data_relatorio: str) -> str:
+    if not data_relatorio:
+        return "relatório"
+    ano, mes = data_relatorio.split("-")
+    return f"RPM de {_NOMES_MESES[int(mes)]} de {ano}"
+
+
+def _selecionar(valores: list, consulta: dict) -> list:
+    """Um valor por edição: as citadas na pergunta ou, sem citação, a mais recente."""
+    if consulta["datas"]:
+        valores = [
+            v for v in valores
+            if v["data_relatorio"] and any(
+                (ano is None or int(v["data_relatorio"][:4]) == ano) and (mes is None or int(v["data_relatorio"][5:]) == mes)
+                for ano, mes in consulta["datas"]
+            )
+        ]
+    if not consulta["horizonte"]:
+        # Sem trimestre na pergunta, vale o valor anual; sem ele, a pergunta é ambígua
+        valores = [v for v in valores if v["horizonte"] == str(consulta["ano"])]
+
+    por_edicao = {}
+    for valor in valores:
+        por_edicao.setdefault(valor["data_relatorio"], []).append(valor)
+    edicoes = list(por_edicao.items())[:None if consulta["datas"] else 1]
+
+    # Mais de um valor para o mesmo indicador e horizonte (cenários, tabelas diferentes): ambíguo
+    if any(len({v["valor"] for v in grupo}) > 1 for _, grupo in edicoes):
+        return []
+    return [grupo[0] for _, grupo in edicoes]
+
+# ------------------------------
+# RESPOSTA DIRETA
+# ------------------------------
+def responder_por_tabela(indice, pergunta: str):
+    """
+    Responde a uma consulta de valor direto do índice de tabelas, sem busca
+    nem chamada ao SLM.
+
+    Args:
+        indice (IndiceTabelas): Índice de tabelas carregado.
+        pergunta (str): Pergunta do usuário.
+
+    Returns:
+        dict | None: `{"result", "source_documents"}`, com um documento por
+            valor citado (PDF e página da tabela), ou None se a pergunta não
+            puder ser respondida pela tabela.
+    """
+    from langchain_core.documents import Document
+
+    with span("resposta_direta") as atual:
+        consulta = interpretar(pergunta, indice.indicadores())
+        valores = _selecionar(indice.consultar(consulta["chave"], consulta["ano"], consulta["horizonte"]), consulta) if consulta else []
+        atual.anotar(valores=len(valores))
+    METRICAS.incrementar("fib_respostas_diretas_total", resultado="hit" if valores else "miss")
+    if not valores:
+        return None
+
+    linhas, documentos = [], []
+    for v in valores:
+        unidade = f" ({v['unidade']})" if v["unidade"] and "%" not in v["texto"] else ""
+        linhas.append(
+            f"{v['indicador']} — {v['horizonte']}: {v['texto']}{unidade} "
+            f"(tabela do {_edicao(v['data_relatorio'])}, página {v['page'] + 1})."
+        )
+        documentos.append(Document(
+            page_content=f"{v['indicador']} | {v['horizonte']}: {v['texto']}",
+            metadata={"source": v["source"], "page": v["page"], "tabela": True}
+        ))
+    logging.info(f"Resposta direta pela tabela: {consulta['chave']} / {consulta['horizonte'] or consulta['ano']}.")
+    return {"result": "\n".join(linhas), "source_documents": documentos}
+
+
+def envolver(indice, rag_chain):
+    """
+    Envolve a cadeia RAG com as respostas diretas. Consultas de valor presentes
+    nas tabelas são respondidas em um único pedaço; as demais seguem para a
+    cadeia, em `invoke`, `stream`, `ainvoke` e `astream`.
+    """
+    from langchain_core.runnables import RunnableLambda
+    from langchain_core.runnables.utils import AddableDict
+
+    def responder(pergunta: str):
+        direta = responder_por_tabela(indice, pergunta)
+        if direta is not None:
+            yield AddableDict(direta)
+            return
+        yield from rag_chain.stream(pergunta)
+
+    async def aresponder(pergunta: str):
+        direta = responder_por_tabela(indice, pergunta)
+        if direta is not None:
+            yield AddableDict(direta)
+            return
+        async for parte in rag_chain.astream(pergunta):
+            yield parte
+
+    return RunnableLambda(responder, afunc=aresponder)
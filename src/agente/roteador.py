@@ -0,0 +1,109 @@
+import re
+import logging
+from dataclasses import dataclass, field
+
+from src.utils.indice_lexical import dobrar_acentos
+from src.utils.particoes import MESES
+
+_MES = "|".join(sorted(MESES, key=len, reverse=True))
+_ANO = r"(?:19|20)\d{2}"
+_DATA = rf"(?:\b(?P<mes>{_MES})\b(?:\s*(?:de\s+|/|-)?\s*(?P<ano>{_ANO})\b)?|\b(?P<ano_s>{_ANO})\b)"
+
+# "RPM de dezembro de 2024", "relatório de 2023", "edições de março e junho de 2024"
+_REFERENCIA = re.compile(r"\b(?:rpm|relatorios?|edicao|edicoes)\b")
+_ANTES_DATA = re.compile(rf"(?:\s+(?:de|do|da|dos|das|em|publicad[oa]s?))*\s+{_DATA}")
+_CONECTOR = re.compile(rf"\s*(?P<conector>,|\be\b|\bou\b|\ba\b|\bate\b)\s*(?:(?:de|do|da|em)\s+)?{_DATA}")
+_RECENTE = re.compile(
+    r"\b(?:ultim[oa]|mais recente|atual)\s+(?:rpm|relatorio|edicao)\b"
+    r"|\b(?:rpm|relatorio|edicao)\s+(?:mais recente|atual)\b"
+)
+
+
+@dataclass
+class Escopo:
+    """Edições citadas na pergunta: pares (ano, mês), com None como curinga."""
+    datas: list = field(default_factory=list)
+    recente: bool = False
+
+    @property
+    def vazio(self) -> bool:
+        return not self.datas and not self.recente
+
+
+def _data(m) -> tuple:
+    ano = m.group("ano") or m.group("ano_s")
+    return (int(ano) if ano else None, MESES[m.group("mes")] if m.group("mes") else None)
+
+# ------------------------------
+# ESCOPO DA PERGUNTA
+# ------------------------------
+def extrair_escopo(pergunta: str) -> Escopo:
+    """
+    Identifica as edições do RPM citadas na pergunta.
+
+    Só datas ligadas a uma referência ao relatório ("RPM", "relatório",
+    "edição") restringem a busca: em "o que o RPM de dezembro de 2024 diz sobre
+    o IPCA de 2025", 2025 é o horizonte da projeção, não a edição. Um mês sem
+    ano vale para todos os anos e "a"/"até" entre dois anos indica um intervalo.
+    """
+    texto = dobrar_acentos(pergunta.lower())
+    escopo = Escopo(recente=bool(_RECENTE.search(texto)))
+
+    for referencia in _REFERENCIA.finditer(texto):
+        m = _ANTES_DATA.match(texto, referencia.end())
+        if m is None:
+            continue
+        datas = [_data(m)]
+        posicao = m.end()
+        while (m := _CONECTOR.match(texto, posicao)) is not None:
+            data = _data(m)
+            anterior = datas[-1]
+            if m.group("conector") in ("a", "ate") and data[0] and anterior[0] and not data[1] and not anterior[1]:
+                datas.extend((ano, None) for ano in range(anterior[0] + 1, data[0] + 1))
+            else:
+                datas.append(data)
+            posicao = m.end()
+
+        # "março e junho de 2024": meses sem ano herdam o ano da data seguinte
+        for i in range(len(datas) - 2, -1, -1):
+            if datas[i][0] is None and datas[i + 1][0] is not None:
+                datas[i] = (datas[i + 1][0], datas[i][1])
+        escopo.datas.extend(d for d in datas if d not in escopo.datas)
+    return escopo
+
+
+def rotear(pergunta: str, particoes: list) -> list:
+    """
+    Seleciona as partições que a pergunta precisa consultar.
+
+    Perguntas sem escopo (ou cujo escopo não corresponde a nenhuma partição)
+    consultam todas as partições.
+
+    Args:
+        pergunta (str): Pergunta do usuário.
+        particoes (list): Partições carregadas (`carregar_particoes`), da mais recente para a mais antiga.
+
+    Returns:
+        list: Subconjunto de `particoes`, na mesma ordem.
+    """
+    escopo = extrair_escopo(pergunta)
+    if escopo.vazio:
+        return particoes
+
+    selecionadas = [
+        p for p in particoes
+        if any(
+            (ano is None or p.ano == ano) and (mes is None or p.mes is None or p.mes == mes)
+            for ano, mes in escopo.datas
+        )
+    ]
+    if escopo.recente:
+        recente = next((p for p in particoes if p.ano is not None), None)
+        if recente is not None and recente not in selecionadas:
+            selecionadas.insert(0, recente)
+
+    if not selecionadas:
+        logging.warning(f"⚠️ Nenhuma partição corresponde às edições citadas {escopo.datas}. Consultando todas.")
+        return particoes
+    logging.info(f"Consulta restrita às partições: {', '.join(p.chave for p in selecionadas)}.")
+    return selecionadas
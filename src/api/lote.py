@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+import numpy as np
+from langchain_core.runnables.utils import AddableDict
+
+# Importando módulos
+from src.agente.agente import ComponentesRAG, carregar_componentes, criar_cadeia_resposta
+from src.agente.recuperacao import MODOS_RECUPERACAO
+from src.agente.diversidade import criar_reranqueador
+from src.agente.respostas_diretas import responder_por_tabela
+from src.api.servidor import CONEXOES_EMBEDDING, AgrupadorConsultas
+from src.utils.azure_client import garantir_conexoes
+from src.utils.setup_log import setup_logging
+
+setup_logging()
+
+# ------------------------------
+# PERGUNTAS E RESPOSTAS JÁ GRAVADAS
+# ------------------------------
+def ler_perguntas(caminho: str) -> list:
+    """
+    Lê o arquivo de perguntas: texto com uma pergunta por linha (linhas vazias
+    e iniciadas por `#` são ignoradas) ou JSONL com `{"id", "pergunta"}`.
+
+    Sem `id`, a própria pergunta identifica a resposta na retomada. Perguntas
+    repetidas entram uma só vez.
+
+    Returns:
+        list: Pares `(id, pergunta)`, na ordem do arquivo.
+    """
+    perguntas = {}
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
+                continue
+            if caminho.endswith(".jsonl"):
+                registro = json.loads(linha)
+                pergunta = registro["pergunta"].strip()
+                perguntas.setdefault(str(registro.get("id", pergunta)), pergunta)
+            else:
+                perguntas.setdefault(linha, linha)
+    return list(perguntas.items())
+
+
+def ids_respondidos(caminho: str) -> set:
+    """
+    IDs já gravados na saída. Uma última linha incompleta (queda durante a
+    escrita) é descartada do arquivo, para a retomada continuar a partir dela.
+    """
+    if not os.path.exists(caminho):
+        return set()
+    with open(caminho, "rb+") as f:
+        conteudo = f.read()
+        if conteudo and not conteudo.endswith(b"\n"):
+            f.truncate(conteudo.rfind(b"\n") + 1)
+    ids = set()
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                ids.add(json.loads(linha)["id"])
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return ids
+
+# ------------------------------
+# RESPOSTAS EM LOTE
+# ------------------------------
+def _registro(id_: str, pergunta: str, resposta: dict, segundos: float) -> dict:
+    return {
+        "id": id_,
+        "pergunta": pergunta,
+        "resposta": resposta["result"],
+        "fontes": [
+            {"source": d.metadata.get("source"), "page": d.metadata.get("page"), "trecho": d.page_content}
+            for d in resposta.get("source_documents", [])
+        ],
+        "segundos": round(segundos, 4),
+    }
+
+
+async def responder_lote(
+    componentes: ComponentesRAG,
+    perguntas: list,
+    saida: str,
+    max_llm: int = 8,
+    tamanho_lote: int = 256,
+    modo: str = "hibrido",
+    lambda_mmr: float = 1.0,
+    reranqueador=None,
+    retomar: bool = True
+) -> dict:
+    """
+    Responde um conjunto de perguntas com os mesmos componentes de `create_rag_chain`.
+
+    Consultas de valor presentes no índice de tabelas são respondidas direto.
+    As demais são recuperadas em lotes de até `tamanho_lote` perguntas, cada
+    lote com uma única chamada de embedding e uma única busca FAISS, e as
+    chamadas ao SLM rodam com no máximo `max_llm` em voo. Cada resposta é
+    gravada na saída JSONL assim que fica pronta; com `retomar`, perguntas já
+    gravadas em uma execução anterior são puladas. Perguntas com erro ficam de
+    fora da saída e são refeitas na próxima execução.
+
+    Args:
+        componentes (ComponentesRAG): Componentes carregados.
+        perguntas (list): Pares `(id, pergunta)` (ver `ler_perguntas`).
+        saida (str): Arquivo JSONL das respostas.
+        max_llm (int): Máximo de chamadas simultâneas ao SLM.
+        tamanho_lote (int): Máximo de perguntas por chamada de embedding.
+        modo (str): `hibrido`, `denso` ou `lexical`.
+        lambda_mmr (float): Peso da relevância no MMR sobre os candidatos (1 desativa).
+        reranqueador (opcional): Callable `(consulta, textos) -> pontuações`.
+        retomar (bool): Mantém a saída existente e pula as perguntas já respondidas.
+
+    Returns:
+        dict: Estatísticas da execução (perguntas, respondidas, retomadas,
+            diretas, erros, lotes de recuperação, perguntas/s e latências do SLM).
+    """
+    inicio = time.perf_counter()
+    feitas = ids_respondidos(saida) if retomar else set()
+    pendentes = [(id_, p) for id_, p in perguntas if id_ not in feitas]
+    estatisticas = {
+        "perguntas": len(perguntas), "retomadas": len(perguntas) - len(pendentes),
+        "respondidas": 0, "diretas": 0, "erros": 0, "lotes_recuperacao": 0,
+    }
+    logging.info(f"Respostas em lote: {len(pendentes)} perguntas pendentes ({estatisticas['retomadas']} já respondidas).")
+
+    agrupador = AgrupadorConsultas(
+        componentes.embeddings_model, componentes.vector_store,
+        indice_lexical=componentes.indice_lexical, modo=modo, particoes=componentes.particoes,
+        lambda_mmr=lambda_mmr, reranqueador=reranqueador
+    )
+    cadeia_resposta = criar_cadeia_resposta(componentes)
+    semaforo = asyncio.Semaphore(max_llm)
+    latencias = []
+
+    with open(saida, "a" if retomar else "w", encoding="utf-8") as arquivo:
+        def gravar(registro: dict):
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            estatisticas["respondidas"] += 1
+
+        # Consultas de valor: direto do índice de tabelas
+        recuperar = []
+        for id_, pergunta in pendentes:
+            direta = responder_por_tabela(componentes.indice_tabelas, pergunta) if componentes.indice_tabelas else None
+            if direta is None:
+                recuperar.append((id_, pergunta))
+            else:
+                gravar(_registro(id_, pergunta, direta, 0.0))
+                estatisticas["diretas"] += 1
+
+        async def gerar(id_: str, pergunta: str, docs: list):
+            async with semaforo:
+                comeco = time.perf_counter()
+                try:
+                    completa = AddableDict()
+                    async for parte in cadeia_resposta.astream({"context": docs, "question": pergunta}):
+                        completa = completa + parte
+                except Exception as e:
+                    return id_, pergunta, None, e
+                return id_, pergunta, completa, time.perf_counter() - comeco
+
+        loop = asyncio.get_running_loop()
+        for i in range(0, len(recuperar), tamanho_lote):
+            lote = recuperar[i:i + tamanho_lote]
+            textos = list(dict.fromkeys(p for _, p in lote))
+            por_pergunta = dict(zip(textos, await loop.run_in_executor(None, agrupador.buscar_lote, textos)))
+            estatisticas["lotes_recuperacao"] += 1
+
+            tarefas = [asyncio.ensure_future(gerar(id_, p, por_pergunta[p])) for id_, p in lote]
+            for tarefa in asyncio.as_completed(tarefas):
+                id_, pergunta, resposta, resultado = await tarefa
+                if resposta is None:
+                    estatisticas["erros"] += 1
+                    logging.error(f"❌ Erro ao responder '{pergunta[:60]}' ({type(resultado).__name__}: {resultado}). Será refeita na retomada.")
+                    continue
+                latencias.append(resultado)
+                gravar(_registro(id_, pergunta, resposta, resultado))
+
+    duracao = time.perf_counter() - inicio
+    ms = np.array(latencias) * 1000 if latencias else np.zeros(1)
+    estatisticas.update({
+        "segundos": round(duracao, 3),
+        "perguntas_por_s": round(estatisticas["respondidas"] / duracao, 2) if duracao else 0.0,
+        "slm_p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "slm_p95_ms": round(float(np.percentile(ms, 95)), 1),
+    })
+    if estatisticas["erros"]:
+        logging.warning(f"⚠️ {estatisticas['erros']} perguntas com erro. Execute novamente para refazê-las.")
+    logging.info(
+        f"✅ {estatisticas['respondidas']} respostas gravadas em '{saida}' em {duracao:.2f} segundos "
+        f"({estatisticas['perguntas_por_s']} perguntas/s, {estatisticas['diretas']} pelas tabelas, "
+        f"{estatisticas['lotes_recuperacao']} lotes de recuperação)."
+    )
+    return estatisticas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Responde um arquivo de perguntas em lote (JSONL de saída).")
+    parser.add_argument("perguntas", help="Arquivo .txt (uma pergunta por linha) ou .jsonl ({\"id\", \"pergunta\"}).")
+    parser.add_argument("--saida", default="respostas.jsonl", help="Arquivo JSONL das respostas.")
+    parser.add_argument("--max-llm", type=int, default=8, help="Máximo de chamadas simultâneas ao SLM.")
+    parser.add_argument("--tamanho-lote", type=int, default=256, help="Máximo de perguntas por chamada de embedding.")
+    parser.add_argument("--modo", choices=MODOS_RECUPERACAO, default="hibrido", help="Modo de recuperação.")
+    parser.add_argument("--diversidade", type=float, help="Peso da relevância no MMR (1 desativa; padrão: RECUPERACAO_DIVERSIDADE).")
+    parser.add_argument("--recomecar", action="store_true", help="Descarta a saída existente em vez de retomá-la.")
+    parser.add_argument("--estatisticas", metavar="ARQUIVO", help="Grava as estatísticas da execução em JSON.")
+    args = parser.parse_args()
+
+    garantir_conexoes(args.max_llm + CONEXOES_EMBEDDING)
+    resultado = asyncio.run(responder_lote(
+        carregar_componentes(), ler_perguntas(args.perguntas), args.saida,
+        max_llm=args.max_llm, tamanho_lote=args.tamanho_lote, modo=args.modo,
+        lambda_mmr=args.diversidade if args.diversidade is not None else float(os.getenv("RECUPERACAO_DIVERSIDADE", "0.7")),
+        reranqueador=criar_reranqueador(), retomar=not args.recomecar
+    ))
+    if args.estatisticas:
+        with open(args.estatisticas, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
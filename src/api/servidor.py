@@ -0,0 +1,395 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import argparse
+
+from aiohttp import web
+from langchain_core.runnables.utils import AddableDict
+
+# Importando módulos
+from src.agente.agente import ComponentesRAG, carregar_componentes, criar_cadeia_resposta, K_DOCUMENTOS, VECTORSTORE_PATH
+from src.agente.recuperacao import MODOS_RECUPERACAO, buscar_particoes, modo_consulta, recuperar_em_lote
+from src.agente.diversidade import criar_reranqueador
+from src.agente.respostas_diretas import responder_por_tabela
+from src.utils.telemetria import METRICAS, span
+from src.utils.versoes_indice import VigiaIndice
+from src.utils.azure_client import garantir_conexoes
+from src.utils.setup_log import setup_logging
+
+setup_logging()
+
+# Conexões HTTP além das `max_llm` do SLM, para as chamadas de embedding dos lotes
+CONEXOES_EMBEDDING = 4
+
+# ------------------------------
+# MICRO-BATCHING DAS CONSULTAS
+# ------------------------------
+class AgrupadorConsultas:
+    """
+    Agrupa consultas que chegam em uma janela de poucos milissegundos.
+
+    Cada lote gera uma única chamada de embedding (`embed_documents`) e uma
+    única busca FAISS (`recuperar_em_lote`), executadas fora do event loop.
+    Perguntas idênticas no mesmo lote são embedadas uma só vez. Enquanto um
+    lote é processado, as novas consultas já formam o lote seguinte.
+
+    Com índice lexical, as buscas BM25 do lote rodam em paralelo ao embedding e
+    são fundidas às densas com RRF; consultas só lexicais ficam fora do embedding.
+    Em um índice particionado, o lote também gera um único embedding e cada
+    partição recebe uma busca com as consultas roteadas para ela.
+    """
+
+    def __init__(
+        self,
+        embeddings_model,
+        vector_store,
+        k: int = K_DOCUMENTOS,
+        janela_ms: float = 5.0,
+        max_lote: int = 64,
+        indice_lexical=None,
+        modo: str = "hibrido",
+        k_candidatos: int = 20,
+        particoes: list = None,
+        lambda_mmr: float = 1.0,
+        reranqueador=None
+    ):
+        """
+        Args:
+            embeddings_model: Modelo de embeddings das perguntas.
+            vector_store (FAISS): Vetorstore carregado.
+            k (int): Documentos recuperados por pergunta.
+            janela_ms (float): Tempo máximo que a primeira consulta de um lote espera por outras.
+            max_lote (int): Tamanho a partir do qual o lote é despachado sem esperar a janela.
+            indice_lexical (IndiceLexical, opcional): Índice BM25 para a recuperação híbrida.
+            modo (str): `hibrido`, `denso` ou `lexical` (ignorado sem índice lexical).
+            k_candidatos (int): Candidatos de cada busca antes da fusão RRF.
+            particoes (list, opcional): Partições de um índice particionado (no lugar de `vector_store`).
+            lambda_mmr (float): Peso da relevância no MMR sobre os candidatos (1 desativa).
+            reranqueador (opcional): Callable `(consulta, textos) -> pontuações` aplicado aos candidatos.
+        """
+        self.embeddings_model = embeddings_model
+        self.vector_store = vector_store
+        self.k = k
+        self.indice_lexical = indice_lexical
+        self.particoes = particoes
+        lexical = indice_lexical is not None or any(p.indice_lexical is not None for p in particoes or [])
+        self.modo = modo if lexical else "denso"
+        self.k_candidatos = k_candidatos
+        self.lambda_mmr = lambda_mmr
+        self.reranqueador = reranqueador
+        self.janela = janela_ms / 1000
+        self.max_lote = max_lote
+        self.estatisticas = {"consultas": 0, "lotes": 0, "maior_lote": 0}
+
+        self._pendentes = []
+        self._timer = None
+        self._tarefas = set()
+
+    async def recuperar(self, pergunta: str) -> list:
+        """Retorna os documentos da pergunta, processada junto com as consultas simultâneas."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendentes.append((pergunta, futuro))
+
+        if len(self._pendentes) >= self.max_lote or self.janela <= 0:
+            self._despachar()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.janela, self._despachar)
+        return await futuro
+
+    def _despachar(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            tarefa = asyncio.ensure_future(self._processar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _processar(self, lote: list):
+        self.estatisticas["consultas"] += len(lote)
+        self.estatisticas["lotes"] += 1
+        self.estatisticas["maior_lote"] = max(self.estatisticas["maior_lote"], len(lote))
+
+        perguntas = list(dict.fromkeys(pergunta for pergunta, _ in lote))
+        try:
+            loop = asyncio.get_running_loop()
+            docs = await loop.run_in_executor(None, self.buscar_lote, perguntas)
+        except Exception as e:
+            logging.error(f"❌ Erro na recuperação de um lote de {len(lote)} consultas: {e}")
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        por_pergunta = dict(zip(perguntas, docs))
+        for pergunta, futuro in lote:
+            if not futuro.done():
+                futuro.set_result(por_pergunta[pergunta])
+
+    @property
+    def total_documentos(self) -> int:
+        if self.particoes:
+            return sum(p.vector_store.index.ntotal for p in self.particoes)
+        return self.vector_store.index.ntotal
+
+    def _embeddings(self, perguntas: list) -> list:
+        with span("embedding_consultas", consultas=len(perguntas)):
+            return self.embeddings_model.embed_documents(perguntas)
+
+    def buscar_lote(self, perguntas: list) -> list:
+        """
+        Recupera os documentos de um lote de perguntas, com uma única chamada de
+        embedding e uma única busca FAISS (síncrono, fora do event loop).
+        """
+        with span("api_lote", consultas=len(perguntas)):
+            return self._buscar_lote(perguntas)
+
+    def _buscar_lote(self, perguntas: list) -> list:
+        modos = [modo_consulta(p, self.modo) for p in perguntas]
+        if self.particoes:
+            densas = [i for i, modo in enumerate(modos) if modo != "lexical"]
+            vetores = [None] * len(perguntas)
+            if densas:
+                for i, vetor in zip(densas, self._embeddings([perguntas[i] for i in densas])):
+                    vetores[i] = vetor
+            return buscar_particoes(
+                self.particoes, perguntas, vetores, modos, self.k, self.k_candidatos,
+                lambda_mmr=self.lambda_mmr, reranqueador=self.reranqueador
+            )
+        return recuperar_em_lote(
+            self.vector_store, self.indice_lexical, perguntas, modos, self._embeddings, self.k, self.k_candidatos,
+            lambda_mmr=self.lambda_mmr, reranqueador=self.reranqueador
+        )
+
+# ------------------------------
+# SERVIÇO HTTP
+# ------------------------------
+class ServicoRAG:
+    """
+    Responde perguntas com um único índice carregado, para muitos clientes simultâneos.
+
+    A recuperação passa pelo `AgrupadorConsultas`; a geração usa a mesma cadeia
+    de resposta de `create_rag_chain`, em modo assíncrono, com no máximo
+    `max_llm` chamadas ao SLM em voo.
+
+    `trocar_componentes` põe em uso uma nova versão do índice já carregada:
+    cada pergunta usa os componentes em uso quando chegou, e os lotes já
+    formados terminam com a versão anterior. Os componentes substituídos são
+    fechados quando a última dessas perguntas termina.
+    """
+
+    def __init__(
+        self,
+        componentes: ComponentesRAG,
+        janela_ms: float = 5.0,
+        max_lote: int = 64,
+        max_llm: int = 64,
+        modo: str = "hibrido",
+        lambda_mmr: float = 1.0,
+        reranqueador=None
+    ):
+        self._opcoes = {
+            "janela_ms": janela_ms, "max_lote": max_lote, "modo": modo,
+            "lambda_mmr": lambda_mmr, "reranqueador": reranqueador
+        }
+        self._semaforo = asyncio.Semaphore(max_llm)
+        self.estatisticas = {"respostas": 0, "erros": 0, "em_andamento": 0}
+        self._trava_troca = threading.Lock()
+        self.trocar_componentes(componentes)
+
+    def trocar_componentes(self, componentes: ComponentesRAG):
+        """Põe em uso os componentes de uma nova versão do índice (pode ser chamado de outra thread)."""
+        agrupador = AgrupadorConsultas(
+            componentes.embeddings_model, componentes.vector_store,
+            janela_ms=self._opcoes["janela_ms"], max_lote=self._opcoes["max_lote"],
+            indice_lexical=componentes.indice_lexical, modo=self._opcoes["modo"],
+            particoes=componentes.particoes,
+            lambda_mmr=self._opcoes["lambda_mmr"], reranqueador=self._opcoes["reranqueador"]
+        )
+        cadeia_resposta = criar_cadeia_resposta(componentes)
+        with self._trava_troca:
+            anterior = getattr(self, "_em_uso", None)
+            if anterior is not None:
+                # As estatísticas de lotes continuam somando entre versões
+                agrupador.estatisticas = anterior[0].estatisticas
+            self._em_uso = (agrupador, cadeia_resposta, componentes)
+        if anterior is not None:
+            anterior[2].aposentar()
+
+    @property
+    def agrupador(self) -> AgrupadorConsultas:
+        return self._em_uso[0]
+
+    async def responder(self, pergunta: str) -> dict:
+        """
+        Consultas de valor presentes no índice de tabelas são respondidas sem
+        recuperação nem SLM.
+
+        Returns:
+            dict: `{"result", "source_documents"}`, como `create_rag_chain().invoke`.
+        """
+        with self._trava_troca:
+            agrupador, cadeia_resposta, componentes = self._em_uso
+            componentes.adquirir()
+        try:
+            if componentes.indice_tabelas is not None:
+                direta = responder_por_tabela(componentes.indice_tabelas, pergunta)
+                if direta is not None:
+                    return direta
+
+            docs = await agrupador.recuperar(pergunta)
+            async with self._semaforo:
+                completa = AddableDict()
+                async for parte in cadeia_resposta.astream({"context": docs, "question": pergunta}):
+                    completa = completa + parte
+            return completa
+        finally:
+            componentes.liberar()
+
+    async def _perguntar(self, request: web.Request) -> web.Response:
+        try:
+            corpo = await request.json()
+            pergunta = corpo["pergunta"].strip()
+        except Exception:
+            return web.json_response({"erro": "Envie um JSON com o campo 'pergunta'."}, status=400)
+        if not pergunta:
+            return web.json_response({"erro": "A pergunta está vazia."}, status=400)
+
+        inicio = time.perf_counter()
+        self.estatisticas["em_andamento"] += 1
+        try:
+            resposta = await self.responder(pergunta)
+        except Exception as e:
+            self.estatisticas["erros"] += 1
+            logging.error(f"❌ Erro ao responder '{pergunta[:60]}': {e}")
+            return web.json_response({"erro": "Falha ao gerar a resposta."}, status=500)
+        finally:
+            self.estatisticas["em_andamento"] -= 1
+
+        self.estatisticas["respostas"] += 1
+        return web.json_response({
+            "result": resposta["result"],
+            "source_documents": [
+                {"page_content": d.page_content, "metadata": d.metadata}
+                for d in resposta.get("source_documents", [])
+            ],
+            "segundos": round(time.perf_counter() - inicio, 4),
+        })
+
+    async def _saude(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "documentos": self.agrupador.total_documentos,
+            "versao": os.path.basename(self._em_uso[2].diretorio),
+        })
+
+    async def _estatisticas(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.estatisticas, **self.agrupador.estatisticas})
+
+    async def _metricas(self, request: web.Request) -> web.Response:
+        return web.Response(
+            text=METRICAS.exportar(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    def criar_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/perguntar", self._perguntar)
+        app.router.add_get("/saude", self._saude)
+        app.router.add_get("/estatisticas", self._estatisticas)
+        app.router.add_get("/metrics", self._metricas)
+        return app
+
+
+# Chaves da aplicação aiohttp
+SERVICO = web.AppKey("servico", ServicoRAG)
+VIGIA = web.AppKey("vigia", VigiaIndice)
+
+
+def criar_app(
+    componentes: ComponentesRAG = None,
+    janela_ms: float = 5.0,
+    max_lote: int = 64,
+    max_llm: int = 64,
+    modo: str = "hibrido",
+    diversidade: float = None,
+    recarga_segundos: float = 0
+) -> web.Application:
+    """
+    Cria a aplicação aiohttp da API.
+
+    `diversidade` é o peso da relevância no MMR aplicado aos candidatos (1
+    desativa); por padrão, lido de RECUPERACAO_DIVERSIDADE, como na cadeia do
+    agente. O reranqueador local vem de RERANQUEADOR_MODELO.
+
+    Com `recarga_segundos` > 0, uma thread verifica o ponteiro de versão do
+    índice nesse intervalo e, quando a ingestão publica uma nova versão,
+    carrega os componentes fora do event loop e os troca sem derrubar as
+    perguntas em andamento.
+
+    Ao carregar os componentes, o pool HTTP compartilhado com o Azure é
+    aumentado, se preciso, para as `max_llm` chamadas ao SLM em voo.
+
+    Rotas:
+        POST /perguntar     `{"pergunta": "..."}` -> `{"result", "source_documents", "segundos"}`
+        GET  /saude         status, número de documentos e versão do índice
+        GET  /estatisticas  respostas, erros e tamanho dos lotes de recuperação
+        GET  /metrics       métricas por etapa no formato texto do Prometheus
+    """
+    if componentes is None:
+        # Antes de criar os clientes Azure, que recebem o pool já dimensionado
+        garantir_conexoes(max_llm + CONEXOES_EMBEDDING)
+
+    # A versão é registrada antes da carga: uma publicação durante ela gera uma nova recarga
+    vigia = None
+    if recarga_segundos > 0 and componentes is None:
+        vigia = VigiaIndice(VECTORSTORE_PATH, lambda: servico.trocar_componentes(carregar_componentes()), recarga_segundos)
+    servico = ServicoRAG(
+        componentes or carregar_componentes(),
+        janela_ms=janela_ms, max_lote=max_lote, max_llm=max_llm, modo=modo,
+        lambda_mmr=diversidade if diversidade is not None else float(os.getenv("RECUPERACAO_DIVERSIDADE", "0.7")),
+        reranqueador=criar_reranqueador()
+    )
+    app = servico.criar_app()
+    app[SERVICO] = servico
+
+    if vigia is not None:
+        async def iniciar_vigia(app):
+            vigia.iniciar()
+
+        async def parar_vigia(app):
+            await asyncio.to_thread(vigia.parar)
+
+        app.on_startup.append(iniciar_vigia)
+        app.on_cleanup.append(parar_vigia)
+        app[VIGIA] = vigia
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP do Financial Insight Bot.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--janela-ms", type=float, default=5.0, help="Janela de agrupamento das consultas (0 desativa).")
+    parser.add_argument("--max-lote", type=int, default=64, help="Máximo de consultas por lote de recuperação.")
+    parser.add_argument("--max-llm", type=int, default=64, help="Máximo de chamadas simultâneas ao SLM.")
+    parser.add_argument("--modo", choices=MODOS_RECUPERACAO, default="hibrido", help="Modo de recuperação.")
+    parser.add_argument("--diversidade", type=float, help="Peso da relevância no MMR (1 desativa; padrão: RECUPERACAO_DIVERSIDADE).")
+    parser.add_argument(
+        "--recarga-segundos", type=float, default=float(os.getenv("INDICE_RECARGA_SEGUNDOS", "30")),
+        help="Intervalo de verificação de novas versões do índice (0 desativa)."
+    )
+    args = parser.parse_args()
+
+    logging.info(f"Iniciando API em http://{args.host}:{args.porta} (janela: {args.janela_ms} ms, lote máx.: {args.max_lote})")
+    web.run_app(
+        criar_app(
+            janela_ms=args.janela_ms, max_lote=args.max_lote, max_llm=args.max_llm, modo=args.modo,
+            diversidade=args.diversidade, recarga_segundos=args.recarga_segundos
+        ),
+        host=args.host, port=args.porta, print=None
+    )
@@ -0,0 +1,203 @@
+import os
+import json
+import zlib
+import sqlite3
+import logging
+import argparse
+from datetime import datetime
+from importlib import metadata
+
+from langchain_core.documents import Document
+
+from src.pipelines.manifesto import hash_arquivo
+
+CACHE_PAGINAS_PATH = os.path.join("cache", "paginas.sqlite")
+
+# Revisão da extração em `processar_dados`: incremente ao mudar o texto ou os
+# metadados produzidos por página, para invalidar o cache
+REVISAO_EXTRACAO = 1
+
+# Pacote cuja versão identifica cada extrator
+_PACOTES_EXTRATOR = {"pdfplumber": "pdfplumber", "pdfium": "pypdfium2"}
+
+
+def versao_extrator(extrator: str = "pdfplumber") -> str:
+    """Identifica o extrator: nome, versão do pacote e revisão da extração."""
+    try:
+        versao = metadata.version(_PACOTES_EXTRATOR.get(extrator, extrator))
+    except metadata.PackageNotFoundError:
+        versao = "desconhecida"
+    return f"{extrator}-{versao}-r{REVISAO_EXTRACAO}"
+
+# ------------------------------
+# CACHE DE PÁGINAS EXTRAÍDAS
+# ------------------------------
+class CachePaginas:
+    """
+    Cache persistente (SQLite) do texto e dos metadados extraídos de cada página.
+
+    Cada PDF é identificado pelo hash SHA-256 do seu conteúdo e pela versão do
+    extrator: renomear ou mover um PDF não invalida o cache, e alterar o arquivo
+    ou o extrator, sim. O texto das páginas é gravado comprimido (zlib). Só
+    PDFs extraídos por completo entram no cache, e cada extrator tem as suas entradas.
+    """
+
+    def __init__(self, caminho: str = CACHE_PAGINAS_PATH, versao: str = None, extrator: str = "pdfplumber"):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.versao = versao or versao_extrator(extrator)
+        self.hits = 0
+        self.misses = 0
+        self._hashes = {}
+
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pdfs ("
+            "hash TEXT NOT NULL, versao TEXT NOT NULL, nome TEXT NOT NULL, "
+            "paginas INTEGER NOT NULL, criado_em TEXT NOT NULL, PRIMARY KEY (hash, versao))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS paginas ("
+            "hash TEXT NOT NULL, versao TEXT NOT NULL, pagina INTEGER NOT NULL, "
+            "texto BLOB NOT NULL, metadados TEXT NOT NULL, PRIMARY KEY (hash, versao, pagina))"
+        )
+        self._conn.commit()
+
+    def _hash(self, file_path: str) -> str:
+        # O hash é recalculado só se o arquivo mudar de tamanho ou de data de modificação
+        info = os.stat(file_path)
+        chave = (file_path, info.st_size, info.st_mtime_ns)
+        if chave not in self._hashes:
+            self._hashes[chave] = hash_arquivo(file_path)
+        return self._hashes[chave]
+
+    def _existe(self, file_path: str) -> bool:
+        return self._conn.execute(
+            "SELECT 1 FROM pdfs WHERE hash = ? AND versao = ?", (self._hash(file_path), self.versao)
+        ).fetchone() is not None
+
+    def contem(self, file_path: str) -> bool:
+        """Indica se as páginas do PDF estão no cache, registrando o acerto ou a falha."""
+        encontrado = self._existe(file_path)
+        if encontrado:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return encontrado
+
+    def buscar(self, file_path: str):
+        """
+        Busca as páginas de um PDF no cache.
+
+        Returns:
+            list | None: Documentos das páginas, como os do `PDFPlumberLoader`
+                (com `source` e `file_path` apontando para `file_path`), ou None se ausente.
+        """
+        if not self._existe(file_path):
+            return None
+
+        linhas = self._conn.execute(
+            "SELECT texto, metadados FROM paginas WHERE hash = ? AND versao = ? ORDER BY pagina",
+            (self._hash(file_path), self.versao)
+        ).fetchall()
+        return [
+            Document(
+                page_content=zlib.decompress(texto).decode("utf-8"),
+                metadata={"source": file_path, "file_path": file_path, **json.loads(metadados)}
+            )
+            for texto, metadados in linhas
+        ]
+
+    def salvar(self, file_path: str, docs: list):
+        """Grava as páginas extraídas de um PDF (todas, na ordem)."""
+        hash_pdf = self._hash(file_path)
+        linhas = [
+            (
+                hash_pdf, self.versao, i,
+                zlib.compress(doc.page_content.encode("utf-8")),
+                json.dumps({k: v for k, v in doc.metadata.items() if k not in ("source", "file_path")}, ensure_ascii=False)
+            )
+            for i, doc in enumerate(docs)
+        ]
+        with self._conn:
+            self._conn.execute("DELETE FROM paginas WHERE hash = ? AND versao = ?", (hash_pdf, self.versao))
+            self._conn.executemany("INSERT INTO paginas VALUES (?, ?, ?, ?, ?)", linhas)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs VALUES (?, ?, ?, ?, ?)",
+                (hash_pdf, self.versao, os.path.basename(file_path), len(docs), datetime.now().isoformat(timespec="seconds"))
+            )
+
+    def invalidar(self, nomes: list = None, outras_versoes: bool = False) -> int:
+        """
+        Remove PDFs do cache.
+
+        Args:
+            nomes (list, opcional): Nomes ou caminhos dos PDFs. Se omitido, remove todos.
+            outras_versoes (bool): Remove apenas as entradas de outras versões do extrator.
+
+        Returns:
+            int: Quantidade de PDFs removidos.
+        """
+        if outras_versoes:
+            filtro, parametros = "versao != ?", [self.versao]
+        elif nomes:
+            basenames = [os.path.basename(n) for n in nomes]
+            filtro, parametros = f"nome IN ({','.join('?' * len(basenames))})", basenames
+        else:
+            filtro, parametros = "1 = 1", []
+
+        with self._conn:
+            alvos = self._conn.execute(f"SELECT hash, versao FROM pdfs WHERE {filtro}", parametros).fetchall()
+            self._conn.executemany("DELETE FROM paginas WHERE hash = ? AND versao = ?", alvos)
+            self._conn.executemany("DELETE FROM pdfs WHERE hash = ? AND versao = ?", alvos)
+        self._conn.execute("VACUUM")
+        return len(alvos)
+
+    def estatisticas(self) -> dict:
+        """PDFs e páginas armazenados, tamanho em disco e acessos desta execução."""
+        pdfs, paginas = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(paginas), 0) FROM pdfs WHERE versao = ?", (self.versao,)
+        ).fetchone()
+        obsoletos = self._conn.execute("SELECT COUNT(*) FROM pdfs WHERE versao != ?", (self.versao,)).fetchone()[0]
+        texto = self._conn.execute("SELECT COALESCE(SUM(LENGTH(texto)), 0) FROM paginas").fetchone()[0]
+        return {
+            "versao": self.versao,
+            "pdfs": pdfs,
+            "paginas": paginas,
+            "pdfs_outras_versoes": obsoletos,
+            "texto_comprimido_mb": round(texto / 1024 ** 2, 2),
+            "arquivo_mb": round(os.path.getsize(self.caminho) / 1024 ** 2, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    @property
+    def taxa_acerto(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def fechar(self):
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    from src.utils.setup_log import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Cache de páginas extraídas dos PDFs.")
+    parser.add_argument("--caminho", default=CACHE_PAGINAS_PATH, help="Arquivo do cache.")
+    parser.add_argument("--extrator", default="pdfplumber", choices=list(_PACOTES_EXTRATOR), help="Extrator cujas entradas são consideradas atuais.")
+    parser.add_argument("--invalidar", nargs="*", metavar="PDF", help="Remove os PDFs informados (ou todos, sem nomes).")
+    parser.add_argument("--obsoletos", action="store_true", help="Remove as entradas de outras versões do extrator.")
+    args = parser.parse_args()
+
+    cache = CachePaginas(args.caminho, extrator=args.extrator)
+    if args.obsoletos:
+        logging.info(f"🗑️ {cache.invalidar(outras_versoes=True)} PDFs de outras versões do extrator removidos.")
+    elif args.invalidar is not None:
+        logging.info(f"🗑️ {cache.invalidar(args.invalidar)} PDFs removidos do cache de páginas.")
+    print(json.dumps(cache.estatisticas(), indent=2, ensure_ascii=False))
+    cache.fechar()
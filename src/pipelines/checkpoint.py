@@ -0,0 +1,118 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+
+from langchain_core.documents import Document
+
+from src.utils.cache_embeddings import CacheEmbeddings
+
+# ------------------------------
+# CHECKPOINT DA INGESTÃO
+# ------------------------------
+class CheckpointIngestao:
+    """
+    Checkpoint durável de uma execução do pipeline de ingestão.
+
+    Guarda os chunks extraídos (para não repetir a extração) e os embeddings de
+    cada batch concluído, gravados em disco assim que o batch termina. Um
+    checkpoint só pode ser retomado pela mesma execução, identificada pela
+    assinatura dos parâmetros e dos PDFs a adicionar e remover.
+    """
+
+    def __init__(self, diretorio: str, assinatura: str):
+        self.diretorio = diretorio
+        self.assinatura = assinatura
+        self._estado_path = os.path.join(diretorio, "estado.json")
+        self._chunks_path = os.path.join(diretorio, "chunks.jsonl")
+        self.vetores = None
+
+    @staticmethod
+    def calcular_assinatura(parametros: dict, adicionar: dict, remover: list) -> str:
+        """Assinatura da execução: parâmetros + hashes dos PDFs a adicionar + PDFs a remover."""
+        conteudo = json.dumps(
+            {"parametros": parametros, "adicionar": adicionar, "remover": sorted(remover)},
+            sort_keys=True
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+    def existe(self) -> bool:
+        return os.path.exists(self._estado_path)
+
+    def valido(self) -> bool:
+        """Indica se há um checkpoint completo desta mesma execução para retomar."""
+        if not self.existe() or not os.path.exists(self._chunks_path):
+            return False
+        with open(self._estado_path, encoding="utf-8") as f:
+            estado = json.load(f)
+        return estado.get("assinatura") == self.assinatura and estado.get("chunks_salvos", False)
+
+    def iniciar(self):
+        """Descarta qualquer checkpoint anterior e inicia um novo."""
+        self.limpar()
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._gravar_estado({"assinatura": self.assinatura, "criado_em": datetime.now().isoformat(timespec="seconds")})
+        self._abrir_vetores()
+
+    def retomar(self):
+        """Reabre o checkpoint existente para continuar a execução."""
+        self._abrir_vetores()
+
+    def salvar_chunks(self, chunks: list, ids: list, falhas: list = None):
+        """
+        Grava os chunks extraídos (texto, metadados e ID) de forma durável, com os
+        nomes dos PDFs cuja extração falhou.
+        """
+        with open(self._chunks_path, "w", encoding="utf-8") as f:
+            for id_, chunk in zip(ids, chunks):
+                f.write(json.dumps(
+                    {"id": id_, "page_content": chunk.page_content, "metadata": chunk.metadata},
+                    ensure_ascii=False
+                ) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        with open(self._estado_path, encoding="utf-8") as f:
+            estado = json.load(f)
+        estado["chunks_salvos"] = True
+        estado["total_chunks"] = len(chunks)
+        estado["falhas"] = list(falhas or [])
+        self._gravar_estado(estado)
+
+    def carregar_chunks(self):
+        """
+        Returns:
+            tuple: (chunks, ids) na ordem em que foram salvos.
+        """
+        chunks, ids = [], []
+        with open(self._chunks_path, encoding="utf-8") as f:
+            for linha in f:
+                registro = json.loads(linha)
+                ids.append(registro["id"])
+                chunks.append(Document(page_content=registro["page_content"], metadata=registro["metadata"]))
+        return chunks, ids
+
+    def carregar_falhas(self) -> list:
+        """Nomes dos PDFs cuja extração falhou na execução do checkpoint."""
+        with open(self._estado_path, encoding="utf-8") as f:
+            return json.load(f).get("falhas", [])
+
+    def limpar(self):
+        """Remove o checkpoint do disco (ao final de uma execução bem-sucedida)."""
+        if self.vetores:
+            self.vetores.fechar()
+            self.vetores = None
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+    def _abrir_vetores(self):
+        # Os embeddings de cada batch concluído são gravados (com commit) em SQLite
+        self.vetores = CacheEmbeddings(os.path.join(self.diretorio, "vetores.sqlite"), deployment=self.assinatura)
+
+    def _gravar_estado(self, estado: dict):
+        temporario = self._estado_path + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self._estado_path)
@@ -0,0 +1,226 @@
+import os
+import re
+import math
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.utils.indice_lexical import dobrar_acentos
+
+# Assinaturas MinHash de 128 permutações, divididas em 32 bandas de 4 linhas:
+# pares com similaridade de Jaccard acima de ~0,45 viram candidatos e só os
+# que passam de LIMIAR_DUPLICATA (estimada pelas assinaturas) são colapsados
+NUM_PERMUTACOES = 128
+BANDAS = 32
+TAMANHO_SHINGLE = 5
+LIMIAR_DUPLICATA = 0.8
+SEMENTE = 42
+
+_PRIMO = np.uint64(4294967311)  # primeiro primo acima de 2^32
+_rng = np.random.default_rng(SEMENTE)
+_A = _rng.integers(1, 2**31, size=NUM_PERMUTACOES, dtype=np.uint64)
+_B = _rng.integers(0, 2**32, size=NUM_PERMUTACOES, dtype=np.uint64)
+
+# ------------------------------
+# ASSINATURAS MINHASH
+# ------------------------------
+def shingles(texto: str, tamanho: int = TAMANHO_SHINGLE) -> np.ndarray:
+    """
+    Hashes (CRC32) das sequências de `tamanho` palavras do texto, sem acentos e
+    em caixa baixa. Textos mais curtos viram um único shingle.
+    """
+    palavras = re.findall(r"\w+", dobrar_acentos(texto.lower()))
+    partes = {" ".join(palavras[i:i + tamanho]) for i in range(max(len(palavras) - tamanho + 1, 1))}
+    return np.fromiter((zlib.crc32(p.encode("utf-8")) for p in partes), dtype=np.uint64, count=len(partes))
+
+
+def assinatura(texto: str) -> np.ndarray:
+    """Assinatura MinHash do texto: o menor hash de cada permutação `(a·x + b) mod p`."""
+    hashes = shingles(texto)
+    return ((hashes[:, None] * _A + _B) % _PRIMO).min(axis=0)
+
+
+class IndiceLSH:
+    """
+    Índice LSH em memória: cada assinatura entra em um balde por banda e os
+    candidatos de uma consulta são os itens que dividem algum balde com ela.
+    """
+
+    def __init__(self, bandas: int = BANDAS, limiar: float = LIMIAR_DUPLICATA):
+        self.linhas = NUM_PERMUTACOES // bandas
+        self.bandas = bandas
+        self.limiar = limiar
+        self._baldes = {}
+        self._assinaturas = {}
+
+    def _chaves(self, grupo, sig: np.ndarray):
+        for banda in range(self.bandas):
+            yield grupo, banda, sig[banda * self.linhas:(banda + 1) * self.linhas].tobytes()
+
+    def adicionar(self, chave, sig: np.ndarray, grupo=None):
+        self._assinaturas[chave] = sig
+        for balde in self._chaves(grupo, sig):
+            self._baldes.setdefault(balde, []).append(chave)
+
+    def consultar(self, sig: np.ndarray, grupo=None):
+        """
+        Returns:
+            tuple | None: `(chave, similaridade)` do item mais parecido acima do
+                limiar, ou None.
+        """
+        candidatos = {c for balde in self._chaves(grupo, sig) for c in self._baldes.get(balde, ())}
+        melhor = None
+        for chave in candidatos:
+            similaridade = float(np.mean(self._assinaturas[chave] == sig))
+            if similaridade >= self.limiar and (melhor is None or similaridade > melhor[1]):
+                melhor = (chave, similaridade)
+        return melhor
+
+# ------------------------------
+# DEDUPLICAÇÃO DOS CHUNKS
+# ------------------------------
+@dataclass
+class Deduplicacao:
+    """
+    Resultado da deduplicação.
+
+    Attributes:
+        chunks (list): Chunks mantidos (representantes), na ordem original.
+        ids (list): IDs dos chunks mantidos.
+        representantes (dict): ID de cada chunk descartado -> ID do seu representante.
+        referencias_existentes (dict): ID de um vetor já indexado -> referências a
+            acrescentar aos seus metadados.
+        duplicados_por_arquivo (dict): PDF -> IDs de representantes de outros PDFs
+            que respondem por trechos dele.
+        descartados (list): Chunks descartados.
+    """
+    chunks: list
+    ids: list
+    representantes: dict = field(default_factory=dict)
+    referencias_existentes: dict = field(default_factory=dict)
+    duplicados_por_arquivo: dict = field(default_factory=dict)
+    descartados: list = field(default_factory=list)
+
+
+def _referencia(metadata: dict) -> dict:
+    return {"source": metadata.get("source"), "page": metadata.get("page")}
+
+
+def _acrescentar_referencia(metadata: dict, referencia: dict):
+    referencias = metadata.setdefault("referencias", [_referencia(metadata)])
+    if referencia not in referencias:
+        referencias.append(referencia)
+
+
+def deduplicar(chunks: list, ids: list, existentes=None, grupo=None, limiar: float = LIMIAR_DUPLICATA) -> Deduplicacao:
+    """
+    Colapsa chunks quase duplicados (MinHash/LSH) em um único representante.
+
+    O primeiro chunk de cada grupo de quase duplicatas (ou um vetor já
+    indexado, se houver) é mantido e passa a carregar em `metadata["referencias"]`
+    a lista de PDF e página de todas as cópias, inclusive a própria.
+
+    Args:
+        chunks (list): Chunks extraídos (Documents), na ordem da ingestão.
+        ids (list): IDs dos chunks.
+        existentes (iterable, opcional): Pares `(id, Document)` já indexados,
+            candidatos a representante dos novos chunks.
+        grupo (opcional): Função `metadata -> chave`. Só chunks com a mesma
+            chave são comparados (ex.: a partição do índice).
+        limiar (float): Similaridade de Jaccard estimada mínima.
+
+    Returns:
+        Deduplicacao: Chunks mantidos e mapeamento das duplicatas.
+    """
+    lsh = IndiceLSH(limiar=limiar)
+    grupo = grupo or (lambda metadata: None)
+
+    documentos_existentes = {}
+    for id_, doc in existentes or ():
+        documentos_existentes[id_] = doc
+        lsh.adicionar(id_, assinatura(doc.page_content), grupo(doc.metadata))
+
+    resultado = Deduplicacao(chunks=[], ids=[])
+    novos = {}
+    for chunk, id_ in zip(chunks, ids):
+        sig = assinatura(chunk.page_content)
+        chave_grupo = grupo(chunk.metadata)
+        encontrado = lsh.consultar(sig, chave_grupo)
+        if encontrado is None:
+            lsh.adicionar(id_, sig, chave_grupo)
+            novos[id_] = chunk
+            resultado.chunks.append(chunk)
+            resultado.ids.append(id_)
+            continue
+
+        representante = encontrado[0]
+        resultado.representantes[id_] = representante
+        resultado.descartados.append(chunk)
+        if representante in novos:
+            metadata_representante = novos[representante].metadata
+            _acrescentar_referencia(metadata_representante, _referencia(chunk.metadata))
+        else:
+            metadata_representante = documentos_existentes[representante].metadata
+            resultado.referencias_existentes.setdefault(representante, []).append(_referencia(chunk.metadata))
+
+        nome = os.path.basename(chunk.metadata["source"])
+        if os.path.basename(metadata_representante["source"]) != nome:
+            resultado.duplicados_por_arquivo.setdefault(nome, set()).add(representante)
+
+    resultado.duplicados_por_arquivo = {n: sorted(r) for n, r in resultado.duplicados_por_arquivo.items()}
+    return resultado
+
+
+def economia(resultado: Deduplicacao, batch_size: int, dimensao: int) -> dict:
+    """
+    Estima o que a deduplicação evitou: chamadas de embedding (em batches de
+    `batch_size`) e bytes no índice (vetores float32 e texto no docstore).
+    """
+    total = len(resultado.chunks) + len(resultado.descartados)
+    return {
+        "chunks": total,
+        "duplicados": len(resultado.descartados),
+        "chamadas_evitadas": math.ceil(total / batch_size) - math.ceil(len(resultado.chunks) / batch_size),
+        "bytes_evitados": sum(dimensao * 4 + len(c.page_content.encode("utf-8")) for c in resultado.descartados),
+    }
+
+# ------------------------------
+# REFERÊNCIAS NO ÍNDICE
+# ------------------------------
+def _substituir(vector_store, id_: str, doc):
+    vector_store.docstore.delete([id_])
+    vector_store.docstore.add({id_: doc})
+
+
+def documentos_indice(vector_store):
+    """Percorre os pares `(id, Document)` de todos os vetores do índice."""
+    for id_ in list(vector_store.index_to_docstore_id.values()):
+        yield id_, vector_store.docstore.search(id_)
+
+
+def adicionar_referencias(vector_store, referencias: dict):
+    """Acrescenta referências aos metadados de vetores já indexados (em memória, até salvar)."""
+    for id_, novas in referencias.items():
+        doc = vector_store.docstore.search(id_)
+        for referencia in novas:
+            _acrescentar_referencia(doc.metadata, referencia)
+        _substituir(vector_store, id_, doc)
+
+
+def remover_referencias(vector_store, representantes: list, nomes: list):
+    """
+    Retira dos metadados dos representantes as referências aos PDFs removidos.
+    Representantes que também saem do índice são ignorados.
+    """
+    nomes = set(nomes)
+    for id_ in representantes:
+        doc = vector_store.docstore.search(id_)
+        if isinstance(doc, str) or "referencias" not in doc.metadata:
+            continue
+        referencias = [r for r in doc.metadata["referencias"] if os.path.basename(r["source"]) not in nomes]
+        if len(referencias) > 1:
+            doc.metadata["referencias"] = referencias
+        else:
+            del doc.metadata["referencias"]
+        _substituir(vector_store, id_, doc)
@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+MANIFESTO_ARQUIVO = "manifesto.json"
+
+# ------------------------------
+# MANIFESTO DE INGESTÃO
+# ------------------------------
+def hash_arquivo(caminho: str) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def id_chunk(hash_pdf: str, indice: int) -> str:
+    """Gera o ID determinístico do i-ésimo chunk de um PDF a partir do seu hash."""
+    return f"{hash_pdf[:16]}-{indice:05d}"
+
+
+def ids_chunks(hash_pdf: str, quantidade: int) -> list:
+    """Gera os IDs determinísticos dos chunks de um PDF."""
+    return [id_chunk(hash_pdf, i) for i in range(quantidade)]
+
+
+def carregar_manifesto(vectorstore_path: str) -> dict:
+    """
+    Lê o manifesto do vetorstore.
+
+    Returns:
+        dict: {"parametros": {...}, "arquivos": {nome: {"hash", "chunk_ids", "completo", "ingerido_em"}}}
+    """
+    caminho = os.path.join(vectorstore_path, MANIFESTO_ARQUIVO)
+    if not os.path.exists(caminho):
+        return {"parametros": {}, "arquivos": {}}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_manifesto(vectorstore_path: str, manifesto: dict):
+    """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+    caminho = os.path.join(vectorstore_path, MANIFESTO_ARQUIVO)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def registrar_arquivo(
+    manifesto: dict, nome: str, hash_pdf: str, chunk_ids: list, completo: bool = True, duplicados: list = None
+):
+    """
+    Registra (ou substitui) a entrada de um PDF no manifesto.
+
+    `duplicados` lista os vetores de outros PDFs que representam trechos
+    quase duplicados deste (ver `src/pipelines/deduplicacao.py`).
+    """
+    manifesto["arquivos"][nome] = {
+        "hash": hash_pdf,
+        "chunk_ids": chunk_ids,
+        "completo": completo,
+        "ingerido_em": datetime.now().isoformat(timespec="seconds"),
+    }
+    if duplicados:
+        manifesto["arquivos"][nome]["duplicados"] = duplicados
+
+
+def planejar_atualizacao(manifesto: dict, hashes_atuais: dict, parametros: dict):
+    """
+    Compara o manifesto com os PDFs atuais e decide o que adicionar e remover.
+
+    Arquivos alterados (ou ingeridos parcialmente) aparecem nas duas listas.
+    Se os parâmetros de ingestão mudaram, todo o índice precisa ser reconstruído.
+    O mesmo vale se um PDF removido tem vetores que representam trechos
+    duplicados de PDFs que continuam no índice.
+
+    Args:
+        manifesto (dict): Manifesto carregado do vetorstore.
+        hashes_atuais (dict): Nome do PDF -> hash do conteúdo atual.
+        parametros (dict): Parâmetros de ingestão desta execução.
+
+    Returns:
+        tuple: (adicionar, remover, reconstruir) com listas de nomes de PDFs e um bool.
+    """
+    if manifesto.get("parametros") != parametros:
+        return sorted(hashes_atuais), [], True
+
+    ingeridos = manifesto["arquivos"]
+    adicionar = sorted(
+        nome for nome, hash_pdf in hashes_atuais.items()
+        if nome not in ingeridos
+        or ingeridos[nome]["hash"] != hash_pdf
+        or not ingeridos[nome].get("completo", True)
+    )
+    remover = sorted(
+        nome for nome in ingeridos
+        if nome not in hashes_atuais or nome in adicionar
+    )
+
+    ids_removidos = {i for nome in remover for i in ingeridos[nome]["chunk_ids"]}
+    if any(ids_removidos.intersection(ingeridos[n].get("duplicados", ())) for n in ingeridos if n not in remover):
+        return sorted(hashes_atuais), [], True
+    return adicionar, remover, False
@@ -1,22 +1,243 @@
 import os
 import sys
+import glob
 import time
+import math
+import shutil
 import logging
-from langchain_community.vectorstores import FAISS
+import argparse
 
 # Importando módulos
 from src.utils.azure_client import get_azure_embeddings
-from src.pipelines.processar_dados import processar_dados
+from src.utils.cache_embeddings import CacheEmbeddings
+from src.utils.executor_embeddings import ExecutorEmbeddings, ErroEmbedding
+from src.utils.indice_faiss import (
+    carregar_indice, salvar_indice, criar_vector_store, TIPOS_INDICE, TIPOS_SEM_REMOCAO,
+    INDICE_ARQUIVO, DOCSTORE_ARQUIVO
+)
+from src.utils.indice_lexical import LEXICAL_ARQUIVO
+from src.utils.indice_tabelas import TABELAS_ARQUIVO, IndiceTabelas, extrair_tabelas_pdfs
+from src.utils.particoes import (
+    CRITERIOS_PARTICAO, caminho_particao, chave_particao, data_relatorio, metadados_particao,
+    indice_particionado, carregar_mapa_particoes, salvar_mapa_particoes, remover_particoes
+)
+from src.pipelines.processar_dados import processar_dados, EXTRATORES, EXTRATOR_PADRAO
+from src.pipelines.cache_paginas import CachePaginas, CACHE_PAGINAS_PATH
+from src.pipelines.checkpoint import CheckpointIngestao
+from src.pipelines.deduplicacao import (
+    deduplicar, economia, documentos_indice, adicionar_referencias, remover_referencias
+)
+from src.pipelines.manifesto import (
+    hash_arquivo, ids_chunks, carregar_manifesto, salvar_manifesto,
+    registrar_arquivo, planejar_atualizacao
+)
+from src.utils.telemetria import METRICAS, span, anotar
+from src.utils.versoes_indice import diretorio_atual, preparar_versao, publicar_versao, coletar_versoes
 from src.utils.setup_log import setup_logging
 
 setup_logging()
 
+CACHE_EMBEDDINGS_PATH = os.path.join("cache", "embeddings.sqlite")
+
+# ------------------------------
+# EMBEDDINGS COM CACHE
+# ------------------------------
+def gerar_embeddings(
+    textos, embeddings_model, batch_size, cache=None, resumo=True,
+    concorrencia=4, taxa_requisicoes=None, ao_concluir_batch=None
+):
+    """
+    Gera os embeddings dos textos, consultando o cache antes de chamar o Azure.
+
+    Os textos ausentes do cache são enviados por um `ExecutorEmbeddings`, com vários
+    batches em voo, adaptação a respostas 429 e retentativas com backoff.
+
+    Args:
+        textos (list): Textos dos chunks.
+        embeddings_model: Cliente de embeddings (ex.: AzureOpenAIEmbeddings).
+        batch_size (int): Quantidade máxima de textos por chamada à API.
+        cache (CacheEmbeddings, opcional): Cache persistente de embeddings.
+        resumo (bool): Registra no log o resumo de uso do cache.
+        concorrencia (int): Máximo de batches em voo simultaneamente.
+        taxa_requisicoes (float, opcional): Limite de requisições por segundo.
+        ao_concluir_batch (opcional): Callback `(textos, vetores)` chamado a cada batch concluído.
+
+    Returns:
+        list: Um embedding por texto, na mesma ordem.
+
+    Raises:
+        ErroEmbedding: Se algum batch esgotar as tentativas.
+    """
+    embeddings = cache.buscar(textos) if cache else [None] * len(textos)
+
+    # Textos ausentes do cache (sem repetição), com suas posições
+    pendentes = {}
+    for i, (texto, vetor) in enumerate(zip(textos, embeddings)):
+        if vetor is None:
+            pendentes.setdefault(texto, []).append(i)
+    textos_pendentes = list(pendentes)
+
+    hits = len(textos) - sum(len(p) for p in pendentes.values())
+    if cache:
+        METRICAS.incrementar("fib_cache_total", hits, cache="embeddings", resultado="hits")
+        METRICAS.incrementar("fib_cache_total", len(textos) - hits, cache="embeddings", resultado="misses")
+        anotar(cache_hits=hits)
+
+    if resumo:
+        logging.info(
+            f"Gerando {len(textos_pendentes)} embeddings em batches de até {batch_size} chunks "
+            f"({concorrencia} em paralelo)..."
+        )
+
+    def ao_concluir(batch, batch_embeddings, segundos):
+        if cache:
+            cache.registrar_chamada(len(batch), segundos)
+            cache.salvar(batch, batch_embeddings)
+        if ao_concluir_batch:
+            ao_concluir_batch(batch, batch_embeddings)
+        if resumo:
+            logging.info(f"✅ Batch concluído ({len(batch_embeddings)} embeddings).")
+
+    executor = ExecutorEmbeddings(
+        embeddings_model.embed_documents,
+        batch_size=batch_size,
+        max_concorrencia=concorrencia,
+        taxa_requisicoes=taxa_requisicoes,
+        ao_concluir=ao_concluir
+    )
+    for texto, vetor in zip(textos_pendentes, executor.embed(textos_pendentes)):
+        for posicao in pendentes[texto]:
+            embeddings[posicao] = vetor
+
+    if resumo and (executor.estatisticas["throttles"] or executor.estatisticas["erros"]):
+        logging.info(
+            f"Embeddings: {executor.estatisticas['chamadas']} chamadas | "
+            f"{executor.estatisticas['throttles']} respostas 429 | "
+            f"{executor.estatisticas['retentativas']} retentativas."
+        )
+
+    if cache and resumo:
+        chamadas_evitadas = math.ceil(len(textos) / batch_size) - math.ceil(len(textos_pendentes) / batch_size)
+        logging.info(
+            f"Cache de embeddings: {hits}/{len(textos)} chunks encontrados | "
+            f"taxa de acerto {cache.taxa_acerto:.1%} | "
+            f"chamadas à API evitadas: {chamadas_evitadas} | "
+            f"tempo economizado estimado: {hits * cache.segundos_por_texto():.2f} segundos."
+        )
+
+    return embeddings
+
+# ------------------------------
+# ÍNDICE PARTICIONADO
+# ------------------------------
+def atualizar_particoes(
+    diretorio, criterio, embeddings_model, text_embeddings, metadatas, ids,
+    remover, manifesto, reconstruir, tipo_indice="flat"
+) -> int:
+    """
+    Aplica a ingestão a um índice particionado por relatório ou por ano.
+
+    Cada partição é um índice completo em `particoes/<chave>/` e só as
+    partições com PDFs adicionados ou removidos são regravadas. Uma partição
+    cujos PDFs foram todos removidos é apagada sem tocar nas demais.
+
+    Args:
+        diretorio (str): Diretório do índice.
+        criterio (str): `relatorio` ou `ano`.
+        remover (list): Nomes dos PDFs a remover (ainda presentes no manifesto).
+        reconstruir (bool): Descarta as partições existentes.
+
+    Returns:
+        int: Total de vetores em todas as partições.
+    """
+    if reconstruir or not indice_particionado(diretorio):
+        remover_particoes(diretorio)
+        mapa = {"criterio": criterio, "particoes": {}}
+    else:
+        mapa = carregar_mapa_particoes(diretorio)
+
+    # Novos chunks e IDs a remover, agrupados por partição
+    novos = {}
+    for par, metadata, id_ in zip(text_embeddings, metadatas, ids):
+        chave = chave_particao(metadata["source"], criterio)
+        novos.setdefault(chave, ([], [], []))
+        novos[chave][0].append(par)
+        novos[chave][1].append(metadata)
+        novos[chave][2].append(id_)
+    removidos = {}
+    for nome in remover:
+        removidos.setdefault(chave_particao(nome, criterio), []).append(nome)
+
+    for chave in sorted(set(novos) | set(removidos)):
+        caminho = caminho_particao(diretorio, chave)
+        anterior = mapa["particoes"].get(chave, {"arquivos": []})
+        mantidos = [n for n in anterior["arquivos"] if n not in removidos.get(chave, [])]
+        adicionados = sorted({os.path.basename(m["source"]) for m in novos.get(chave, ([], [], []))[1]})
+        arquivos = sorted(set(mantidos) | set(adicionados))
+
+        if not arquivos:
+            shutil.rmtree(caminho, ignore_errors=True)
+            mapa["particoes"].pop(chave, None)
+            logging.info(f"🗑️ Partição '{chave}' removida.")
+            continue
+
+        pares, metadados_chunks, ids_chunks_particao = novos.get(chave, ([], [], []))
+        if mantidos:
+            # Só atualiza a partição se algum PDF dela continua no índice
+            vector_store = carregar_indice(caminho, embeddings_model, mmap=False)
+            ids_remover = [i for nome in removidos.get(chave, []) for i in manifesto["arquivos"][nome]["chunk_ids"]]
+            if ids_remover:
+                vector_store.delete(ids_remover)
+            representantes = [r for nome in removidos.get(chave, []) for r in manifesto["arquivos"][nome].get("duplicados", [])]
+            if representantes:
+                remover_referencias(vector_store, representantes, removidos[chave])
+            if pares:
+                vector_store.add_embeddings(pares, metadatas=metadados_chunks, ids=ids_chunks_particao)
+        else:
+            vector_store = criar_vector_store(
+                pares, embeddings_model, metadatas=metadados_chunks, ids=ids_chunks_particao, tipo=tipo_indice
+            )
+
+        salvar_indice(vector_store, caminho)
+        mapa["particoes"][chave] = {**metadados_particao(chave), "arquivos": arquivos, "vetores": vector_store.index.ntotal}
+        logging.info(f"Partição '{chave}' salva ({vector_store.index.ntotal} vetores, {len(arquivos)} PDFs).")
+
+    salvar_mapa_particoes(diretorio, mapa)
+    return sum(p["vetores"] for p in mapa["particoes"].values())
+
 # ------------------------------
 # FUNÇÃO PRINCIPAL
 # ------------------------------
-def pipeline_ingestao():
+def pipeline_ingestao(
+    retomar: bool = False, tipo_indice: str = "flat", particionar: str = None, extrator: str = EXTRATOR_PADRAO
+):
     """
     Pipeline de ingestão de dados que processa PDFs, gera embeddings e armazena em FAISS.
+
+    O manifesto do índice registra hash, IDs dos chunks e parâmetros de cada PDF ingerido.
+    Em novas execuções, apenas PDFs novos são embedados e os vetores de PDFs removidos
+    ou alterados são apagados do índice existente, sem reconstruí-lo.
+
+    Antes dos embeddings, chunks quase duplicados (MinHash/LSH) são colapsados em
+    um único vetor, que guarda em `referencias` o PDF e a página de cada cópia.
+
+    O índice é gravado em uma nova versão (`faiss_index/versoes/<data-hora>`) e
+    publicado ao final pelo ponteiro `faiss_index/CURRENT`; as versões antigas
+    são apagadas, mantendo a anterior.
+
+    Durante a execução, os chunks extraídos e os embeddings de cada batch concluído
+    são gravados em um checkpoint em disco, removido ao final com sucesso.
+
+    Args:
+        retomar (bool): Continua a partir do checkpoint de uma execução interrompida,
+            sem refazer a extração nem os batches já concluídos.
+        tipo_indice (str): Tipo do índice FAISS (`flat`, `ivf`, `hnsw`, `pq`, `sq8`
+            ou `fp16`). Trocar o tipo reconstrói o índice.
+        particionar (str, opcional): Divide o índice em partições por `relatorio`
+            ou por `ano`, com a data da edição lida do nome do PDF. Ativar ou
+            trocar o critério reconstrói o índice.
+        extrator (str): Extrator de texto dos PDFs (`pdfplumber` ou `pdfium`, mais
+            rápido). Trocar o extrator reconstrói o índice.
     """
     logging.info("Iniciando o pipeline de ingestão de dados...")
     start_time = time.time()
@@ -26,47 +247,282 @@ def pipeline_ingestao():
     CHUNK_SIZE = 1000
     CHUNK_OVERLAP = 250
     BATCH_SIZE = 25
+    EMBEDDING_CONCURRENCY = 4  # batches de embedding em voo simultaneamente
+    EXTRACTION_WORKERS = 0  # processos de extração (0 = todos os núcleos)
+    EXTRAIR_TABELAS = True  # valores das tabelas para respostas diretas
+    DEDUPLICAR = True  # colapsa chunks quase duplicados (MinHash/LSH) antes dos embeddings
     VECTORSTORE_PATH = os.path.join("faiss_index")
+    CHECKPOINT_PATH = os.path.join("cache", "checkpoint_ingestao")
     os.makedirs(VECTORSTORE_PATH, exist_ok=True)
+    atual = diretorio_atual(VECTORSTORE_PATH)
+
+    # Conectar ao Azure Embeddings
+    embeddings_model = get_azure_embeddings()
+    deployment = getattr(embeddings_model, "deployment", None) or os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+
+    # Comparar PDFs atuais com o manifesto do índice existente
+    pdf_files = sorted(glob.glob(os.path.join(DATA_PATH, "*.pdf")))
+    hashes_atuais = {os.path.basename(f): hash_arquivo(f) for f in pdf_files}
+    caminhos = {os.path.basename(f): f for f in pdf_files}
+    parametros = {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "embedding_deployment": deployment,
+    }
+    if tipo_indice != "flat":
+        # Só registrado fora do padrão, para não reconstruir índices flat já existentes
+        parametros["tipo_indice"] = tipo_indice
+    if particionar:
+        parametros["particionar"] = particionar
+    if extrator != EXTRATOR_PADRAO:
+        parametros["extrator"] = extrator
+
+    indice_existe = (
+        os.path.exists(os.path.join(atual, INDICE_ARQUIVO))
+        or indice_particionado(atual)
+    )
+    manifesto = carregar_manifesto(atual) if indice_existe else {"parametros": {}, "arquivos": {}}
+    adicionar, remover, reconstruir = planejar_atualizacao(manifesto, hashes_atuais, parametros)
+
+    if not reconstruir and remover and tipo_indice in TIPOS_SEM_REMOCAO:
+        logging.info(f"Índice '{tipo_indice}' não permite remover vetores. O índice será reconstruído do zero.")
+        adicionar, reconstruir = sorted(hashes_atuais), True
+    elif reconstruir and indice_existe and manifesto.get("parametros") != parametros:
+        logging.info("Parâmetros de ingestão alterados. O índice será reconstruído do zero.")
+    elif reconstruir and indice_existe:
+        logging.info("PDFs removidos têm vetores que representam trechos de outros PDFs. O índice será reconstruído do zero.")
+
+    if reconstruir:
+        manifesto = {"parametros": parametros, "arquivos": {}}
+        remover = []
+
+    if reconstruir and not adicionar:
+        logging.error("Nenhum arquivo PDF encontrado. Encerrando...")
+        sys.exit(1)
+
+    logging.info(f"PDFs a adicionar: {len(adicionar)} | PDFs a remover: {len(remover)}")
+    if not adicionar and not remover:
+        logging.info(f"✅ Índice em '{VECTORSTORE_PATH}' já está atualizado. Nada a fazer.")
+        return
+
+    # O índice é gravado em uma nova versão, publicada ao final: processos que
+    # leem o índice nunca veem uma versão pela metade
+    destino = preparar_versao(VECTORSTORE_PATH, base=atual if indice_existe and not reconstruir else None)
+
+    checkpoint = CheckpointIngestao(
+        CHECKPOINT_PATH,
+        CheckpointIngestao.calcular_assinatura(parametros, {n: hashes_atuais[n] for n in adicionar}, remover)
+    )
 
-    chunks = processar_dados(DATA_PATH, CHUNK_SIZE, CHUNK_OVERLAP)
-    if not chunks:
+    if retomar and checkpoint.valido():
+        checkpoint.retomar()
+        chunks, ids = checkpoint.carregar_chunks()
+        falhas = checkpoint.carregar_falhas()
+        logging.info(f"♻️ Retomando a partir do checkpoint em '{CHECKPOINT_PATH}' ({len(chunks)} chunks).")
+    else:
+        if retomar:
+            logging.warning("⚠️ Nenhum checkpoint compatível com esta execução. Iniciando do zero.")
+        elif checkpoint.existe():
+            logging.warning("⚠️ Checkpoint de uma execução anterior descartado (use --resume para retomá-lo).")
+        checkpoint.iniciar()
+
+        # PDFs já extraídos em execuções anteriores saem do cache de páginas
+        cache_paginas = CachePaginas(CACHE_PAGINAS_PATH, extrator=extrator)
+        caminhos_falhas = []
+        try:
+            with span("ingestao_extracao", pdfs=len(adicionar)) as etapa:
+                chunks = processar_dados(
+                    DATA_PATH, CHUNK_SIZE, CHUNK_OVERLAP,
+                    arquivos=[caminhos[n] for n in adicionar],
+                    workers=EXTRACTION_WORKERS,
+                    cache=cache_paginas,
+                    extrator=extrator,
+                    falhas=caminhos_falhas
+                ) if adicionar else []
+                etapa.anotar(chunks=len(chunks), cache_hits=cache_paginas.hits)
+        finally:
+            cache_paginas.fechar()
+        METRICAS.incrementar("fib_ingestao_total", len(adicionar), tipo="pdfs")
+        METRICAS.incrementar("fib_ingestao_total", len(chunks), tipo="chunks")
+
+        # IDs determinísticos por PDF, usados para remover seus vetores depois
+        chunks_por_arquivo = {}
+        for chunk in chunks:
+            chunks_por_arquivo.setdefault(os.path.basename(chunk.metadata["source"]), []).append(chunk)
+            data = data_relatorio(chunk.metadata["source"]) if particionar else None
+            if data:
+                chunk.metadata["data_relatorio"] = f"{data[0]}-{data[1]:02d}"
+        chunks, ids = [], []
+        for nome in adicionar:
+            chunks.extend(chunks_por_arquivo.get(nome, []))
+            ids.extend(ids_chunks(hashes_atuais[nome], len(chunks_por_arquivo.get(nome, []))))
+
+        falhas = sorted(os.path.basename(f) for f in caminhos_falhas)
+        checkpoint.salvar_chunks(chunks, ids, falhas)
+
+    if not chunks and reconstruir:
         logging.error("Nenhum chunk foi gerado. Encerrando...")
+        checkpoint.limpar()
         sys.exit(1)
 
-    # Conectar ao Azure Embeddings
-    embeddings_model = get_azure_embeddings()
+    # Chunks quase duplicados (boxes de metodologia, avisos, introduções recorrentes)
+    # viram um único vetor com as referências de todas as cópias. Sem partições,
+    # os vetores já indexados que continuam no índice também são representantes.
+    vector_store = None
+    if indice_existe and not reconstruir and not particionar:
+        vector_store = carregar_indice(destino, embeddings_model, mmap=False)
+    ids_remover = [i for nome in remover for i in manifesto["arquivos"][nome]["chunk_ids"]]
+    deduplicacao = None
+    if DEDUPLICAR and chunks:
+        with span("ingestao_deduplicacao", chunks=len(chunks)) as etapa:
+            mantidos = set(vector_store.index_to_docstore_id.values()) - set(ids_remover) if vector_store else set()
+            deduplicacao = deduplicar(
+                chunks, ids,
+                existentes=((i, doc) for i, doc in documentos_indice(vector_store) if i in mantidos) if vector_store else None,
+                grupo=(lambda metadata: chave_particao(metadata["source"], particionar)) if particionar else None
+            )
+            chunks, ids = deduplicacao.chunks, deduplicacao.ids
+            etapa.anotar(duplicados=len(deduplicacao.descartados))
+        METRICAS.incrementar("fib_ingestao_total", len(deduplicacao.descartados), tipo="duplicados")
+        logging.info(
+            f"🧹 {len(deduplicacao.descartados)} chunks quase duplicados colapsados "
+            f"({len(chunks)} vetores a gerar, {len(deduplicacao.referencias_existentes)} já indexados reaproveitados)."
+        )
 
-    # Gerar embeddings em batch
+    # Gerar embeddings em batch. Batches já concluídos saem do checkpoint e chunks
+    # já embedados em execuções anteriores saem do cache. Batches com erro são
+    # refeitos; se esgotarem as tentativas, a execução é interrompida e pode ser
+    # retomada com --resume.
     lista_de_textos = [chunk.page_content for chunk in chunks]
-    embeddings = []
+    embeddings = checkpoint.vetores.buscar(lista_de_textos)
+    faltantes = [i for i, vetor in enumerate(embeddings) if vetor is None]
+    if len(faltantes) < len(lista_de_textos):
+        logging.info(f"♻️ {len(lista_de_textos) - len(faltantes)} embeddings recuperados do checkpoint.")
 
-    logging.info(f"Gerando embeddings em batches de {BATCH_SIZE} chunks...")
+    cache = CacheEmbeddings(CACHE_EMBEDDINGS_PATH, deployment=deployment)
+    try:
+        with span("ingestao_embeddings", chunks=len(faltantes)):
+            novos = gerar_embeddings(
+                [lista_de_textos[i] for i in faltantes], embeddings_model, BATCH_SIZE, cache,
+                concorrencia=EMBEDDING_CONCURRENCY,
+                ao_concluir_batch=checkpoint.vetores.salvar
+            )
+    except ErroEmbedding as e:
+        logging.error(f"❌ Erro ao gerar embeddings: {e}")
+        logging.info("Execute novamente com --resume para continuar a partir do último checkpoint.")
+        sys.exit(1)
+    finally:
+        cache.fechar()
+    for i, vetor in zip(faltantes, novos):
+        embeddings[i] = vetor
 
-    for i in range(0, len(lista_de_textos), BATCH_SIZE):
-        batch = lista_de_textos[i:i + BATCH_SIZE]
-        try:
-            batch_embeddings = embeddings_model.embed_documents(batch)
-            embeddings.extend(batch_embeddings)
-            logging.info(f"✅ Batch {i // BATCH_SIZE + 1} concluído ({len(batch_embeddings)} embeddings).")
-        except Exception as e:
-            logging.warning(f"⚠️ Erro no batch {i // BATCH_SIZE + 1}: {e}")
-            time.sleep(60)
-
-    # Criar índice FAISS
-    logging.info("Iniciando criação do índice FAISS...")
-
-    vector_store = FAISS.from_embeddings(
-        text_embeddings=list(zip(lista_de_textos, embeddings)),
-        embedding=embeddings_model,
-        metadatas=[chunk.metadata for chunk in chunks]
-    )
+    if deduplicacao and deduplicacao.descartados:
+        dimensao = len(embeddings[0]) if embeddings else (vector_store.index.d if vector_store else 0)
+        ganho = economia(deduplicacao, BATCH_SIZE, dimensao)
+        logging.info(
+            f"Deduplicação: {ganho['duplicados']}/{ganho['chunks']} chunks sem embedding próprio | "
+            f"chamadas à API evitadas: {ganho['chamadas_evitadas']} | "
+            f"índice menor em {ganho['bytes_evitados'] / 1e6:.2f} MB."
+        )
+
+    text_embeddings = list(zip(lista_de_textos, embeddings))
+    metadatas = [chunk.metadata for chunk in chunks]
+
+    with span("ingestao_indice", tipo=tipo_indice, vetores=len(text_embeddings)):
+        if particionar:
+            total_vetores = atualizar_particoes(
+                destino, particionar, embeddings_model, text_embeddings, metadatas, ids,
+                remover, manifesto, reconstruir, tipo_indice
+            )
+            for nome in remover:
+                del manifesto["arquivos"][nome]
+            # Arquivos de um índice sem partições deixariam de corresponder ao manifesto
+            for arquivo in (INDICE_ARQUIVO, DOCSTORE_ARQUIVO, LEXICAL_ARQUIVO):
+                if os.path.exists(os.path.join(destino, arquivo)):
+                    os.remove(os.path.join(destino, arquivo))
+        elif indice_existe and not reconstruir:
+            # Atualização incremental do índice existente
+            logging.info(f"Atualizando índice FAISS existente em '{destino}'...")
+            if ids_remover:
+                vector_store.delete(ids_remover)
+                logging.info(f"🗑️ {len(ids_remover)} vetores removidos de {len(remover)} PDFs.")
+            representantes = [r for nome in remover for r in manifesto["arquivos"][nome].get("duplicados", [])]
+            if representantes:
+                remover_referencias(vector_store, representantes, remover)
+            if deduplicacao:
+                adicionar_referencias(vector_store, deduplicacao.referencias_existentes)
+            for nome in remover:
+                del manifesto["arquivos"][nome]
+
+            if text_embeddings:
+                vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+                logging.info(f"➕ {len(text_embeddings)} vetores adicionados de {len(adicionar)} PDFs.")
+        else:
+            # Criar índice FAISS
+            logging.info(f"Iniciando criação do índice FAISS (tipo: {tipo_indice})...")
 
-    vector_store.save_local(VECTORSTORE_PATH)
+            vector_store = criar_vector_store(
+                text_embeddings,
+                embeddings_model,
+                metadatas=metadatas,
+                ids=ids,
+                tipo=tipo_indice
+            )
+
+    # Registrar PDFs ingeridos. PDFs com erro na extração ficam incompletos e
+    # voltam para a fila na próxima execução, mesmo sem mudar o conteúdo
+    ids_por_arquivo = {}
+    for id_, chunk in zip(ids, chunks):
+        ids_por_arquivo.setdefault(os.path.basename(chunk.metadata["source"]), []).append(id_)
+    for nome in adicionar:
+        registrar_arquivo(
+            manifesto, nome, hashes_atuais[nome], chunk_ids=ids_por_arquivo.get(nome, []),
+            completo=nome not in falhas,
+            duplicados=deduplicacao.duplicados_por_arquivo.get(nome) if deduplicacao else None
+        )
+    if falhas:
+        logging.warning(f"⚠️ {len(falhas)} PDFs com erro na extração serão refeitos na próxima execução: {', '.join(falhas)}.")
+
+    # Tabelas dos PDFs adicionados, para as respostas diretas (sempre com pdfplumber)
+    if EXTRAIR_TABELAS:
+        with span("ingestao_tabelas", pdfs=len(adicionar)) as etapa:
+            tabelas = extrair_tabelas_pdfs([caminhos[n] for n in adicionar], EXTRACTION_WORKERS)
+            indice_tabelas = IndiceTabelas(os.path.join(destino, TABELAS_ARQUIVO), somente_leitura=False)
+            indice_tabelas.atualizar(tabelas, remover, reconstruir)
+            novos = sum(len(v) for v in tabelas.values())
+            etapa.anotar(valores=novos)
+            logging.info(f"Índice de tabelas: {indice_tabelas.total} valores ({novos} novos).")
+            indice_tabelas.fechar()
+
+    with span("ingestao_salvar"):
+        if not particionar:
+            salvar_indice(vector_store, destino)
+            remover_particoes(destino)
+            total_vetores = vector_store.index.ntotal
+        salvar_manifesto(destino, manifesto)
+    versao = publicar_versao(VECTORSTORE_PATH, destino)
+    coletar_versoes(VECTORSTORE_PATH)
+    checkpoint.limpar()
     elapsed = time.time() - start_time
 
-    logging.info(f"Vetorstore criado e salvo em '{VECTORSTORE_PATH}'.")
+    logging.info(f"Vetorstore salvo em '{diretorio_atual(VECTORSTORE_PATH)}' ({total_vetores} vetores, versão {versao}).")
     logging.info(f"✅ Pipeline de ingestão concluído com sucesso em {elapsed:.2f} segundos.")
 
 if __name__ == "__main__":
-    pipeline_ingestao()
+    parser = argparse.ArgumentParser(description="Pipeline de ingestão dos relatórios RPM.")
+    parser.add_argument("--resume", action="store_true", help="Retoma a última execução interrompida a partir do checkpoint.")
+    parser.add_argument("--tipo-indice", choices=list(TIPOS_INDICE), default="flat", help="Tipo do índice FAISS.")
+    parser.add_argument("--particionar", choices=CRITERIOS_PARTICAO, help="Divide o índice em partições por relatório ou por ano.")
+    parser.add_argument("--extrator", choices=list(EXTRATORES), default=EXTRATOR_PADRAO, help="Extrator de texto dos PDFs.")
+    parser.add_argument("--metricas", metavar="ARQUIVO", help="Grava as métricas das etapas (formato Prometheus) ao final.")
+    args = parser.parse_args()
+
+    try:
+        pipeline_ingestao(
+            retomar=args.resume, tipo_indice=args.tipo_indice, particionar=args.particionar, extrator=args.extrator
+        )
+    finally:
+        if args.metricas:
+            with open(args.metricas, "w", encoding="utf-8") as f:
+                f.write(METRICAS.exportar())
+            logging.info(f"Métricas da ingestão gravadas em '{args.metricas}'.")
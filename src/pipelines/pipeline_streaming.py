@@ -0,0 +1,283 @@
+import os
+import sys
+import glob
+import time
+import queue
+import shutil
+import logging
+import threading
+
+from dataclasses import dataclass
+
+# Importando módulos
+from src.utils.azure_client import get_azure_embeddings
+from src.utils.cache_embeddings import CacheEmbeddings
+from src.utils.indice_faiss import GravadorIndice, carregar_indice
+from src.utils.indice_tabelas import TABELAS_ARQUIVO, IndiceTabelas, extrair_tabelas_pdfs
+from src.utils.versoes_indice import preparar_versao, publicar_versao, coletar_versoes, diretorio_atual
+from src.pipelines.pipeline_ingestao import gerar_embeddings, CACHE_EMBEDDINGS_PATH
+from src.pipelines.processar_dados import _iterar_paginas, criar_text_splitter, TAMANHO_MINIMO_PAGINA, EXTRATOR_PADRAO
+from src.pipelines.cache_paginas import CachePaginas, CACHE_PAGINAS_PATH
+from src.pipelines.manifesto import hash_arquivo, id_chunk, registrar_arquivo, salvar_manifesto
+from src.utils.setup_log import setup_logging
+
+setup_logging()
+
+_FIM = object()
+
+
+@dataclass
+class _FimPdf:
+    """Marcador que segue os chunks de um PDF pelos estágios: o PDF terminou (com ou sem erro)."""
+    nome: str
+    hash_pdf: str
+    ok: bool
+
+# ------------------------------
+# ESTÁGIOS DO PIPELINE
+# ------------------------------
+def _em_thread(iteravel, tamanho_fila: int, nome: str):
+    """
+    Consome um iterável em uma thread própria, entregando os itens por uma fila limitada.
+
+    A fila limitada aplica contrapressão: se o estágio seguinte estiver lento,
+    o estágio anterior bloqueia em vez de acumular itens na memória. Exceções
+    do estágio são repassadas para quem consome a fila.
+    """
+    fila = queue.Queue(maxsize=tamanho_fila)
+    erros = []
+
+    def produzir():
+        try:
+            for item in iteravel:
+                fila.put(item)
+        except BaseException as e:
+            erros.append(e)
+        finally:
+            fila.put(_FIM)
+
+    threading.Thread(target=produzir, name=nome, daemon=True).start()
+
+    while True:
+        item = fila.get()
+        if item is _FIM:
+            break
+        yield item
+
+    if erros:
+        raise erros[0]
+
+
+def _gerar_paginas(pdf_files: list, arquivos_lidos: dict, cache_paginas=None, extrator: str = EXTRATOR_PADRAO):
+    """
+    Estágio 1: extrai as páginas dos PDFs, uma a uma, descartando as muito curtas.
+
+    Com `cache_paginas`, PDFs já extraídos são lidos do cache e os demais são
+    gravados nele depois de extraídos por completo. Depois das páginas de cada
+    PDF vem um `_FimPdf`, que indica se a extração chegou ao fim sem erro.
+    """
+    for file_path in pdf_files:
+        file_name = os.path.basename(file_path)
+        logging.info(f"⏳ Processando arquivo: {file_name}")
+        hash_pdf = None
+        try:
+            hash_pdf = hash_arquivo(file_path)
+            if cache_paginas is not None and cache_paginas.contem(file_path):
+                paginas, extraidas = cache_paginas.buscar(file_path), None
+            else:
+                paginas, extraidas = _iterar_paginas(file_path, extrator=extrator), []
+            for pagina in paginas:
+                if extraidas is not None:
+                    extraidas.append(pagina)
+                if len(pagina.page_content) > TAMANHO_MINIMO_PAGINA:
+                    yield hash_pdf, pagina
+            if cache_paginas is not None and extraidas is not None:
+                cache_paginas.salvar(file_path, extraidas)
+            arquivos_lidos[file_name] = hash_pdf
+            yield _FimPdf(file_name, hash_pdf, True)
+        except Exception as e:
+            logging.error(f"Erro ao processar {file_name}: {e}")
+            yield _FimPdf(file_name, hash_pdf, False)
+
+
+def _dividir_paginas(paginas, text_splitter):
+    """Estágio 2: divide cada página em chunks e atribui IDs determinísticos por PDF."""
+    contadores = {}
+    for item in paginas:
+        if isinstance(item, _FimPdf):
+            yield item
+            continue
+        hash_pdf, pagina = item
+        for chunk in text_splitter.split_documents([pagina]):
+            indice = contadores.get(hash_pdf, 0)
+            contadores[hash_pdf] = indice + 1
+            yield id_chunk(hash_pdf, indice), chunk
+
+
+def _embedar_lotes(chunks, embeddings_model, batch_size: int, concorrencia: int, cache):
+    """
+    Estágio 3: agrupa os chunks em lotes e gera seus embeddings.
+
+    Cada lote tem `batch_size * concorrencia` chunks, para que o executor de
+    embeddings mantenha `concorrencia` batches em voo. Os marcadores `_FimPdf`
+    seguem no lote, na mesma ordem, com vetor None.
+    """
+    lote = []
+    numero = 0
+    tamanho = 0
+
+    def processar(lote):
+        textos = [item[1].page_content for item in lote if not isinstance(item, _FimPdf)]
+        vetores = iter(gerar_embeddings(textos, embeddings_model, batch_size, cache, resumo=False, concorrencia=concorrencia))
+        logging.info(f"✅ Lote {numero} concluído ({len(textos)} chunks).")
+        return [(item, None if isinstance(item, _FimPdf) else next(vetores)) for item in lote]
+
+    for item in chunks:
+        lote.append(item)
+        tamanho += not isinstance(item, _FimPdf)
+        if tamanho == batch_size * concorrencia:
+            numero += 1
+            yield processar(lote)
+            lote, tamanho = [], 0
+    if lote:
+        numero += 1
+        yield processar(lote)
+
+# ------------------------------
+# FUNÇÃO PRINCIPAL
+# ------------------------------
+def pipeline_ingestao_streaming(
+    data_path: str = "./dados_rpm/",
+    vectorstore_path: str = "faiss_index",
+    chunk_size: int = 1000,
+    chunk_overlap: int = 250,
+    batch_size: int = 25,
+    concorrencia: int = 4,
+    tamanho_fila: int = 8,
+    embeddings_model=None,
+    extrator: str = EXTRATOR_PADRAO,
+    extrair_tabelas: bool = True
+):
+    """
+    Pipeline de ingestão em streaming: extração, divisão, embedding e escrita no índice
+    rodam em estágios sobrepostos, ligados por filas limitadas.
+
+    O embedding do primeiro PDF começa enquanto os seguintes ainda estão sendo lidos,
+    e nenhuma lista com todos os chunks do corpus é mantida em memória: o texto
+    de cada PDF concluído vai direto para o docstore SQLite (`GravadorIndice`) e
+    só os vetores ficam no índice em memória. Os chunks de um PDF que falha no
+    meio da extração são descartados, e o PDF fica incompleto no manifesto. O
+    índice é reconstruído do zero e publicado ao final como uma nova versão,
+    com o manifesto e o índice de tabelas, como na ingestão completa.
+
+    O índice é sempre `flat`, sem partições, deduplicação nem checkpoint: para
+    esses recursos, use `pipeline_ingestao`.
+
+    Args:
+        data_path (str): Caminho para o diretório contendo os PDFs.
+        vectorstore_path (str): Diretório raiz do índice FAISS (com as versões e o ponteiro `CURRENT`).
+        chunk_size (int): Tamanho máximo de cada chunk.
+        chunk_overlap (int): Número de caracteres sobrepostos entre os chunks.
+        batch_size (int): Quantidade de chunks por chamada à API de embeddings.
+        concorrencia (int): Batches de embedding em voo simultaneamente.
+        tamanho_fila (int): Capacidade de cada fila entre estágios.
+        embeddings_model (opcional): Cliente de embeddings; por padrão, o do Azure.
+        extrator (str): Extrator de texto dos PDFs (`pdfplumber` ou `pdfium`).
+        extrair_tabelas (bool): Extrai os valores das tabelas para as respostas diretas.
+
+    Returns:
+        FAISS | None: O vetorstore publicado, ou None se nenhum chunk foi gerado.
+    """
+    logging.info("Iniciando o pipeline de ingestão em streaming...")
+    start_time = time.time()
+
+    pdf_files = sorted(glob.glob(os.path.join(data_path, "*.pdf")))
+    if not pdf_files:
+        logging.warning("Nenhum arquivo PDF encontrado. Encerrando o processamento...")
+        return None
+
+    os.makedirs(vectorstore_path, exist_ok=True)
+    embeddings_model = embeddings_model or get_azure_embeddings()
+    deployment = getattr(embeddings_model, "deployment", None) or os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+    cache = CacheEmbeddings(CACHE_EMBEDDINGS_PATH, deployment=deployment)
+    cache_paginas = CachePaginas(CACHE_PAGINAS_PATH, extrator=extrator)
+
+    # Encadeando os estágios: páginas -> chunks -> batches de embeddings
+    arquivos_lidos = {}
+    paginas = _em_thread(_gerar_paginas(pdf_files, arquivos_lidos, cache_paginas, extrator), tamanho_fila, "extracao")
+    chunks = _em_thread(_dividir_paginas(paginas, criar_text_splitter(chunk_size, chunk_overlap)), tamanho_fila * batch_size, "divisao")
+    lotes = _em_thread(_embedar_lotes(chunks, embeddings_model, batch_size, concorrencia, cache), 2, "embedding")
+
+    # Estágio 4 (thread principal): escrita incremental no índice. Os chunks do
+    # PDF em andamento só são gravados quando sua extração termina sem erro
+    destino = preparar_versao(vectorstore_path)
+    gravador = GravadorIndice(destino)
+    pendentes = []
+    ids_por_arquivo = {}
+    falhas = {}
+
+    for lote in lotes:
+        for item, vetor in lote:
+            if not isinstance(item, _FimPdf):
+                pendentes.append((item, vetor))
+                continue
+            if not item.ok:
+                falhas[item.nome] = item.hash_pdf
+                if pendentes:
+                    logging.warning(f"⚠️ {len(pendentes)} chunks de {item.nome} descartados após o erro na extração.")
+            elif pendentes:
+                gravador.adicionar(
+                    [id_ for (id_, _), _ in pendentes], [chunk for (_, chunk), _ in pendentes], [v for _, v in pendentes]
+                )
+                ids_por_arquivo[item.nome] = [id_ for (id_, _), _ in pendentes]
+            pendentes = []
+
+    cache.fechar()
+    cache_paginas.fechar()
+
+    if gravador.total == 0:
+        logging.error("Nenhum chunk foi gerado. Encerrando...")
+        gravador.descartar()
+        shutil.rmtree(destino, ignore_errors=True)
+        return None
+    total_chunks = gravador.concluir()
+
+    manifesto = {
+        "parametros": {
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "embedding_deployment": deployment,
+        },
+        "arquivos": {},
+    }
+    if extrator != EXTRATOR_PADRAO:
+        manifesto["parametros"]["extrator"] = extrator
+    for nome, hash_pdf in sorted(arquivos_lidos.items()):
+        registrar_arquivo(manifesto, nome, hash_pdf, ids_por_arquivo.get(nome, []))
+    for nome, hash_pdf in sorted(falhas.items()):
+        if hash_pdf is not None:
+            registrar_arquivo(manifesto, nome, hash_pdf, [], completo=False)
+
+    if extrair_tabelas:
+        lidos = [f for f in pdf_files if os.path.basename(f) in arquivos_lidos]
+        indice_tabelas = IndiceTabelas(os.path.join(destino, TABELAS_ARQUIVO), somente_leitura=False)
+        indice_tabelas.atualizar(extrair_tabelas_pdfs(lidos, 1), [], True)
+        indice_tabelas.fechar()
+
+    salvar_manifesto(destino, manifesto)
+    publicar_versao(vectorstore_path, destino)
+    coletar_versoes(vectorstore_path)
+    elapsed = time.time() - start_time
+
+    logging.info(
+        f"Total de PDFs: {len(arquivos_lidos)} | Chunks indexados: {total_chunks} | "
+        f"Cache de embeddings: {cache.taxa_acerto:.1%}"
+    )
+    if falhas:
+        logging.warning(f"⚠️ {len(falhas)} PDFs com erro na extração ficaram fora do índice: {', '.join(sorted(falhas))}.")
+    logging.info(f"✅ Pipeline de ingestão em streaming concluído em {elapsed:.2f} segundos.")
+    return carregar_indice(diretorio_atual(vectorstore_path), embeddings_model)
+
+if __name__ == "__main__":
+    if pipeline_ingestao_streaming() is None:
+        sys.exit(1)
@@ -3,21 +3,219 @@ import glob
 import time
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from langchain_community.document_loaders import PDFPlumberLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.utils.telemetria import METRICAS
 from src.utils.setup_log import setup_logging
 
 setup_logging()
 
+# Páginas por tarefa no modo paralelo: PDFs grandes são divididos em intervalos
+PAGINAS_POR_TAREFA = 16
+
+# Páginas com menos caracteres que isso são descartadas (capas, páginas em branco)
+TAMANHO_MINIMO_PAGINA = 100
+
+# ------------------------------
+# EXTRAÇÃO DE PÁGINAS
+# ------------------------------
+def _documento(file_path: str, pagina: int, total_paginas: int, texto: str, metadados_pdf: dict) -> Document:
+    """Documento de uma página, com os mesmos metadados do `PDFPlumberLoader`."""
+    return Document(
+        page_content=texto + "\n",
+        metadata=dict(
+            {
+                "source": file_path,
+                "file_path": file_path,
+                "page": pagina,
+                "total_pages": total_paginas,
+            },
+            **metadados_pdf
+        )
+    )
+
+
+def _paginas_pdfplumber(file_path: str, inicio: int = 0, fim: int = None):
+    """Extrator pdfplumber (pdfminer): mais lento, preserva melhor tabelas e colunas."""
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        total_paginas = len(pdf.pages)
+        metadados_pdf = {
+            k: v for k, v in pdf.metadata.items()
+            if type(v) in [str, int]
+        }
+        for page in pdf.pages[inicio:fim]:
+            yield _documento(file_path, page.page_number - 1, total_paginas, page.extract_text(), metadados_pdf)
+            page.close()
+
+
+def _paginas_pdfium(file_path: str, inicio: int = 0, fim: int = None):
+    """Extrator pdfium (pypdfium2, já instalado com o pdfplumber): extração nativa, muito mais rápida."""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        total_paginas = len(pdf)
+        metadados_pdf = pdf.get_metadata_dict(skip_empty=True)
+        for numero in range(inicio, min(fim if fim is not None else total_paginas, total_paginas)):
+            page = pdf[numero]
+            textpage = page.get_textpage()
+            # Normaliza quebras de linha (CRLF) e espaços ao fim das linhas como no pdfplumber
+            linhas = textpage.get_text_bounded().replace("\r\n", "\n").replace("\r", "\n").split("\n")
+            yield _documento(file_path, numero, total_paginas, "\n".join(l.rstrip() for l in linhas), metadados_pdf)
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+# Extratores disponíveis: nome -> gerador de páginas (file_path, inicio, fim)
+EXTRATORES = {
+    "pdfplumber": _paginas_pdfplumber,
+    "pdfium": _paginas_pdfium,
+}
+EXTRATOR_PADRAO = "pdfplumber"
+
+
+def _extrator(nome: str):
+    if nome not in EXTRATORES:
+        raise ValueError(f"Extrator de PDF desconhecido: '{nome}'. Opções: {', '.join(EXTRATORES)}.")
+    return EXTRATORES[nome]
+
+
+def _contar_paginas(file_path: str, extrator: str = EXTRATOR_PADRAO) -> int:
+    """Retorna o número de páginas de um PDF."""
+    if extrator == "pdfium":
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _iterar_paginas(file_path: str, inicio: int = 0, fim: int = None, extrator: str = EXTRATOR_PADRAO):
+    """
+    Gera, uma a uma, as páginas [inicio, fim) de um PDF extraídas com o extrator escolhido.
+
+    Com o pdfplumber, produz os mesmos documentos (conteúdo e metadados) que o
+    `PDFPlumberLoader`, mas libera cada página assim que ela é extraída.
+    """
+    return _extrator(extrator)(file_path, inicio, fim)
+
+
+def _extrair_intervalo(file_path: str, inicio: int, fim: int, extrator: str = EXTRATOR_PADRAO) -> list:
+    """Extrai as páginas [inicio, fim) de um PDF (tarefa do modo paralelo)."""
+    return list(_iterar_paginas(file_path, inicio, fim, extrator))
+
+
+def _extrair_serial(pdf_files: list, extrator: str = EXTRATOR_PADRAO):
+    """Extrai os PDFs um a um, gerando (file_path, docs) ou (file_path, exceção)."""
+    for file_path in pdf_files:
+        try:
+            yield file_path, list(_iterar_paginas(file_path, extrator=extrator))
+        except Exception as e:
+            yield file_path, e
+
+
+def _extrair_paralelo(pdf_files: list, workers: int, extrator: str = EXTRATOR_PADRAO):
+    """
+    Extrai os PDFs em um pool de processos, dividindo PDFs grandes em intervalos de páginas.
+
+    Os resultados são entregues na ordem dos arquivos e das páginas, independentemente
+    da ordem em que os processos terminam.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        contagens = [executor.submit(_contar_paginas, f, extrator) for f in pdf_files]
+
+        tarefas = []
+        for file_path, contagem in zip(pdf_files, contagens):
+            try:
+                total = contagem.result()
+            except Exception as e:
+                tarefas.append((file_path, e))
+                continue
+            intervalos = [
+                executor.submit(_extrair_intervalo, file_path, inicio, min(inicio + PAGINAS_POR_TAREFA, total), extrator)
+                for inicio in range(0, total, PAGINAS_POR_TAREFA)
+            ]
+            tarefas.append((file_path, intervalos))
+
+        for file_path, intervalos in tarefas:
+            if isinstance(intervalos, Exception):
+                yield file_path, intervalos
+                continue
+            try:
+                yield file_path, [doc for futuro in intervalos for doc in futuro.result()]
+            except Exception as e:
+                yield file_path, e
+
+
+def _com_cache(pdf_files: list, cache, workers: int, extrator: str = EXTRATOR_PADRAO):
+    """
+    Entrega (file_path, docs) na ordem dos arquivos, lendo do cache de páginas os
+    PDFs já extraídos e extraindo apenas os demais, que são gravados no cache.
+    """
+    def no_cache(file_path: str) -> bool:
+        try:
+            return cache.contem(file_path)
+        except OSError:
+            return False  # arquivo ilegível: o erro é registrado pela extração
+
+    em_cache = {f for f in pdf_files if no_cache(f)}
+    pendentes = [f for f in pdf_files if f not in em_cache]
+    METRICAS.incrementar("fib_cache_total", len(em_cache), cache="paginas", resultado="hits")
+    METRICAS.incrementar("fib_cache_total", len(pendentes), cache="paginas", resultado="misses")
+    if em_cache:
+        logging.info(f"♻️ Cache de páginas: {len(em_cache)}/{len(pdf_files)} PDFs já extraídos.")
+
+    if workers > 1 and pendentes:
+        logging.info(f"Extraindo PDFs em paralelo com {workers} processos...")
+        extracao = _extrair_paralelo(pendentes, workers, extrator)
+    else:
+        extracao = _extrair_serial(pendentes, extrator)
+
+    for file_path in pdf_files:
+        if file_path in em_cache:
+            yield file_path, cache.buscar(file_path)
+            continue
+        file_path, docs = next(extracao)
+        if not isinstance(docs, Exception):
+            cache.salvar(file_path, docs)
+        yield file_path, docs
+
+
+def criar_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Cria o divisor de texto usado na fragmentação dos PDFs."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+
 # ------------------------------
 # FUNÇÃO PRINCIPAL
 # ------------------------------
 def processar_dados(
     data_path: str = "./dados_rpm/",
     chunk_size: int = 1500,
-    chunk_overlap: int = 200
+    chunk_overlap: int = 200,
+    arquivos: list = None,
+    workers: int = 1,
+    cache=None,
+    extrator: str = EXTRATOR_PADRAO,
+    falhas: list = None
 ):
     """
     Carrega todos os PDFs do diretório especificado, divide os textos em chunks e retorna uma lista de documentos processados.
@@ -26,39 +224,55 @@ def processar_dados(
         data_path (str): Caminho para o diretório contendo os PDFs.
         chunk_size (int): Tamanho máximo de cada chunk.
         chunk_overlap (int): Número de caracteres sobrepostos entre os chunks.
+        arquivos (list, opcional): Caminhos dos PDFs a processar. Se omitido, processa todos os PDFs de `data_path`.
+        workers (int): Processos usados na extração. 1 extrai em série; 0 usa todos os núcleos.
+        cache (CachePaginas, opcional): Cache das páginas extraídas. PDFs já extraídos
+            (mesmo conteúdo e versão do extrator) vão direto para a divisão em chunks.
+        extrator (str): Extrator de texto (`pdfplumber` ou `pdfium`). O cache deve
+            ter sido criado para o mesmo extrator.
+        falhas (list, opcional): Recebe os caminhos dos PDFs cuja extração falhou,
+            que não geram chunks.
 
     Returns:
         list: Lista contendo os chunks processados.
     """
     logging.info("Processamento dos dados...")
-    pdf_pattern = os.path.join(data_path, "*.pdf")
-    logging.info(f"Procurando arquivos PDF em: {pdf_pattern}")
-    pdf_files = glob.glob(pdf_pattern)
+    if arquivos is None:
+        pdf_pattern = os.path.join(data_path, "*.pdf")
+        logging.info(f"Procurando arquivos PDF em: {pdf_pattern}")
+        pdf_files = sorted(glob.glob(pdf_pattern))
+    else:
+        pdf_files = list(arquivos)
 
     if not pdf_files:
         logging.warning("Nenhum arquivo PDF encontrado. Encerrando o processamento...")
         return []
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", " ", ""]
-    )
+    text_splitter = criar_text_splitter(chunk_size, chunk_overlap)
+
+    _extrator(extrator)
+    workers = workers or os.cpu_count()
+    if cache is not None:
+        extracao = _com_cache(pdf_files, cache, workers, extrator)
+    elif workers > 1:
+        logging.info(f"Extraindo PDFs em paralelo com {workers} processos...")
+        extracao = _extrair_paralelo(pdf_files, workers, extrator)
+    else:
+        extracao = _extrair_serial(pdf_files, extrator)
 
     all_chunks = []
     total_paginas = 0
 
-    for file_path in pdf_files:
+    for file_path, docs in extracao:
         file_name = os.path.basename(file_path)
         logging.info(f"⏳ Processando arquivo: {file_name}")
 
         try:
-            loader = PDFPlumberLoader(file_path)
-            docs = loader.load()
+            if isinstance(docs, Exception):
+                raise docs
 
             # Remove páginas muito curtas
-            docs_filtrados = [d for d in docs if len(d.page_content) > 100]
+            docs_filtrados = [d for d in docs if len(d.page_content) > TAMANHO_MINIMO_PAGINA]
             total_paginas += len(docs_filtrados)
 
             chunks = text_splitter.split_documents(docs_filtrados)
@@ -68,6 +282,8 @@ def processar_dados(
 
         except Exception as e:
             logging.error(f"Erro ao processar {file_name}: {e}")
+            if falhas is not None:
+                falhas.append(file_path)
 
     logging.info(f"Total de PDFs: {len(pdf_files)} | Páginas: {total_paginas} | Chunks: {len(all_chunks)}")
     return all_chunks
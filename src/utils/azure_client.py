@@ -1,26 +1,247 @@
 import os
-from dotenv import load_dotenv
-from langchain_openai import AzureOpenAIEmbeddings
-from langchain_openai import AzureChatOpenAI
+import asyncio
+import weakref
+import threading
 
-load_dotenv()
+from src.utils.telemetria import METRICAS
+from src.utils.setup_log import carregar_env
 
+# Fábricas que substituem os clientes Azure (ex.: modelos falsos dos benchmarks offline)
+_SUBSTITUTOS = {}
+
+def registrar_clientes(embeddings=None, slm=None):
+    """
+    Substitui os clientes retornados por `get_azure_embeddings` e `get_azure_slm`.
+
+    Permite rodar pipeline, agente e API sem o Azure, com modelos determinísticos
+    (veja `benchmarks/falsos.py`). Chamar sem argumentos restaura os clientes Azure.
+
+    Args:
+        embeddings (callable, opcional): Fábrica sem argumentos do modelo de embeddings.
+        slm (callable, opcional): Fábrica sem argumentos do modelo de chat.
+    """
+    _SUBSTITUTOS.clear()
+    if embeddings is not None:
+        _SUBSTITUTOS["embeddings"] = embeddings
+    if slm is not None:
+        _SUBSTITUTOS["slm"] = slm
+
+# ------------------------------
+# CONEXÕES HTTP COMPARTILHADAS
+# ------------------------------
+# Um cliente httpx síncrono e um assíncrono por processo, usados por todos os
+# clientes Azure: as conexões (e os handshakes TLS) são reaproveitadas entre
+# ingestão, agente e API em vez de um pool por objeto criado
+_CLIENTES_HTTP = {}
+_TRAVA_HTTP = threading.Lock()
+_CONFIG_HTTP = {}
+
+
+def configuracao_http() -> dict:
+    """
+    Tamanhos do pool e timeouts das conexões com o Azure: valores de
+    `configurar_http` ou, na falta deles, das variáveis de ambiente `AZURE_HTTP_*`.
+    """
+    carregar_env()
+    padrao = {
+        "max_conexoes": int(os.getenv("AZURE_HTTP_MAX_CONEXOES", "64")),
+        "conexoes_ociosas": int(os.getenv("AZURE_HTTP_CONEXOES_OCIOSAS", "10")),
+        "ociosidade_segundos": float(os.getenv("AZURE_HTTP_OCIOSIDADE_SEGUNDOS", "30")),
+        "timeout_segundos": float(os.getenv("AZURE_HTTP_TIMEOUT_SEGUNDOS", "60")),
+        "timeout_conexao_segundos": float(os.getenv("AZURE_HTTP_TIMEOUT_CONEXAO_SEGUNDOS", "5")),
+    }
+    return {**padrao, **_CONFIG_HTTP}
+
+
+def configurar_http(**config):
+    """
+    Ajusta pools e timeouts (chaves de `configuracao_http`). Chame no início do
+    processo, antes de criar os clientes Azure: os clientes HTTP compartilhados
+    até então são fechados, e os próximos usam os novos valores.
+    """
+    desconhecidas = set(config) - set(configuracao_http())
+    if desconhecidas:
+        raise ValueError(f"Opções HTTP desconhecidas: {sorted(desconhecidas)}")
+    with _TRAVA_HTTP:
+        _CONFIG_HTTP.update({k: v for k, v in config.items() if v is not None})
+        anteriores = dict(_CLIENTES_HTTP)
+        _CLIENTES_HTTP.clear()
+    _fechar(anteriores)
+
+
+def garantir_conexoes(minimo: int):
+    """
+    Aumenta o pool (e as conexões mantidas ociosas) para ao menos `minimo`
+    conexões, sem reduzir limites maiores. Usado pela API e pelo lote, que
+    mantêm até `max_llm` chamadas ao SLM em voo.
+    """
+    config = configuracao_http()
+    if config["max_conexoes"] < minimo or config["conexoes_ociosas"] < minimo:
+        configurar_http(
+            max_conexoes=max(config["max_conexoes"], minimo),
+            conexoes_ociosas=max(config["conexoes_ociosas"], minimo)
+        )
+
+
+def _parametros_http() -> dict:
+    import httpx
+
+    config = configuracao_http()
+    return {
+        "limits": httpx.Limits(
+            max_connections=config["max_conexoes"],
+            max_keepalive_connections=config["conexoes_ociosas"],
+            keepalive_expiry=config["ociosidade_segundos"],
+        ),
+        "timeout": httpx.Timeout(config["timeout_segundos"], connect=config["timeout_conexao_segundos"]),
+    }
+
+
+def _timeout_http():
+    return _parametros_http()["timeout"]
+
+
+def _ganchos(tipo: str, assincrono: bool = False) -> dict:
+    """
+    Ganchos do httpx que contam requisições e conexões abertas
+    (`fib_http_requisicoes_total` e `fib_http_conexoes_total`). A diferença
+    entre as duas é o número de requisições que reaproveitaram uma conexão.
+    """
+    def contar_conexao(evento, info):
+        if evento == "connection.connect_tcp.complete":
+            METRICAS.incrementar("fib_http_conexoes_total", cliente=tipo)
+
+    def contar_resposta(response):
+        METRICAS.incrementar("fib_http_requisicoes_total", cliente=tipo)
+
+    if not assincrono:
+        def rastrear(request):
+            request.extensions["trace"] = contar_conexao
+
+        return {"request": [rastrear], "response": [contar_resposta]}
+
+    async def contar_conexao_async(evento, info):
+        contar_conexao(evento, info)
+
+    async def rastrear_async(request):
+        request.extensions["trace"] = contar_conexao_async
+
+    async def contar_resposta_async(response):
+        contar_resposta(response)
+
+    return {"request": [rastrear_async], "response": [contar_resposta_async]}
+
+
+def _transporte_por_loop(**parametros):
+    """Transporte assíncrono com um pool por event loop: conexões assíncronas não atravessam loops."""
+    import httpx
+
+    class TransportePorLoop(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self._pools = weakref.WeakKeyDictionary()
+
+        async def handle_async_request(self, request):
+            loop = asyncio.get_running_loop()
+            if loop not in self._pools:
+                self._pools[loop] = httpx.AsyncHTTPTransport(**parametros)
+            return await self._pools[loop].handle_async_request(request)
+
+        async def aclose(self):
+            pool = self._pools.pop(asyncio.get_running_loop(), None)
+            if pool is not None:
+                await pool.aclose()
+
+        def fechar(self):
+            """
+            Fecha os pools de fora dos event loops: o fechamento é agendado em cada
+            loop ainda aberto; os pools de loops encerrados são só descartados.
+            """
+            pools = list(self._pools.items())
+            self._pools.clear()
+            for loop, pool in pools:
+                if not loop.is_closed():
+                    asyncio.run_coroutine_threadsafe(pool.aclose(), loop)
+
+    return TransportePorLoop()
+
+
+def cliente_http():
+    """Cliente httpx síncrono compartilhado pelo processo (pool com keep-alive)."""
+    with _TRAVA_HTTP:
+        if "sync" not in _CLIENTES_HTTP:
+            import httpx
+
+            _CLIENTES_HTTP["sync"] = httpx.Client(**_parametros_http(), event_hooks=_ganchos("sync"))
+        return _CLIENTES_HTTP["sync"]
+
+
+def cliente_http_async():
+    """Cliente httpx assíncrono compartilhado pelo processo, com um pool por event loop."""
+    with _TRAVA_HTTP:
+        if "async" not in _CLIENTES_HTTP:
+            import httpx
+
+            parametros = _parametros_http()
+            _CLIENTES_HTTP["transporte_async"] = _transporte_por_loop(limits=parametros["limits"])
+            _CLIENTES_HTTP["async"] = httpx.AsyncClient(
+                transport=_CLIENTES_HTTP["transporte_async"],
+                timeout=parametros["timeout"],
+                event_hooks=_ganchos("async", assincrono=True)
+            )
+        return _CLIENTES_HTTP["async"]
+
+
+def _fechar(clientes: dict):
+    """Fecha o cliente síncrono e os pools do assíncrono de um conjunto descartado."""
+    if "sync" in clientes:
+        clientes["sync"].close()
+    if "transporte_async" in clientes:
+        clientes["transporte_async"].fechar()
+
+
+def fechar_clientes_http():
+    """Fecha os clientes compartilhados; os próximos pedidos criam novos."""
+    with _TRAVA_HTTP:
+        anteriores = dict(_CLIENTES_HTTP)
+        _CLIENTES_HTTP.clear()
+    _fechar(anteriores)
+
+# ------------------------------
+# CLIENTES AZURE OPENAI
+# ------------------------------
 def get_azure_embeddings():
     """Retorna o cliente AzureOpenAIEmbeddings pronto para uso."""
+    if "embeddings" in _SUBSTITUTOS:
+        return _SUBSTITUTOS["embeddings"]()
+    carregar_env()
+    # Importado aqui: o langchain_openai (e o SDK da OpenAI) leva mais de um segundo para carregar
+    from langchain_openai import AzureOpenAIEmbeddings
+
     return AzureOpenAIEmbeddings(
         azure_deployment=os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME"),
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION")
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        timeout=_timeout_http(),
+        http_client=cliente_http(),
+        http_async_client=cliente_http_async()
     )
 
 def get_azure_slm():
     """Retorna o cliente AzureChatOpenAI configurado para o deployment SLM (Small Language Model)."""
+    if "slm" in _SUBSTITUTOS:
+        return _SUBSTITUTOS["slm"]()
+    carregar_env()
+    from langchain_openai import AzureChatOpenAI
+
     return AzureChatOpenAI(
         azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT"),
         azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
         api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
         temperature=0.0,
-        max_tokens=800
-    )
\ No newline at end of file
+        max_tokens=800,
+        timeout=_timeout_http(),
+        http_client=cliente_http(),
+        http_async_client=cliente_http_async()
+    )
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import hashlib
+from array import array
+
+
+# ------------------------------
+# CACHE DE EMBEDDINGS
+# ------------------------------
+class CacheEmbeddings:
+    """
+    Cache persistente (SQLite) de embeddings endereçado pelo conteúdo.
+
+    Cada vetor é indexado pelo hash SHA-256 do nome do deployment de embedding
+    somado ao texto do chunk, de modo que trocar de modelo invalida o cache
+    automaticamente. Os vetores são gravados como float32, o mesmo formato
+    usado pelo FAISS.
+    """
+
+    def __init__(self, caminho: str, deployment: str):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        self.caminho = caminho
+        self.deployment = deployment or ""
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (chave TEXT PRIMARY KEY, vetor BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS estatisticas (nome TEXT PRIMARY KEY, valor REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def chave(self, texto: str) -> str:
+        """Retorna a chave de conteúdo de um texto para o deployment atual."""
+        return hashlib.sha256(f"{self.deployment}\x00{texto}".encode("utf-8")).hexdigest()
+
+    def buscar(self, textos: list) -> list:
+        """
+        Busca os embeddings dos textos no cache.
+
+        Returns:
+            list: Um vetor (lista de floats) por texto, ou None quando ausente.
+        """
+        chaves = [self.chave(t) for t in textos]
+        encontrados = {}
+
+        # SQLite limita a quantidade de parâmetros por consulta
+        for i in range(0, len(chaves), 500):
+            parte = chaves[i:i + 500]
+            marcadores = ",".join("?" * len(parte))
+            cursor = self._conn.execute(
+                f"SELECT chave, vetor FROM embeddings WHERE chave IN ({marcadores})", parte
+            )
+            for chave, blob in cursor:
+                encontrados[chave] = array("f", blob).tolist()
+
+        resultado = [encontrados.get(c) for c in chaves]
+        hits = sum(1 for r in resultado if r is not None)
+        self.hits += hits
+        self.misses += len(resultado) - hits
+        return resultado
+
+    def salvar(self, textos: list, vetores: list):
+        """Grava os embeddings de uma lista de textos no cache."""
+        linhas = [
+            (self.chave(t), array("f", v).tobytes())
+            for t, v in zip(textos, vetores)
+        ]
+        self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", linhas)
+        self._conn.commit()
+
+    def registrar_chamada(self, n_textos: int, segundos: float):
+        """Acumula o custo observado das chamadas à API para estimar a economia."""
+        self._conn.executemany(
+            "INSERT INTO estatisticas VALUES (?, ?) "
+            "ON CONFLICT(nome) DO UPDATE SET valor = valor + excluded.valor",
+            [("textos_api", n_textos), ("segundos_api", segundos)]
+        )
+        self._conn.commit()
+
+    def segundos_por_texto(self) -> float:
+        """Tempo médio histórico de API por texto embedado (0.0 se desconhecido)."""
+        valores = dict(self._conn.execute("SELECT nome, valor FROM estatisticas"))
+        textos = valores.get("textos_api", 0)
+        return valores.get("segundos_api", 0.0) / textos if textos else 0.0
+
+    @property
+    def taxa_acerto(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def fechar(self):
+        self._conn.close()
@@ -0,0 +1,272 @@
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ErroEmbedding(RuntimeError):
+    """Um batch de embeddings esgotou as tentativas. Nenhum batch é descartado em silêncio."""
+
+
+# ------------------------------
+# LIMITADOR DE TAXA
+# ------------------------------
+class TokenBucket:
+    """
+    Token bucket para limitar requisições por segundo.
+
+    Além da taxa contínua, o bucket pode ser pausado até um instante futuro,
+    o que é usado para respeitar o cabeçalho Retry-After de respostas 429.
+    """
+
+    def __init__(self, taxa: float = None, capacidade: float = None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1.0, taxa or 1.0)
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def pausar(self, segundos: float):
+        """Bloqueia novas requisições pelos próximos `segundos`."""
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._tokens = 0.0
+
+    def reduzir_taxa(self, fator: float = 0.5):
+        """Reduz a taxa contínua (resposta multiplicativa a um 429)."""
+        with self._lock:
+            if self.taxa:
+                self.taxa = max(0.1, self.taxa * fator)
+
+    def adquirir(self):
+        """Espera até haver um token disponível e o consome."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                espera = self._pausado_ate - agora
+                if espera <= 0:
+                    if not self.taxa:
+                        return
+                    self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+                    self._ultimo = agora
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+# ------------------------------
+# CLASSIFICAÇÃO DE ERROS
+# ------------------------------
+def _status_http(erro) -> int:
+    """Extrai o status HTTP de exceções do openai/httpx ou do urllib."""
+    for atributo in ("status_code", "code", "status"):
+        valor = getattr(erro, atributo, None)
+        if isinstance(valor, int):
+            return valor
+    resposta = getattr(erro, "response", None)
+    return getattr(resposta, "status_code", None)
+
+
+def _retry_after(erro):
+    """Lê os cabeçalhos Retry-After / Retry-After-Ms do erro, em segundos (ou None)."""
+    cabecalhos = getattr(erro, "headers", None)
+    if cabecalhos is None:
+        cabecalhos = getattr(getattr(erro, "response", None), "headers", None)
+    if not cabecalhos:
+        return None
+    try:
+        if cabecalhos.get("retry-after-ms") is not None:
+            return float(cabecalhos.get("retry-after-ms")) / 1000
+        if cabecalhos.get("retry-after") is not None:
+            return float(cabecalhos.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+    return None
+
+# ------------------------------
+# EXECUTOR DE EMBEDDINGS
+# ------------------------------
+class ExecutorEmbeddings:
+    """
+    Executa batches de embeddings em paralelo, adaptando-se a limites de taxa.
+
+    - Vários batches ficam em voo ao mesmo tempo (pool de threads).
+    - Respostas 429 reduzem pela metade a concorrência e o tamanho dos batches,
+      pausam o token bucket pelo tempo do Retry-After e os valores voltam a
+      crescer aos poucos após sucessos consecutivos (AIMD).
+    - Batches com erro voltam para a fila com backoff exponencial; se esgotarem
+      `max_tentativas`, `ErroEmbedding` é lançado. O resultado mantém sempre o
+      alinhamento com os textos de entrada.
+    """
+
+    def __init__(
+        self,
+        embed_fn,
+        batch_size: int = 25,
+        max_concorrencia: int = 4,
+        taxa_requisicoes: float = None,
+        max_tentativas: int = 8,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        ao_concluir=None
+    ):
+        """
+        Args:
+            embed_fn: Função que recebe uma lista de textos e retorna seus vetores
+                (ex.: `embeddings_model.embed_documents`).
+            batch_size (int): Tamanho máximo de cada batch.
+            max_concorrencia (int): Máximo de batches em voo simultaneamente.
+            taxa_requisicoes (float, opcional): Limite de requisições por segundo.
+            max_tentativas (int): Tentativas por texto antes de desistir.
+            backoff_base (float): Espera inicial (s) do backoff exponencial.
+            backoff_max (float): Espera máxima (s) entre tentativas.
+            ao_concluir (opcional): Callback `(textos, vetores, segundos)` chamado
+                a cada batch concluído, um de cada vez.
+        """
+        self.embed_fn = embed_fn
+        self.batch_size_max = batch_size
+        self.max_concorrencia = max_concorrencia
+        self.max_tentativas = max_tentativas
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ao_concluir = ao_concluir
+        self.bucket = TokenBucket(taxa_requisicoes)
+
+        self.batch_size = batch_size
+        self.concorrencia = max_concorrencia
+        self.estatisticas = {"chamadas": 0, "throttles": 0, "erros": 0, "retentativas": 0}
+
+        self._cond = threading.Condition()
+        self._lock_callback = threading.Lock()
+        self._sucessos_seguidos = 0
+
+    def _registrar_throttle(self, retry_after):
+        with self._cond:
+            self.estatisticas["throttles"] += 1
+            self._sucessos_seguidos = 0
+            self.concorrencia = max(1, self.concorrencia // 2)
+            self.batch_size = max(1, self.batch_size // 2)
+        self.bucket.reduzir_taxa()
+        if retry_after:
+            self.bucket.pausar(retry_after)
+        logging.warning(
+            f"⚠️ Limite de taxa atingido (429). Concorrência: {self.concorrencia} | "
+            f"batch: {self.batch_size} | aguardando {retry_after or 0:.1f}s."
+        )
+
+    def _registrar_sucesso(self):
+        with self._cond:
+            self._sucessos_seguidos += 1
+            if self._sucessos_seguidos >= self.concorrencia:
+                self._sucessos_seguidos = 0
+                self.concorrencia = min(self.max_concorrencia, self.concorrencia + 1)
+                self.batch_size = min(self.batch_size_max, self.batch_size * 2)
+
+    def embed(self, textos: list) -> list:
+        """
+        Gera os embeddings de todos os textos, na mesma ordem da entrada.
+
+        Raises:
+            ErroEmbedding: Se algum batch esgotar as tentativas.
+        """
+        resultado = [None] * len(textos)
+        pendentes = deque(range(len(textos)))
+        tentativas = [0] * len(textos)
+        estado = {"em_voo": 0, "restantes": len(textos), "erro": None}
+
+        def proximo_batch():
+            with self._cond:
+                while True:
+                    if estado["erro"] is not None or estado["restantes"] == 0:
+                        return None
+                    if pendentes and estado["em_voo"] < self.concorrencia:
+                        n = min(self.batch_size, len(pendentes))
+                        estado["em_voo"] += 1
+                        return [pendentes.popleft() for _ in range(n)]
+                    self._cond.wait(0.5)
+
+        def executar():
+            while True:
+                posicoes = proximo_batch()
+                if posicoes is None:
+                    return
+                batch = [textos[p] for p in posicoes]
+
+                self.bucket.adquirir()
+                inicio = time.monotonic()
+                try:
+                    with self._cond:
+                        self.estatisticas["chamadas"] += 1
+                    vetores = self.embed_fn(batch)
+                    if len(vetores) != len(batch):
+                        raise ValueError(f"{len(vetores)} vetores retornados para {len(batch)} textos")
+                except Exception as e:
+                    espera = self._tratar_erro(e, posicoes, tentativas)
+                    with self._cond:
+                        estado["em_voo"] -= 1
+                        if max(tentativas[p] for p in posicoes) >= self.max_tentativas:
+                            estado["erro"] = ErroEmbedding(
+                                f"Batch de {len(posicoes)} textos falhou após {self.max_tentativas} tentativas: {e}"
+                            )
+                        self._cond.notify_all()
+                    if estado["erro"] is not None:
+                        return
+                    time.sleep(espera)
+                    with self._cond:
+                        pendentes.extendleft(reversed(posicoes))
+                        self._cond.notify_all()
+                    continue
+
+                if self.ao_concluir:
+                    with self._lock_callback:
+                        self.ao_concluir(batch, vetores, time.monotonic() - inicio)
+                self._registrar_sucesso()
+                with self._cond:
+                    for p, v in zip(posicoes, vetores):
+                        resultado[p] = v
+                    estado["em_voo"] -= 1
+                    estado["restantes"] -= len(posicoes)
+                    self._cond.notify_all()
+
+        def trabalhar():
+            # Qualquer exceção inesperada interrompe todas as threads, e não só esta
+            try:
+                executar()
+            except BaseException as e:
+                with self._cond:
+                    if estado["erro"] is None:
+                        estado["erro"] = e
+                    self._cond.notify_all()
+                raise
+
+        with ThreadPoolExecutor(max_workers=self.max_concorrencia, thread_name_prefix="embedding") as pool:
+            for futuro in [pool.submit(trabalhar) for _ in range(self.max_concorrencia)]:
+                futuro.result()
+
+        if estado["erro"] is not None:
+            raise estado["erro"]
+        return resultado
+
+    def _tratar_erro(self, erro, posicoes, tentativas) -> float:
+        """Classifica o erro, ajusta os limites e retorna a espera antes de reenfileirar o batch."""
+        for p in posicoes:
+            tentativas[p] += 1
+        tentativa = max(tentativas[p] for p in posicoes)
+        with self._cond:
+            self.estatisticas["retentativas"] += 1
+
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.0)
+        if _status_http(erro) == 429:
+            retry_after = _retry_after(erro)
+            self._registrar_throttle(retry_after)
+            # A pausa do bucket já segura todas as threads pelo Retry-After
+            return 0.0 if retry_after else backoff
+
+        with self._cond:
+            self.estatisticas["erros"] += 1
+        logging.warning(f"⚠️ Erro em batch de {len(posicoes)} textos (tentativa {tentativa}): {erro}")
+        return backoff
@@ -0,0 +1,398 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import argparse
+import threading
+from collections.abc import MutableMapping
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from src.utils.indice_lexical import LEXICAL_ARQUIVO, construir_indice_lexical
+
+DOCSTORE_ARQUIVO = "docstore.sqlite"
+INDICE_ARQUIVO = "index.faiss"
+PICKLE_ARQUIVO = "index.pkl"
+
+# Tipos de índice -> descrição para faiss.index_factory (métrica L2, como o FAISS padrão do LangChain)
+TIPOS_INDICE = {
+    "flat": "Flat",                 # busca exaustiva, float32 (padrão)
+    "ivf": "IVF{nlist},Flat",       # busca em `nprobe` das `nlist` listas invertidas
+    "hnsw": "HNSW32,Flat",          # grafo HNSW, sem remoção de vetores
+    "pq": "IVF{nlist},PQ{m}x8np",   # listas invertidas + product quantization (m bytes por vetor)
+    "sq8": "SQ8",                   # 1 byte por dimensão
+    "fp16": "SQfp16",               # float16, 2 bytes por dimensão
+}
+# Tipos em que remover vetores exige reconstruir o índice: o HNSW não remove, e
+# o `remove_ids` do IVF mantém os rótulos originais, enquanto o `FAISS.delete`
+# do LangChain renumera `index_to_docstore_id` pelas posições
+TIPOS_SEM_REMOCAO = {"hnsw", "ivf", "pq"}
+HNSW_EF_CONSTRUCAO = 80
+HNSW_EF_BUSCA = 64
+
+
+def _conectar(caminho: str) -> sqlite3.Connection:
+    """Abre o docstore somente para leitura, com leitura das páginas via mmap."""
+    conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
+
+# ------------------------------
+# DOCSTORE EM SQLITE
+# ------------------------------
+class DocstoreSQLite(Docstore, AddableMixin):
+    """
+    Docstore que lê texto e metadados de cada chunk do SQLite apenas quando pedido.
+
+    Substitui o `InMemoryDocstore` do `index.pkl`, que precisa ser inteiro
+    desserializado na memória ao iniciar cada processo. O arquivo nunca é
+    alterado: inclusões e remoções (ingestão incremental) ficam em memória até
+    `salvar_indice` gravar um novo docstore.
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._conn = _conectar(caminho)
+        self._lock = threading.Lock()
+        self._novos = {}
+        self._removidos = set()
+
+    def search(self, search: str):
+        if search in self._novos:
+            return self._novos[search]
+        if search in self._removidos:
+            return f"ID {search} not found."
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT page_content, metadata FROM documentos WHERE id = ?", (search,)
+            ).fetchone()
+        if linha is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=linha[0], metadata=json.loads(linha[1]))
+
+    def add(self, texts: dict) -> None:
+        self._novos.update(texts)
+        self._removidos.difference_update(texts)
+
+    def delete(self, ids: list) -> None:
+        for id_ in ids:
+            self._novos.pop(id_, None)
+            self._removidos.add(id_)
+
+    def fechar(self):
+        self._conn.close()
+
+
+class MapaIdsSQLite(MutableMapping):
+    """
+    Mapeamento posição no índice FAISS -> ID do chunk, consultado sob demanda.
+
+    Faz o papel do dicionário `index_to_docstore_id` sem carregá-lo inteiro;
+    posições acrescentadas em memória (ingestão incremental) ficam em `_novos`.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self._conn = conn
+        self._lock = lock
+        with self._lock:
+            self._total = self._conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+        self._novos = {}
+
+    def __getitem__(self, posicao):
+        posicao = int(posicao)
+        if posicao in self._novos:
+            return self._novos[posicao]
+        if 0 <= posicao < self._total:
+            with self._lock:
+                linha = self._conn.execute(
+                    "SELECT id FROM documentos WHERE posicao = ?", (posicao,)
+                ).fetchone()
+            if linha is not None:
+                return linha[0]
+        raise KeyError(posicao)
+
+    def __setitem__(self, posicao, id_):
+        self._novos[int(posicao)] = id_
+
+    def __delitem__(self, posicao):
+        raise TypeError("O mapeamento de IDs do docstore SQLite não permite remoções.")
+
+    def __len__(self):
+        return self._total + len(self._novos)
+
+    def __iter__(self):
+        yield from range(self._total)
+        yield from self._novos
+
+    def items(self):
+        # Uma consulta só, em vez de uma por posição (usado por FAISS.delete)
+        with self._lock:
+            linhas = self._conn.execute("SELECT posicao, id FROM documentos ORDER BY posicao").fetchall()
+        return linhas + list(self._novos.items())
+
+    def values(self):
+        return [id_ for _, id_ in self.items()]
+
+# ------------------------------
+# CONSTRUÇÃO DO ÍNDICE
+# ------------------------------
+def _subquantizadores(dimensao: int) -> int:
+    """Número de subquantizadores do PQ: ~8 dimensões por byte, dividindo a dimensão."""
+    for m in range(max(1, dimensao // 8), 0, -1):
+        if dimensao % m == 0:
+            return m
+    return 1
+
+
+def construir_indice(vetores: np.ndarray, tipo: str = "flat"):
+    """
+    Cria e treina (sem adicionar vetores) um índice FAISS do tipo escolhido.
+
+    `nlist` segue a regra de ~4·√n listas, limitada a uma lista a cada 39
+    vetores de treino, e `nprobe`/`efSearch` ficam gravados no próprio índice.
+    Com poucos vetores para treinar, o índice recai para `flat`.
+
+    Args:
+        vetores (np.ndarray): Vetores usados no treino (normalmente todos os do corpus).
+        tipo (str): Uma das chaves de `TIPOS_INDICE`.
+    """
+    import faiss
+
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconhecido: '{tipo}'. Opções: {', '.join(TIPOS_INDICE)}.")
+
+    n, dimensao = vetores.shape
+    nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+    minimo = {"ivf": 39, "pq": 39 * 256}.get(tipo, 0)
+    if n < minimo:
+        logging.warning(f"⚠️ {n} vetores não bastam para treinar um índice '{tipo}' (mínimo {minimo}). Usando 'flat'.")
+        tipo = "flat"
+
+    fabrica = TIPOS_INDICE[tipo].format(nlist=nlist, m=_subquantizadores(dimensao))
+    index = faiss.index_factory(dimensao, fabrica, faiss.METRIC_L2)
+    if tipo == "hnsw":
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCAO
+        index.hnsw.efSearch = HNSW_EF_BUSCA
+
+    if not index.is_trained:
+        inicio = time.perf_counter()
+        index.train(np.ascontiguousarray(vetores, dtype=np.float32))
+        logging.info(f"Índice '{fabrica}' treinado com {n} vetores em {time.perf_counter() - inicio:.1f}s.")
+
+    if tipo in ("ivf", "pq"):
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = min(nlist, max(8, nlist // 8))
+        # Mapa direto em array: permite reconstruir os vetores por ID (MMR). Os rótulos
+        # são sempre sequenciais, já que remover PDFs reconstrói índices IVF e PQ
+        ivf.set_direct_map_type(faiss.DirectMap.Array)
+    return index
+
+
+def criar_vector_store(text_embeddings: list, embeddings_model, metadatas: list = None, ids: list = None, tipo: str = "flat") -> FAISS:
+    """
+    Equivalente a `FAISS.from_embeddings`, mas com o tipo de índice escolhido.
+
+    Args:
+        text_embeddings (list): Pares (texto, vetor).
+        embeddings_model: Modelo de embeddings das consultas.
+        metadatas (list, opcional): Metadados de cada texto.
+        ids (list, opcional): IDs dos chunks.
+        tipo (str): Uma das chaves de `TIPOS_INDICE`.
+    """
+    if tipo == "flat":
+        return FAISS.from_embeddings(text_embeddings, embeddings_model, metadatas=metadatas, ids=ids)
+
+    vetores = np.asarray([vetor for _, vetor in text_embeddings], dtype=np.float32)
+    vector_store = FAISS(embeddings_model, construir_indice(vetores, tipo), InMemoryDocstore(), {})
+    vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    return vector_store
+
+# ------------------------------
+# SALVAR / CARREGAR / CONVERTER
+# ------------------------------
+class GravadorIndice:
+    """
+    Grava um índice em disco aos poucos: os chunks vão direto para o docstore
+    SQLite (temporário) à medida que chegam e só os vetores ficam no índice
+    FAISS em memória. `concluir` grava o índice e troca os arquivos com
+    `os.replace`, como `salvar_indice`.
+    """
+
+    def __init__(self, diretorio: str, index=None):
+        """
+        Args:
+            diretorio (str): Diretório do índice.
+            index (opcional): Índice FAISS já treinado. Sem ele, um `IndexFlatL2`
+                é criado com a dimensão dos primeiros vetores.
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.index = index
+        self._destino = os.path.join(diretorio, DOCSTORE_ARQUIVO)
+        self._temporario = self._destino + ".tmp"
+        if os.path.exists(self._temporario):
+            os.remove(self._temporario)
+        self._conn = sqlite3.connect(self._temporario)
+        self._conn.execute(
+            "CREATE TABLE documentos ("
+            "posicao INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self.total = 0
+
+    def adicionar_documentos(self, ids: list, documentos: list):
+        """Grava no docstore os chunks das próximas posições (sem vetores)."""
+        linhas = [
+            (self.total + i, id_, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+            for i, (id_, doc) in enumerate(zip(ids, documentos))
+        ]
+        self._conn.executemany("INSERT INTO documentos VALUES (?, ?, ?, ?)", linhas)
+        self.total += len(linhas)
+
+    def adicionar(self, ids: list, documentos: list, vetores):
+        """Acrescenta chunks e seus vetores ao índice."""
+        import faiss
+
+        vetores = np.ascontiguousarray(vetores, dtype=np.float32)
+        if self.index is None:
+            self.index = faiss.IndexFlatL2(vetores.shape[1])
+        self.index.add(vetores)
+        self.adicionar_documentos(ids, documentos)
+
+    def descartar(self):
+        """Abandona a gravação, apagando o docstore temporário."""
+        self._conn.close()
+        os.remove(self._temporario)
+
+    def concluir(self) -> int:
+        """
+        Grava `index.faiss`, publica o docstore e constrói o índice lexical.
+
+        Returns:
+            int: Total de vetores gravados.
+        """
+        import faiss
+
+        self._conn.commit()
+        self._conn.close()
+        if self.index.ntotal != self.total:
+            raise ValueError(f"Docstore com {self.total} chunks para um índice com {self.index.ntotal} vetores.")
+
+        faiss.write_index(self.index, os.path.join(self.diretorio, INDICE_ARQUIVO + ".tmp"))
+        os.replace(os.path.join(self.diretorio, INDICE_ARQUIVO + ".tmp"), os.path.join(self.diretorio, INDICE_ARQUIVO))
+        os.replace(self._temporario, self._destino)
+        construir_indice_lexical(self._destino, os.path.join(self.diretorio, LEXICAL_ARQUIVO))
+
+        pickle_antigo = os.path.join(self.diretorio, PICKLE_ARQUIVO)
+        if os.path.exists(pickle_antigo):
+            os.remove(pickle_antigo)
+        return self.total
+
+
+def salvar_indice(vector_store: FAISS, diretorio: str):
+    """
+    Grava o índice FAISS (`index.faiss`), o docstore em SQLite (`docstore.sqlite`)
+    e o índice lexical BM25 dos mesmos chunks (`lexical.sqlite`).
+
+    Os arquivos são escritos em temporários e trocados com `os.replace`.
+    Um `index.pkl` antigo é removido, já que deixaria de corresponder ao índice.
+    """
+    gravador = GravadorIndice(diretorio, index=vector_store.index)
+    ids, documentos = [], []
+    for posicao in range(vector_store.index.ntotal):
+        id_ = vector_store.index_to_docstore_id[posicao]
+        doc = vector_store.docstore.search(id_)
+        if not isinstance(doc, Document):
+            raise ValueError(f"Documento {id_} não encontrado no docstore.")
+        ids.append(id_)
+        documentos.append(doc)
+        if len(ids) >= 10000:
+            gravador.adicionar_documentos(ids, documentos)
+            ids, documentos = [], []
+    gravador.adicionar_documentos(ids, documentos)
+    gravador.concluir()
+
+
+def ler_indice(caminho: str, mmap: bool = True):
+    """
+    Lê um arquivo `index.faiss` de qualquer tipo de `TIPOS_INDICE`.
+
+    IO_FLAG_MMAP_IFC mapeia os vetores direto do arquivo, sem copiá-los para a
+    memória. IO_FLAG_SKIP_PRECOMPUTE_TABLE evita a tabela pré-calculada do
+    IVF-PQ, que ocupa mais RAM do que os próprios códigos comprimidos.
+    """
+    import faiss
+
+    flags = faiss.IO_FLAG_SKIP_PRECOMPUTE_TABLE
+    if mmap:
+        flags |= faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+    return faiss.read_index(caminho, flags)
+
+
+def carregar_indice(diretorio: str, embeddings_model, mmap: bool = True) -> FAISS:
+    """
+    Carrega o vetorstore sem desserializar o docstore.
+
+    Com `docstore.sqlite`, apenas o índice FAISS é aberto (via mmap, se
+    `mmap=True`) e os chunks são lidos do SQLite sob demanda. Índices antigos,
+    só com `index.pkl`, continuam sendo carregados com `FAISS.load_local`.
+    Qualquer tipo de `TIPOS_INDICE` é carregado da mesma forma, com os
+    parâmetros de busca gravados no índice.
+
+    Args:
+        diretorio (str): Diretório do índice.
+        embeddings_model: Modelo de embeddings das consultas.
+        mmap (bool): Mapeia o índice em memória, somente leitura. Use `False`
+            para alterar o índice (ingestão incremental).
+    """
+    docstore_path = os.path.join(diretorio, DOCSTORE_ARQUIVO)
+    if not os.path.exists(docstore_path):
+        logging.warning(
+            f"⚠️ '{diretorio}' usa o formato antigo (index.pkl). "
+            f"Converta com: python -m src.utils.indice_faiss {diretorio}"
+        )
+        return FAISS.load_local(diretorio, embeddings_model, allow_dangerous_deserialization=True)
+
+    index = ler_indice(os.path.join(diretorio, INDICE_ARQUIVO), mmap=mmap)
+    docstore = DocstoreSQLite(docstore_path)
+    mapa = MapaIdsSQLite(docstore._conn, docstore._lock)
+    if len(mapa) != index.ntotal:
+        raise ValueError(f"Docstore com {len(mapa)} chunks para um índice com {index.ntotal} vetores.")
+    return FAISS(embeddings_model, index, docstore, mapa)
+
+
+def converter_indice(diretorio: str, remover_pickle: bool = False):
+    """Converte um índice salvo com `save_local` (index.pkl) para o docstore em SQLite."""
+    if not os.path.exists(os.path.join(diretorio, PICKLE_ARQUIVO)):
+        raise FileNotFoundError(f"'{os.path.join(diretorio, PICKLE_ARQUIVO)}' não encontrado.")
+
+    inicio = time.perf_counter()
+    vector_store = FAISS.load_local(diretorio, None, allow_dangerous_deserialization=True)
+    backup = os.path.join(diretorio, PICKLE_ARQUIVO + ".bak")
+    os.replace(os.path.join(diretorio, PICKLE_ARQUIVO), backup)
+    salvar_indice(vector_store, diretorio)
+    if remover_pickle:
+        os.remove(backup)
+
+    logging.info(
+        f"✅ {vector_store.index.ntotal} chunks convertidos para '{DOCSTORE_ARQUIVO}' "
+        f"em {time.perf_counter() - inicio:.1f}s."
+    )
+    if not remover_pickle:
+        logging.info(f"O docstore antigo foi mantido em '{backup}'.")
+
+
+if __name__ == "__main__":
+    from src.utils.setup_log import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Converte o docstore de um índice FAISS de index.pkl para SQLite.")
+    parser.add_argument("diretorio", nargs="?", default="faiss_index")
+    parser.add_argument("--remover-pickle", action="store_true", help="Apaga o index.pkl após a conversão.")
+    args = parser.parse_args()
+
+    converter_indice(args.diretorio, remover_pickle=args.remover_pickle)
@@ -0,0 +1,151 @@
+import os
+import re
+import math
+import sqlite3
+import logging
+import threading
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+from src.utils.telemetria import span
+
+LEXICAL_ARQUIVO = "lexical.sqlite"
+
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse esta este
+eu foi for ha isso isto ja la mais mas me mesmo muito na nas nem no nos o os ou para pela pelas pelo pelos por
+qual quais quando que quem se sem ser seu seus sua suas sao so tambem te tem um uma umas uns voce
+""".split())
+
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[a-z]+")
+
+
+# ------------------------------
+# TOKENIZAÇÃO
+# ------------------------------
+def dobrar_acentos(texto: str) -> str:
+    """Remove acentos e cedilha: 'Projeção' -> 'Projecao'."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> list:
+    """
+    Tokeniza texto em português para o BM25: caixa baixa, sem acentos e sem
+    stopwords. Números com separadores ('4,8', '2.025') são mantidos inteiros.
+    """
+    return [t for t in _TOKEN.findall(dobrar_acentos(texto.lower())) if t not in STOPWORDS]
+
+# ------------------------------
+# ÍNDICE INVERTIDO (BM25)
+# ------------------------------
+def construir_indice_lexical(docstore_path: str, destino: str):
+    """
+    Constrói o índice invertido BM25 a partir do `docstore.sqlite` do índice FAISS.
+
+    Cada termo guarda sua lista de postings como dois vetores compactos
+    (posições dos chunks em uint32 e frequências em uint16). O arquivo é
+    escrito em um temporário e trocado com `os.replace`.
+    """
+    temporario = destino + ".tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+
+    origem = sqlite3.connect(f"file:{docstore_path}?mode=ro", uri=True)
+    postings = {}
+    ids, comprimentos = [], []
+    for posicao, (id_, texto) in enumerate(origem.execute("SELECT id, page_content FROM documentos ORDER BY posicao")):
+        tokens = tokenizar(texto)
+        ids.append(id_)
+        comprimentos.append(len(tokens))
+        for termo, tf in Counter(tokens).items():
+            postings.setdefault(termo, ([], []))
+            postings[termo][0].append(posicao)
+            postings[termo][1].append(min(tf, 65535))
+    origem.close()
+
+    conn = sqlite3.connect(temporario)
+    conn.execute("CREATE TABLE termos (termo TEXT PRIMARY KEY, df INTEGER NOT NULL, posicoes BLOB NOT NULL, tfs BLOB NOT NULL)")
+    conn.execute("CREATE TABLE documentos (posicao INTEGER PRIMARY KEY, id TEXT NOT NULL)")
+    conn.execute("CREATE TABLE meta (nome TEXT PRIMARY KEY, valor BLOB NOT NULL)")
+    conn.executemany(
+        "INSERT INTO termos VALUES (?, ?, ?, ?)",
+        (
+            (termo, len(posicoes), np.asarray(posicoes, dtype=np.uint32).tobytes(), np.asarray(tfs, dtype=np.uint16).tobytes())
+            for termo, (posicoes, tfs) in postings.items()
+        )
+    )
+    conn.executemany("INSERT INTO documentos VALUES (?, ?)", enumerate(ids))
+    conn.execute("INSERT INTO meta VALUES ('comprimentos', ?)", (np.asarray(comprimentos, dtype=np.uint32).tobytes(),))
+    conn.commit()
+    conn.close()
+    os.replace(temporario, destino)
+
+    logging.info(f"Índice lexical (BM25): {len(ids)} chunks, {len(postings)} termos.")
+
+
+class IndiceLexical:
+    """
+    Busca BM25 sobre o índice invertido em SQLite.
+
+    Só os comprimentos dos chunks ficam em memória; as listas de postings são
+    lidas do disco para os termos de cada consulta.
+    """
+
+    def __init__(self, caminho: str, k1: float = 1.2, b: float = 0.75):
+        self.caminho = caminho
+        self.k1 = k1
+        self.b = b
+        self._conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            blob = self._conn.execute("SELECT valor FROM meta WHERE nome = 'comprimentos'").fetchone()[0]
+        self._comprimentos = np.frombuffer(blob, dtype=np.uint32).astype(np.float32)
+        self.total = len(self._comprimentos)
+        self._media = float(self._comprimentos.mean()) if self.total else 0.0
+
+    def buscar(self, consulta: str, k: int = 20) -> list:
+        """
+        Returns:
+            list: Pares (ID do chunk, pontuação BM25), do mais para o menos relevante.
+        """
+        with span("busca_lexical") as atual:
+            resultado = self._buscar(consulta, k)
+            atual.anotar(candidatos=len(resultado))
+        return resultado
+
+    def _buscar(self, consulta: str, k: int) -> list:
+        termos = set(tokenizar(consulta))
+        if not termos or not self.total:
+            return []
+
+        with self._lock:
+            linhas = self._conn.execute(
+                f"SELECT df, posicoes, tfs FROM termos WHERE termo IN ({','.join('?' * len(termos))})",
+                tuple(termos)
+            ).fetchall()
+
+        pontuacoes = np.zeros(self.total, dtype=np.float32)
+        for df, posicoes, tfs in linhas:
+            posicoes = np.frombuffer(posicoes, dtype=np.uint32)
+            tfs = np.frombuffer(tfs, dtype=np.uint16).astype(np.float32)
+            idf = math.log(1 + (self.total - df + 0.5) / (df + 0.5))
+            normalizacao = self.k1 * (1 - self.b + self.b * self._comprimentos[posicoes] / self._media)
+            pontuacoes[posicoes] += idf * tfs * (self.k1 + 1) / (tfs + normalizacao)
+
+        candidatos = np.flatnonzero(pontuacoes)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(-pontuacoes[candidatos], k)[:k]]
+        candidatos = candidatos[np.argsort(-pontuacoes[candidatos], kind="stable")]
+
+        with self._lock:
+            ids = dict(self._conn.execute(
+                f"SELECT posicao, id FROM documentos WHERE posicao IN ({','.join('?' * len(candidatos))})",
+                tuple(int(p) for p in candidatos)
+            ).fetchall()) if len(candidatos) else {}
+        return [(ids[int(p)], float(pontuacoes[p])) for p in candidatos]
+
+    def fechar(self):
+        self._conn.close()
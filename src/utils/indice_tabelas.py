@@ -0,0 +1,251 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.indice_lexical import dobrar_acentos
+from src.utils.particoes import data_relatorio
+
+TABELAS_ARQUIVO = "tabelas.sqlite"
+
+# "2025", "2025 T1", "2025-T3", "1º tri 2025", "4T 2024"
+_HORIZONTE = re.compile(
+    r"(?P<ano>(?:19|20)\d{2})(?:\s*[-/]?\s*t(?P<tri>[1-4]))?"
+    r"|(?P<tri_p>[1-4])\s*[o°º]?\s*t(?:ri(?:mestre)?)?\.?\s*(?:de\s+)?(?P<ano_p>(?:19|20)\d{2})"
+)
+# "4,8", "-0,3", "1.234,5", "4.8", "15%"
+_NUMERO = re.compile(r"(?P<sinal>[-−–])?\s*(?P<numero>\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?)\s*(?P<pct>%)?")
+_UNIDADE = re.compile(r"\(([^)]*)\)")
+
+
+@dataclass
+class ValorTabela:
+    """Um valor de uma tabela: indicador (linha) em um horizonte (coluna)."""
+    indicador: str
+    horizonte: str
+    ano: int
+    valor: float
+    texto: str
+    unidade: str
+    page: int
+
+# ------------------------------
+# LEITURA DAS TABELAS
+# ------------------------------
+def _celula(valor) -> str:
+    return " ".join(str(valor).split()) if valor is not None else ""
+
+
+def ler_horizonte(celula: str):
+    """
+    Interpreta o cabeçalho de uma coluna como horizonte.
+
+    Returns:
+        tuple: (horizonte, ano), como ("2025", 2025) ou ("2025T1", 2025), ou None.
+    """
+    m = _HORIZONTE.fullmatch(dobrar_acentos(celula.lower()).strip())
+    if m is None:
+        return None
+    ano = int(m.group("ano") or m.group("ano_p"))
+    tri = m.group("tri") or m.group("tri_p")
+    return (f"{ano}T{tri}" if tri else str(ano)), ano
+
+
+def ler_numero(celula: str):
+    """Converte um número no formato brasileiro ('4,8', '1.234,5', '-0,3%') para float, ou None."""
+    m = _NUMERO.fullmatch(celula.strip())
+    if m is None:
+        return None
+    numero = m.group("numero")
+    if "," in numero:
+        numero = numero.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", numero):
+        numero = numero.replace(".", "")
+    return -float(numero) if m.group("sinal") else float(numero)
+
+
+def chave_indicador(rotulo: str) -> tuple:
+    """
+    Normaliza o rótulo de um indicador para a busca.
+
+    Returns:
+        tuple: (chave, unidade): 'Selic (% a.a.)' -> ('selic', '% a.a.').
+    """
+    unidade = "; ".join(u.strip() for u in _UNIDADE.findall(rotulo))
+    chave = " ".join(re.findall(r"[a-z0-9]+", dobrar_acentos(_UNIDADE.sub(" ", rotulo).lower())))
+    return chave, unidade
+
+
+def registros_tabela(linhas: list, page: int) -> list:
+    """
+    Converte uma tabela (lista de linhas de células) em valores por indicador e horizonte.
+
+    O cabeçalho é a linha com horizontes (anos ou trimestres) a partir da
+    segunda coluna; cada linha seguinte com rótulo na primeira coluna vira um
+    indicador. Uma nova linha de horizontes troca o cabeçalho. Tabelas com os
+    horizontes na primeira coluna são lidas transpostas.
+
+    Args:
+        linhas (list): Células da tabela, como em `pdfplumber.Page.extract_tables`.
+        page (int): Página da tabela (a partir de 0).
+
+    Returns:
+        list: `ValorTabela` de cada célula numérica.
+    """
+    linhas = [[_celula(c) for c in linha] for linha in linhas if linha]
+    registros = _registros(linhas, page)
+    if not registros and linhas:
+        largura = max(len(linha) for linha in linhas)
+        transposta = [list(coluna) for coluna in zip(*(linha + [""] * (largura - len(linha)) for linha in linhas))]
+        registros = _registros(transposta, page)
+    return registros
+
+
+def _registros(linhas: list, page: int) -> list:
+    registros = []
+    cabecalho = None
+    for linha in linhas:
+        horizontes = {i: ler_horizonte(c) for i, c in enumerate(linha) if i > 0 and c}
+        if horizontes and all(horizontes.values()):
+            cabecalho = horizontes
+            continue
+        rotulo = linha[0] if linha else ""
+        if cabecalho is None or not rotulo or ler_numero(rotulo) is not None:
+            continue
+        for i, (horizonte, ano) in cabecalho.items():
+            if i >= len(linha) or (valor := ler_numero(linha[i])) is None:
+                continue
+            registros.append(ValorTabela(rotulo, horizonte, ano, valor, linha[i], chave_indicador(rotulo)[1], page))
+    return registros
+
+
+def extrair_tabelas(file_path: str) -> list:
+    """Extrai com pdfplumber os valores das tabelas de todas as páginas de um PDF."""
+    import pdfplumber
+
+    registros = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            for tabela in page.extract_tables():
+                registros.extend(registros_tabela(tabela, page.page_number - 1))
+            page.close()
+    return registros
+
+
+def extrair_tabelas_pdfs(pdf_files: list, workers: int = 1) -> dict:
+    """
+    Extrai as tabelas de vários PDFs, em paralelo com `workers` processos.
+    PDFs com erro de leitura são registrados no log e ignorados.
+
+    Returns:
+        dict: Caminho do PDF -> lista de `ValorTabela`.
+    """
+    workers = min(workers or os.cpu_count(), len(pdf_files))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = {f: executor.submit(extrair_tabelas, f) for f in pdf_files}
+    else:
+        futuros = None
+
+    resultado = {}
+    for file_path in pdf_files:
+        try:
+            resultado[file_path] = futuros[file_path].result() if futuros else extrair_tabelas(file_path)
+        except Exception as e:
+            logging.error(f"Erro ao extrair as tabelas de {os.path.basename(file_path)}: {e}")
+    return resultado
+
+# ------------------------------
+# ÍNDICE DE TABELAS (SQLITE)
+# ------------------------------
+class IndiceTabelas:
+    """
+    Valores das tabelas dos relatórios em SQLite, indexados por indicador,
+    horizonte e data do relatório.
+
+    Cada valor guarda o PDF e a página de origem, usados como referência das
+    respostas diretas.
+    """
+
+    def __init__(self, caminho: str, somente_leitura: bool = True):
+        self.caminho = caminho
+        if somente_leitura:
+            self._conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(caminho)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS valores ("
+                "arquivo TEXT NOT NULL, source TEXT NOT NULL, data_relatorio TEXT, page INTEGER NOT NULL, "
+                "indicador TEXT NOT NULL, chave TEXT NOT NULL, unidade TEXT NOT NULL, "
+                "horizonte TEXT NOT NULL, ano INTEGER NOT NULL, valor REAL NOT NULL, texto TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS valores_consulta ON valores (chave, ano, data_relatorio)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS valores_arquivo ON valores (arquivo)")
+            self._conn.commit()
+        self._lock = threading.Lock()
+        self._indicadores = None
+
+    def atualizar(self, tabelas: dict, remover: list = (), reconstruir: bool = False):
+        """
+        Grava os valores extraídos e remove os de PDFs excluídos ou alterados.
+
+        Args:
+            tabelas (dict): Caminho do PDF -> lista de `ValorTabela` (`extrair_tabelas_pdfs`).
+            remover (list): Nomes dos PDFs cujos valores são apagados.
+            reconstruir (bool): Apaga todos os valores antes de gravar.
+        """
+        with self._lock, self._conn:
+            if reconstruir:
+                self._conn.execute("DELETE FROM valores")
+            nomes = list(remover) + [os.path.basename(f) for f in tabelas]
+            self._conn.executemany("DELETE FROM valores WHERE arquivo = ?", [(n,) for n in nomes])
+            for file_path, registros in tabelas.items():
+                data = data_relatorio(file_path)
+                self._conn.executemany(
+                    "INSERT INTO valores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            os.path.basename(file_path), file_path, f"{data[0]}-{data[1]:02d}" if data else None, r.page,
+                            r.indicador, chave_indicador(r.indicador)[0], r.unidade, r.horizonte, r.ano, r.valor, r.texto
+                        )
+                        for r in registros
+                    ]
+                )
+        self._indicadores = None
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM valores").fetchone()[0]
+
+    def indicadores(self) -> list:
+        """Chaves dos indicadores, da mais longa para a mais curta (carregadas uma vez)."""
+        if self._indicadores is None:
+            with self._lock:
+                chaves = [c for (c,) in self._conn.execute("SELECT DISTINCT chave FROM valores") if c]
+            self._indicadores = sorted(chaves, key=lambda c: (-len(c), c))
+        return self._indicadores
+
+    def consultar(self, chave: str, ano: int, horizonte: str = None) -> list:
+        """
+        Valores de um indicador em um ano (ou horizonte exato), do relatório mais recente ao mais antigo.
+
+        Returns:
+            list: Dicionários com as colunas da tabela `valores`.
+        """
+        sql = "SELECT * FROM valores WHERE chave = ? AND ano = ?"
+        parametros = [chave, ano]
+        if horizonte:
+            sql += " AND horizonte = ?"
+            parametros.append(horizonte)
+        sql += " ORDER BY data_relatorio DESC, page"
+        with self._lock:
+            cursor = self._conn.execute(sql, parametros)
+            colunas = [c[0] for c in cursor.description]
+            return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    def fechar(self):
+        self._conn.close()
@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import shutil
+import logging
+from dataclasses import dataclass
+
+from src.utils.indice_faiss import carregar_indice
+from src.utils.indice_lexical import LEXICAL_ARQUIVO, IndiceLexical, dobrar_acentos
+
+PARTICOES_ARQUIVO = "particoes.json"
+PARTICOES_DIR = "particoes"
+CRITERIOS_PARTICAO = ("relatorio", "ano")
+
+MESES = {
+    "janeiro": 1, "jan": 1, "fevereiro": 2, "fev": 2, "marco": 3, "mar": 3,
+    "abril": 4, "abr": 4, "maio": 5, "mai": 5, "junho": 6, "jun": 6,
+    "julho": 7, "jul": 7, "agosto": 8, "ago": 8, "setembro": 9, "set": 9,
+    "outubro": 10, "out": 10, "novembro": 11, "nov": 11, "dezembro": 12, "dez": 12,
+}
+
+# RPM_Dez_2024.pdf, RPM-marco-2023.pdf, RPM_2024_12.pdf
+_DATA_MES_NOME = re.compile(r"(?<![a-z])([a-z]{3,9})[_\-\s]*((?:19|20)\d{2})(?!\d)")
+_DATA_MES_NUMERO = re.compile(r"(?<!\d)((?:19|20)\d{2})[_\-](\d{2})(?!\d)")
+
+
+# ------------------------------
+# DATA DOS RELATÓRIOS
+# ------------------------------
+def data_relatorio(nome_arquivo: str):
+    """
+    Extrai a data de edição de um relatório a partir do nome do arquivo.
+
+    Returns:
+        tuple: (ano, mês), ou None se o nome não tiver uma data reconhecível.
+    """
+    nome = dobrar_acentos(os.path.splitext(os.path.basename(nome_arquivo))[0].lower())
+    for mes, ano in _DATA_MES_NOME.findall(nome):
+        if mes in MESES:
+            return int(ano), MESES[mes]
+    for ano, mes in _DATA_MES_NUMERO.findall(nome):
+        if 1 <= int(mes) <= 12:
+            return int(ano), int(mes)
+    return None
+
+
+def chave_particao(nome_arquivo: str, criterio: str) -> str:
+    """
+    Partição de um PDF: `AAAA-MM` por relatório ou `AAAA` por ano. PDFs sem data
+    no nome ficam em uma partição própria (`relatorio`) ou em `sem_data` (`ano`).
+    """
+    if criterio not in CRITERIOS_PARTICAO:
+        raise ValueError(f"Critério de partição desconhecido: '{criterio}'. Opções: {', '.join(CRITERIOS_PARTICAO)}.")
+    data = data_relatorio(nome_arquivo)
+    if data is None:
+        nome = os.path.splitext(os.path.basename(nome_arquivo))[0]
+        return re.sub(r"[^A-Za-z0-9_-]", "_", nome) if criterio == "relatorio" else "sem_data"
+    ano, mes = data
+    return f"{ano}-{mes:02d}" if criterio == "relatorio" else str(ano)
+
+
+def metadados_particao(chave: str) -> dict:
+    """Ano e mês de uma partição a partir da sua chave (None quando não há data)."""
+    m = re.fullmatch(r"(\d{4})(?:-(\d{2}))?", chave)
+    if m is None:
+        return {"ano": None, "mes": None}
+    return {"ano": int(m.group(1)), "mes": int(m.group(2)) if m.group(2) else None}
+
+# ------------------------------
+# MAPA DE PARTIÇÕES
+# ------------------------------
+def caminho_particao(diretorio: str, chave: str) -> str:
+    return os.path.join(diretorio, PARTICOES_DIR, chave)
+
+
+def indice_particionado(diretorio: str) -> bool:
+    return os.path.exists(os.path.join(diretorio, PARTICOES_ARQUIVO))
+
+
+def carregar_mapa_particoes(diretorio: str) -> dict:
+    """
+    Returns:
+        dict: {"criterio": ..., "particoes": {chave: {"ano", "mes", "arquivos", "vetores"}}}
+    """
+    with open(os.path.join(diretorio, PARTICOES_ARQUIVO), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_mapa_particoes(diretorio: str, mapa: dict):
+    """Grava o mapa de partições de forma atômica (arquivo temporário + rename)."""
+    caminho = os.path.join(diretorio, PARTICOES_ARQUIVO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(mapa, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def remover_particoes(diretorio: str):
+    """Apaga todas as partições e o mapa (ao reconstruir o índice sem partições)."""
+    shutil.rmtree(os.path.join(diretorio, PARTICOES_DIR), ignore_errors=True)
+    if indice_particionado(diretorio):
+        os.remove(os.path.join(diretorio, PARTICOES_ARQUIVO))
+
+# ------------------------------
+# CARREGAMENTO
+# ------------------------------
+@dataclass
+class Particao:
+    """Índice FAISS (e BM25, se houver) de uma partição, com seus metadados."""
+    chave: str
+    ano: int
+    mes: int
+    vector_store: object
+    indice_lexical: IndiceLexical = None
+
+
+def carregar_particoes(diretorio: str, embeddings_model) -> list:
+    """
+    Carrega todas as partições de um índice particionado, da mais recente para
+    a mais antiga (partições sem data por último).
+
+    Cada partição é um índice completo (`index.faiss`, `docstore.sqlite`,
+    `lexical.sqlite`) aberto via mmap, como `carregar_indice`.
+    """
+    mapa = carregar_mapa_particoes(diretorio)
+    particoes = []
+    for chave, info in mapa["particoes"].items():
+        caminho = caminho_particao(diretorio, chave)
+        lexical = os.path.join(caminho, LEXICAL_ARQUIVO)
+        particoes.append(Particao(
+            chave=chave,
+            ano=info.get("ano"),
+            mes=info.get("mes"),
+            vector_store=carregar_indice(caminho, embeddings_model),
+            indice_lexical=IndiceLexical(lexical) if os.path.exists(lexical) else None
+        ))
+    particoes.sort(key=lambda p: (p.ano is not None, p.ano or 0, p.mes or 0), reverse=True)
+
+    logging.info(
+        f"Índice particionado por '{mapa['criterio']}': {len(particoes)} partições, "
+        f"{sum(p.vector_store.index.ntotal for p in particoes)} vetores."
+    )
+    return particoes
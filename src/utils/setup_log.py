@@ -1,13 +1,75 @@
+import os
+import json
 import logging
 
-def setup_logging():
+
+class FormatadorJSON(logging.Formatter):
+    """
+    Um registro JSON por linha. Registros de spans da telemetria
+    (`src/utils/telemetria.py`) levam também a etapa, a duração e os atributos.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        registro = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+        }
+        if isinstance(getattr(record, "span", None), dict):
+            registro.update(record.span)
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+_ENV_CARREGADO = False
+
+
+def carregar_env():
+    """
+    Carrega o `.env` do diretório atual, uma vez por processo. Chamado pelos pontos
+    de entrada (via `setup_logging`) e pelas fábricas de clientes Azure, nunca ao
+    importar um módulo. Variáveis já definidas no ambiente não são sobrescritas.
+    """
+    global _ENV_CARREGADO
+    if not _ENV_CARREGADO:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _ENV_CARREGADO = True
+
+
+def setup_logging(formato: str = None, nivel: str = None):
+    """
+    Configura o logging da aplicação, depois de carregar o `.env`.
+
+    Os spans da telemetria são registrados em DEBUG: aparecem com `nivel=DEBUG`
+    ou, em qualquer nível, com o formato `json`, feito para coletá-los.
+
+    Args:
+        formato (str, opcional): `texto` (padrão) para a saída legível ou `json` para
+            registros estruturados, um por linha. Por padrão, lido de LOG_FORMATO.
+        nivel (str, opcional): Nível mínimo dos registros (`DEBUG`, `INFO`,
+            `WARNING`...). Por padrão, lido de LOG_NIVEL (`INFO`).
+    """
     import warnings
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format='(%(asctime)s) %(levelname)s ➧ %(message)s',
-        datefmt='%d-%m-%Y %H:%M:%S'
-    )
+    carregar_env()
+    formato = formato or os.getenv("LOG_FORMATO", "texto")
+    nivel = (nivel or os.getenv("LOG_NIVEL", "INFO")).upper()
+    handler = logging.StreamHandler()
+    if formato == "json":
+        handler.setFormatter(FormatadorJSON())
+    else:
+        handler.setFormatter(logging.Formatter(
+            '(%(asctime)s) %(levelname)s ➧ %(message)s',
+            datefmt='%d-%m-%Y %H:%M:%S'
+        ))
+
+    logging.basicConfig(level=nivel, handlers=[handler])
+    if formato == "json":
+        logging.getLogger("telemetria").setLevel(logging.DEBUG)
 
     logging.getLogger("azure.core.pipeline.policies.http_logging_policy").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
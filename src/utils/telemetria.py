@@ -0,0 +1,208 @@
+import time
+import uuid
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Limites (em segundos) dos histogramas de duração
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRICOES = {
+    "fib_etapa_duracao_segundos": "Duração de cada etapa (span) da cadeia RAG, da API e da ingestão.",
+    "fib_etapa_erros_total": "Etapas encerradas com exceção.",
+    "fib_tokens_total": "Tokens enviados ao SLM (entrada) e gerados por ele (saida).",
+    "fib_documentos_recuperados_total": "Documentos entregues ao prompt.",
+    "fib_tokens_economizados_total": "Tokens de contexto evitados ao mesclar chunks sobrepostos e aplicar o orçamento.",
+    "fib_cache_total": "Consultas aos caches de respostas, de embeddings e de páginas, por resultado.",
+    "fib_ingestao_total": "PDFs, páginas e chunks processados pela ingestão, e chunks quase duplicados colapsados.",
+    "fib_respostas_diretas_total": "Perguntas respondidas (hit) ou não (miss) direto pelo índice de tabelas.",
+    "fib_recargas_indice_total": "Novas versões do índice carregadas (ok) ou com falha na carga (erro) em processos em execução.",
+    "fib_http_requisicoes_total": "Requisições HTTP ao Azure OpenAI, pelos clientes compartilhados (sync ou async).",
+    "fib_http_conexoes_total": "Conexões HTTP abertas com o Azure OpenAI; o restante das requisições reaproveitou uma conexão.",
+}
+
+_SPAN_ATUAL = contextvars.ContextVar("span_atual", default=None)
+_LOGGER = logging.getLogger("telemetria")
+
+
+# ------------------------------
+# MÉTRICAS (FORMATO PROMETHEUS)
+# ------------------------------
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RegistroMetricas:
+    """
+    Contadores e histogramas com rótulos, exportados no formato texto do
+    Prometheus (`/metrics` da API). Seguro para uso entre threads.
+    """
+
+    def __init__(self, buckets: tuple = BUCKETS_SEGUNDOS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+
+    @staticmethod
+    def _chave(nome: str, rotulos: dict) -> tuple:
+        return nome, tuple(sorted((k, str(v)) for k, v in rotulos.items()))
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            contagens, soma = self._histogramas.get(chave, ([0] * (len(self.buckets) + 1), 0.0))
+            contagens[bisect.bisect_left(self.buckets, valor)] += 1
+            self._histogramas[chave] = (contagens, soma + valor)
+
+    def valor(self, nome: str, **rotulos) -> float:
+        """Valor de um contador, ou número de observações de um histograma."""
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            if chave in self._histogramas:
+                return sum(self._histogramas[chave][0])
+            return self._contadores.get(chave, 0)
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def exportar(self) -> str:
+        """Gera o texto de exposição do Prometheus (versão 0.0.4)."""
+        def rotulos_texto(rotulos, extra=()):
+            pares = list(rotulos) + list(extra)
+            if not pares:
+                return ""
+            return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted(self._histogramas.items())
+
+        linhas, declarados = [], set()
+        for (nome, rotulos), valor in contadores:
+            if nome not in declarados:
+                declarados.add(nome)
+                linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} counter")
+            linhas.append(f"{nome}{rotulos_texto(rotulos)} {valor}")
+
+        for (nome, rotulos), (contagens, soma) in histogramas:
+            if nome not in declarados:
+                declarados.add(nome)
+                linhas.append(f"# HELP {nome} {DESCRICOES.get(nome, nome)}")
+                linhas.append(f"# TYPE {nome} histogram")
+            acumulado = 0
+            for limite, contagem in zip(list(self.buckets) + ["+Inf"], contagens):
+                acumulado += contagem
+                linhas.append(f"{nome}_bucket{rotulos_texto(rotulos, [('le', str(limite))])} {acumulado}")
+            linhas.append(f"{nome}_sum{rotulos_texto(rotulos)} {soma}")
+            linhas.append(f"{nome}_count{rotulos_texto(rotulos)} {acumulado}")
+        return "\n".join(linhas) + "\n"
+
+
+METRICAS = RegistroMetricas()
+
+# ------------------------------
+# SPANS
+# ------------------------------
+class Span:
+    """
+    Uma etapa cronometrada. Ao ser finalizado, registra a duração em
+    `fib_etapa_duracao_segundos{etapa=...}` e emite um registro de log
+    estruturado com os atributos anotados (tokens, documentos, scores...).
+    """
+
+    def __init__(self, nome: str, atributos: dict = None, pai=None):
+        self.nome = nome
+        self.id = uuid.uuid4().hex[:16]
+        self.pai = pai
+        self.atributos = dict(atributos or {})
+        self.inicio = time.perf_counter()
+        self.duracao = None
+
+    def anotar(self, **atributos):
+        self.atributos.update(atributos)
+
+    def finalizar(self, erro: BaseException = None):
+        if self.duracao is not None:
+            return
+        self.duracao = time.perf_counter() - self.inicio
+        METRICAS.observar("fib_etapa_duracao_segundos", self.duracao, etapa=self.nome)
+        if erro is not None:
+            METRICAS.incrementar("fib_etapa_erros_total", etapa=self.nome)
+            self.atributos["erro"] = f"{type(erro).__name__}: {erro}"
+
+        registro = {
+            "etapa": self.nome,
+            "span_id": self.id,
+            "duracao_ms": round(self.duracao * 1000, 3),
+            **self.atributos,
+        }
+        if self.pai is not None:
+            registro["span_pai"] = self.pai.id
+        _LOGGER.debug(f"span {self.nome} ({registro['duracao_ms']} ms)", extra={"span": registro})
+
+
+@contextmanager
+def span(nome: str, **atributos):
+    """
+    Cronometra o bloco como uma etapa. Spans abertos dentro do bloco (na mesma
+    thread ou tarefa) registram este como pai, e `anotar` grava atributos nele.
+
+    Em geradores, que podem ser retomados em outro contexto, use `iniciar_span`
+    e `Span.finalizar`.
+    """
+    atual = Span(nome, atributos, pai=_SPAN_ATUAL.get())
+    token = _SPAN_ATUAL.set(atual)
+    try:
+        yield atual
+    except BaseException as e:
+        _SPAN_ATUAL.reset(token)
+        atual.finalizar(erro=e)
+        raise
+    _SPAN_ATUAL.reset(token)
+    atual.finalizar()
+
+
+def iniciar_span(nome: str, **atributos) -> Span:
+    """Abre um span sem torná-lo o span atual; encerre com `finalizar()`."""
+    return Span(nome, atributos, pai=_SPAN_ATUAL.get())
+
+
+def anotar(**atributos):
+    """Grava atributos no span atual, se houver."""
+    atual = _SPAN_ATUAL.get()
+    if atual is not None:
+        atual.anotar(**atributos)
+
+# ------------------------------
+# CONTAGEM DE TOKENS
+# ------------------------------
+_CODIFICADOR = {}
+
+def contar_tokens(texto: str) -> int:
+    """
+    Conta tokens com o tiktoken (`o200k_base`, do gpt-4o-mini). Sem o tiktoken
+    ou sem acesso ao arquivo da codificação, estima ~4 caracteres por token.
+    """
+    if "o200k_base" not in _CODIFICADOR:
+        try:
+            import tiktoken
+            _CODIFICADOR["o200k_base"] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logging.warning(f"⚠️ tiktoken indisponível ({type(e).__name__}). Tokens estimados por caracteres.")
+            _CODIFICADOR["o200k_base"] = None
+
+    codificador = _CODIFICADOR["o200k_base"]
+    if codificador is None:
+        return max(1, len(texto) // 4) if texto else 0
+    return len(codificador.encode(texto, disallowed_special=()))
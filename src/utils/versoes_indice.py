@@ -0,0 +1,211 @@
+import os
+import shutil
+import logging
+import argparse
+import threading
+from datetime import datetime
+
+from src.utils.telemetria import METRICAS
+
+PONTEIRO_ARQUIVO = "CURRENT"
+VERSOES_DIR = "versoes"
+SUFIXO_PARCIAL = ".parcial"
+VERSOES_MANTIDAS = 2  # a versão atual e a anterior (rollback e consultas em andamento)
+
+# Arquivos de um índice gravado direto na raiz, antes do versionamento
+_ARQUIVOS_LEGADOS = (
+    "index.faiss", "index.pkl", "docstore.sqlite", "lexical.sqlite", "tabelas.sqlite",
+    "manifesto.json", "particoes.json", "particoes"
+)
+
+# ------------------------------
+# VERSÕES E PONTEIRO
+# ------------------------------
+def versao_atual(raiz: str):
+    """Nome da versão publicada no ponteiro `CURRENT`, ou None (índice sem versões)."""
+    try:
+        with open(os.path.join(raiz, PONTEIRO_ARQUIVO), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def diretorio_atual(raiz: str) -> str:
+    """
+    Diretório do índice em uso: a versão apontada por `CURRENT` ou, em índices
+    gravados antes do versionamento, a própria raiz.
+    """
+    versao = versao_atual(raiz)
+    return os.path.join(raiz, VERSOES_DIR, versao) if versao else raiz
+
+
+def listar_versoes(raiz: str) -> list:
+    """Versões publicadas, da mais antiga para a mais recente."""
+    diretorio = os.path.join(raiz, VERSOES_DIR)
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(n for n in os.listdir(diretorio) if not n.endswith(SUFIXO_PARCIAL))
+
+
+def preparar_versao(raiz: str, base: str = None) -> str:
+    """
+    Cria o diretório de uma nova versão, ainda não publicada, onde a ingestão grava o índice.
+
+    Args:
+        raiz (str): Diretório raiz do índice (ex.: `faiss_index`).
+        base (str, opcional): Diretório de uma versão existente, copiado para a nova
+            (ingestão incremental). Sem base, a versão começa vazia.
+
+    Returns:
+        str: Caminho da nova versão (`versoes/<data-hora>.parcial`).
+    """
+    nome = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    destino = os.path.join(raiz, VERSOES_DIR, nome + SUFIXO_PARCIAL)
+    if base:
+        # Cópia, e não links: o índice de tabelas é alterado no lugar
+        ignorar = shutil.ignore_patterns(VERSOES_DIR, PONTEIRO_ARQUIVO, "*.tmp")
+        shutil.copytree(base, destino, ignore=ignorar)
+    else:
+        os.makedirs(destino)
+    return destino
+
+
+def ativar_versao(raiz: str, nome: str):
+    """Aponta `CURRENT` para uma versão publicada, de forma atômica (temporário + rename)."""
+    if not os.path.isdir(os.path.join(raiz, VERSOES_DIR, nome)):
+        raise FileNotFoundError(f"Versão '{nome}' não encontrada em '{raiz}'.")
+    temporario = os.path.join(raiz, PONTEIRO_ARQUIVO + ".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(nome)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, os.path.join(raiz, PONTEIRO_ARQUIVO))
+
+
+def publicar_versao(raiz: str, diretorio: str) -> str:
+    """
+    Publica uma versão preparada: o diretório perde o sufixo `.parcial` e o
+    ponteiro passa a apontar para ele. Leitores veem a versão anterior ou a
+    nova completa, nunca um índice pela metade.
+
+    Returns:
+        str: Nome da versão publicada.
+    """
+    nome = os.path.basename(diretorio)[:-len(SUFIXO_PARCIAL)]
+    os.replace(diretorio, os.path.join(raiz, VERSOES_DIR, nome))
+    ativar_versao(raiz, nome)
+    logging.info(f"✅ Versão '{nome}' do índice publicada em '{raiz}'.")
+    return nome
+
+
+def coletar_versoes(raiz: str, manter: int = VERSOES_MANTIDAS) -> list:
+    """
+    Apaga as versões antigas, mantendo a atual e as mais recentes até `manter`,
+    além de versões não publicadas (ingestões interrompidas) e arquivos de um
+    índice legado na raiz. Processos que ainda usam uma versão apagada seguem
+    com os arquivos abertos até recarregar.
+
+    Returns:
+        list: Nomes das versões apagadas.
+    """
+    atual = versao_atual(raiz)
+    if atual is None:
+        return []
+
+    diretorio = os.path.join(raiz, VERSOES_DIR)
+    outras = [n for n in listar_versoes(raiz) if n != atual]
+    antigas = outras[:max(len(outras) - (manter - 1), 0)]
+    parciais = [n for n in os.listdir(diretorio) if n.endswith(SUFIXO_PARCIAL)]
+    for nome in antigas + parciais:
+        shutil.rmtree(os.path.join(diretorio, nome), ignore_errors=True)
+
+    for nome in _ARQUIVOS_LEGADOS:
+        caminho = os.path.join(raiz, nome)
+        if os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+        elif os.path.exists(caminho):
+            os.remove(caminho)
+
+    if antigas or parciais:
+        logging.info(f"🗑️ {len(antigas)} versões antigas e {len(parciais)} não publicadas do índice apagadas.")
+    return antigas
+
+# ------------------------------
+# RECARGA EM PROCESSOS EM EXECUÇÃO
+# ------------------------------
+class VigiaIndice:
+    """
+    Observa o ponteiro `CURRENT` em uma thread e, quando uma nova versão é
+    publicada, chama `ao_mudar()` para carregá-la fora do caminho das
+    requisições.
+
+    `ao_mudar` deve montar os novos componentes e só então trocá-los: consultas
+    em andamento terminam com a versão que já estavam usando. Se a carga
+    falhar, a versão em uso continua e uma nova tentativa é feita no próximo
+    intervalo.
+    """
+
+    def __init__(self, raiz: str, ao_mudar, intervalo: float = 30.0):
+        """
+        Args:
+            raiz (str): Diretório raiz do índice.
+            ao_mudar: Callable sem argumentos que carrega a versão atual e a põe em uso.
+            intervalo (float): Segundos entre verificações do ponteiro.
+        """
+        self.raiz = raiz
+        self.ao_mudar = ao_mudar
+        self.intervalo = intervalo
+        self.versao = versao_atual(raiz)
+        self._parar = threading.Event()
+        self._thread = None
+
+    def verificar(self) -> bool:
+        """Recarrega se o ponteiro mudou. Retorna True se uma nova versão entrou em uso."""
+        versao = versao_atual(self.raiz)
+        if versao is None or versao == self.versao:
+            return False
+        try:
+            self.ao_mudar()
+        except Exception as e:
+            METRICAS.incrementar("fib_recargas_indice_total", resultado="erro")
+            logging.warning(f"⚠️ Falha ao carregar a versão '{versao}' do índice ({type(e).__name__}: {e}). Mantendo a versão em uso.")
+            return False
+        self.versao = versao
+        METRICAS.incrementar("fib_recargas_indice_total", resultado="ok")
+        logging.info(f"♻️ Índice recarregado: versão '{versao}' em uso.")
+        return True
+
+    def iniciar(self) -> threading.Thread:
+        def executar():
+            while not self._parar.wait(self.intervalo):
+                self.verificar()
+
+        self._thread = threading.Thread(target=executar, name="vigia-indice", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+if __name__ == "__main__":
+    from src.utils.setup_log import setup_logging
+
+    setup_logging()
+    parser = argparse.ArgumentParser(description="Versões do índice FAISS.")
+    parser.add_argument("raiz", nargs="?", default="faiss_index")
+    parser.add_argument("--ativar", metavar="VERSAO", help="Aponta o índice para uma versão publicada (rollback).")
+    parser.add_argument("--coletar", action="store_true", help="Apaga as versões antigas.")
+    parser.add_argument("--manter", type=int, default=VERSOES_MANTIDAS, help="Versões mantidas pela coleta.")
+    args = parser.parse_args()
+
+    if args.ativar:
+        ativar_versao(args.raiz, args.ativar)
+        logging.info(f"✅ Versão '{args.ativar}' ativada.")
+    if args.coletar:
+        coletar_versoes(args.raiz, args.manter)
+    atual = versao_atual(args.raiz)
+    for nome in listar_versoes(args.raiz):
+        logging.info(f"{'*' if nome == atual else ' '} {nome}")
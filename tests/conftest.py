@@ -0,0 +1,61 @@
+import os
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.pipelines import pipeline_ingestao as modulo
+
+
+@pytest.fixture
+def ambiente_ingestao(tmp_path, monkeypatch):
+    """Executa o pipeline em um diretório temporário, com embeddings e extração falsos."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("dados_rpm")
+
+    modelo = DeterministicFakeEmbedding(size=8)
+    monkeypatch.setattr(modulo, "get_azure_embeddings", lambda: modelo)
+    monkeypatch.setenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME", "modelo")
+
+    def processar_falso(data_path, chunk_size, chunk_overlap, arquivos=None, **kwargs):
+        chunks = []
+        for caminho in arquivos:
+            conteudo = open(caminho, encoding="utf-8").read()
+            for i, parte in enumerate(conteudo.split("|")):
+                chunks.append(Document(page_content=parte, metadata={"source": caminho, "page": i}))
+        return chunks
+
+    monkeypatch.setattr(modulo, "processar_dados", processar_falso)
+
+    def escrever_pdf(nome, conteudo):
+        """Grava um 'PDF' de texto cujas partes separadas por '|' viram chunks."""
+        with open(os.path.join("dados_rpm", nome), "w", encoding="utf-8") as f:
+            f.write(conteudo)
+
+    return escrever_pdf
+
+
+@pytest.fixture
+def agente_offline(tmp_path, monkeypatch):
+    """
+    Prepara um índice FAISS pequeno em um diretório temporário e substitui os
+    clientes Azure do agente por embeddings e SLM falsos.
+    """
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.language_models import FakeListChatModel
+    from src.agente import agente
+
+    monkeypatch.chdir(tmp_path)
+    modelo = DeterministicFakeEmbedding(size=16)
+    textos = [
+        "A projeção do IPCA para 2025 é de 4,8%.",
+        "O Copom manteve a taxa Selic em 15% ao ano.",
+        "O câmbio apresentou volatilidade elevada no trimestre.",
+        "O PIB cresceu 0,4% no segundo trimestre.",
+    ]
+    metadatas = [{"source": "dados_rpm/RPM_Dez_2024.pdf", "page": i} for i in range(len(textos))]
+    FAISS.from_texts(textos, modelo, metadatas=metadatas).save_local("faiss_index")
+
+    slm = FakeListChatModel(responses=["A projeção do IPCA para 2025 é de 4,8%."])
+    monkeypatch.setattr(agente, "get_azure_embeddings", lambda: modelo)
+    monkeypatch.setattr(agente, "get_azure_slm", lambda: slm)
+    return agente
@@ -0,0 +1,64 @@
+def test_invoke_retorna_resposta_e_fontes(agente_offline):
+    """Testa se a cadeia RAG retorna a resposta completa e os documentos de origem."""
+    rag_chain = agente_offline.create_rag_chain()
+
+    resposta = rag_chain.invoke("Qual a projeção do IPCA para 2025?")
+
+    assert resposta["result"] == "A projeção do IPCA para 2025 é de 4,8%."
+    assert len(resposta["source_documents"]) == 3
+
+    print("✅ SUCESSO: Cadeia RAG respondeu com fontes.")
+
+
+def test_stream_entrega_fontes_antes_dos_tokens(agente_offline):
+    """Testa se o streaming entrega as referências primeiro e depois os tokens."""
+    rag_chain = agente_offline.create_rag_chain()
+
+    partes = list(rag_chain.stream("Qual a projeção do IPCA para 2025?"))
+
+    assert "source_documents" in partes[0]
+    assert all("source_documents" not in p for p in partes[1:])
+    assert len(partes) > 2, "❌ ERRO: Resposta não foi entregue em pedaços."
+    assert "".join(p.get("result", "") for p in partes) == "A projeção do IPCA para 2025 é de 4,8%."
+
+    print(f"✅ SUCESSO: Resposta entregue em {len(partes)} pedaços.")
+
+
+def test_stream_com_cache(agente_offline):
+    """Testa se o cache armazena a resposta transmitida e a devolve em um pedaço."""
+    rag_chain = agente_offline.create_rag_chain(usar_cache=True)
+
+    transmitida = "".join(p.get("result", "") for p in rag_chain.stream("Qual a Selic?"))
+    partes_cache = list(rag_chain.stream("Qual a Selic?"))
+
+    assert len(partes_cache) == 1
+    assert partes_cache[0]["result"] == transmitida
+    assert len(partes_cache[0]["source_documents"]) == 3
+
+    print("✅ SUCESSO: Resposta transmitida foi armazenada no cache.")
+
+
+def test_miss_do_cache_embeda_a_pergunta_uma_vez(agente_offline, monkeypatch):
+    """Testa se o retriever reaproveita o embedding da pergunta calculado pelo cache."""
+    from langchain_core.embeddings import Embeddings
+
+    modelo = agente_offline.get_azure_embeddings()
+    consultas = []
+
+    class EmbeddingsContador(Embeddings):
+        def embed_documents(self, texts):
+            return modelo.embed_documents(texts)
+
+        def embed_query(self, text):
+            consultas.append(text)
+            return modelo.embed_query(text)
+
+    monkeypatch.setattr(agente_offline, "get_azure_embeddings", lambda: EmbeddingsContador())
+    rag_chain = agente_offline.create_rag_chain(usar_cache=True)
+
+    resposta = rag_chain.invoke("Qual a Selic?")
+
+    assert len(resposta["source_documents"]) == 3
+    assert consultas == ["Qual a Selic?"], f"❌ ERRO: Pergunta embedada {len(consultas)} vezes em um miss."
+
+    print("✅ SUCESSO: Miss do cache custou uma chamada de embedding.")
@@ -0,0 +1,78 @@
+import asyncio
+
+from aiohttp.test_utils import TestServer, TestClient
+from langchain_core.embeddings import Embeddings
+
+from src.api.servidor import ServicoRAG, criar_app
+from tests.test_versoes_indice import IndiceFalso
+
+
+class EmbeddingsContadores(Embeddings):
+    """Repassa para outro modelo de embeddings registrando o tamanho de cada chamada."""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.chamadas = []
+
+    def embed_documents(self, texts):
+        self.chamadas.append(len(texts))
+        return self.modelo.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_consultas_simultaneas_em_um_lote(agente_offline):
+    """Testa se consultas simultâneas geram um único embedding e mantêm as fontes corretas."""
+    componentes = agente_offline.carregar_componentes()
+    # A API recupera os mesmos documentos que o retriever da cadeia RAG
+    retriever = agente_offline.criar_retriever(componentes)
+    perguntas = [f"Pergunta {i} sobre o IPCA" for i in range(20)]
+    esperado = {p: [d.page_content for d in retriever.invoke(p)] for p in perguntas}
+    componentes.embeddings_model = EmbeddingsContadores(componentes.embeddings_model)
+
+    async def executar():
+        async with TestClient(TestServer(criar_app(componentes, janela_ms=50))) as cliente:
+            async def perguntar(pergunta):
+                resposta = await cliente.post("/perguntar", json={"pergunta": pergunta})
+                assert resposta.status == 200
+                return pergunta, await resposta.json()
+
+            resultados = await asyncio.gather(*(perguntar(p) for p in perguntas))
+            estatisticas = await (await cliente.get("/estatisticas")).json()
+            invalida = await cliente.post("/perguntar", json={"texto": "?"})
+            return resultados, estatisticas, invalida.status
+
+    resultados, estatisticas, status_invalida = asyncio.run(executar())
+    chamadas = componentes.embeddings_model.chamadas
+
+    assert chamadas == [20], f"❌ ERRO: Esperado um lote com 20 perguntas, obtido {chamadas}."
+    for pergunta, corpo in resultados:
+        assert corpo["result"] == "A projeção do IPCA para 2025 é de 4,8%."
+        assert [d["page_content"] for d in corpo["source_documents"]] == esperado[pergunta]
+    assert estatisticas["lotes"] == 1 and estatisticas["respostas"] == 20
+    assert status_invalida == 400
+
+    print(f"✅ SUCESSO: 20 consultas simultâneas atendidas com {len(chamadas)} chamada de embedding.")
+
+
+def test_troca_fecha_componentes_anteriores(agente_offline):
+    """Testa se a API fecha os componentes substituídos só depois das perguntas que já os usavam."""
+    anteriores, novos = agente_offline.carregar_componentes(), agente_offline.carregar_componentes()
+    anteriores.indice_tabelas, novos.indice_tabelas = IndiceFalso(), IndiceFalso()
+    servico = ServicoRAG(anteriores, janela_ms=20)
+
+    async def executar():
+        em_andamento = asyncio.create_task(servico.responder("Qual a projeção do IPCA?"))
+        await asyncio.sleep(0)
+        servico.trocar_componentes(novos)
+        fechado_na_troca = anteriores.fechado
+        return fechado_na_troca, await em_andamento, await servico.responder("E da Selic?")
+
+    fechado_na_troca, resposta, seguinte = asyncio.run(executar())
+
+    assert not fechado_na_troca, "❌ ERRO: Componentes fechados com uma pergunta em andamento."
+    assert resposta["result"] == seguinte["result"] == "A projeção do IPCA para 2025 é de 4,8%."
+    assert anteriores.fechado and anteriores.indice_tabelas.fechado and not novos.fechado
+
+    print("✅ SUCESSO: Componentes substituídos fechados depois da pergunta em andamento.")
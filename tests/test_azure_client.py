@@ -0,0 +1,156 @@
+import sys
+import json
+import asyncio
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils import azure_client
+from src.utils.telemetria import METRICAS
+
+
+class AzureFalso(BaseHTTPRequestHandler):
+    """Responde como o Azure OpenAI (embeddings e chat) e conta as conexões abertas."""
+
+    protocol_version = "HTTP/1.1"
+    conexoes = 0
+
+    def setup(self):
+        super().setup()
+        type(self).conexoes += 1
+
+    def do_POST(self):
+        pedido = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.split("?")[0].endswith("/embeddings"):
+            entradas = pedido["input"] if isinstance(pedido["input"], list) else [pedido["input"]]
+            corpo = {
+                "object": "list", "model": "falso", "usage": {"prompt_tokens": 1, "total_tokens": 1},
+                "data": [{"object": "embedding", "index": i, "embedding": [0.1, 0.2, 0.3]} for i in range(len(entradas))],
+            }
+        else:
+            corpo = {
+                "id": "falso", "object": "chat.completion", "created": 0, "model": "falso",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "4,8%"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        dados = json.dumps(corpo).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def azure_falso(monkeypatch):
+    """Sobe o Azure falso em uma porta local e aponta os clientes para ele."""
+    AzureFalso.conexoes = 0
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), AzureFalso)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", f"http://127.0.0.1:{servidor.server_address[1]}")
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "chave-falsa")
+    monkeypatch.setenv("AZURE_OPENAI_API_VERSION", "2024-06-01")
+    monkeypatch.setenv("AZURE_OPENAI_DEPLOYMENT", "slm")
+    monkeypatch.setenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME", "embeddings")
+    monkeypatch.setattr(azure_client, "_CONFIG_HTTP", {})
+    azure_client.registrar_clientes()
+    azure_client.fechar_clientes_http()
+    METRICAS.limpar()
+    yield servidor
+    azure_client.fechar_clientes_http()
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def embeddings_sem_tokenizador():
+    # Sem o tiktoken (baixado da internet), o texto vai direto para a API
+    modelo = azure_client.get_azure_embeddings()
+    modelo.check_embedding_ctx_length = False
+    return modelo
+
+
+def test_clientes_compartilham_conexoes(azure_falso):
+    """Testa se clientes criados em pontos diferentes reaproveitam a mesma conexão."""
+    for _ in range(3):
+        assert embeddings_sem_tokenizador().embed_query("IPCA") == [0.1, 0.2, 0.3]
+        assert azure_client.get_azure_slm().invoke("Qual a projeção do IPCA?").content == "4,8%"
+
+    async def perguntar():
+        slm = azure_client.get_azure_slm()
+        respostas = await asyncio.gather(*(slm.ainvoke("Qual a projeção do IPCA?") for _ in range(4)))
+        respostas += [await slm.ainvoke("E da Selic?") for _ in range(3)]
+        return respostas
+
+    # Cada event loop tem seu pool; dentro dele, as conexões são reaproveitadas
+    assert all(r.content == "4,8%" for r in asyncio.run(perguntar()))
+    assert all(r.content == "4,8%" for r in asyncio.run(perguntar()))
+
+    assert METRICAS.valor("fib_http_requisicoes_total", cliente="sync") == 6
+    assert METRICAS.valor("fib_http_conexoes_total", cliente="sync") == 1, "❌ ERRO: Requisições síncronas abriram conexões novas."
+    assert METRICAS.valor("fib_http_requisicoes_total", cliente="async") == 14
+    assert METRICAS.valor("fib_http_conexoes_total", cliente="async") <= 8
+    assert AzureFalso.conexoes == 1 + METRICAS.valor("fib_http_conexoes_total", cliente="async")
+    assert "fib_http_conexoes_total" in METRICAS.exportar()
+
+    print(f"✅ SUCESSO: 20 requisições ao Azure falso em {AzureFalso.conexoes} conexões.")
+
+
+def test_configuracao_do_pool(azure_falso):
+    """Testa se o tamanho do pool e os timeouts configurados chegam ao cliente HTTP."""
+    padrao = azure_client.cliente_http()
+    azure_client.configurar_http(max_conexoes=2, timeout_segundos=7)
+    cliente = azure_client.cliente_http()
+    assert padrao.is_closed, "❌ ERRO: Cliente HTTP substituído continuou aberto."
+    assert cliente is azure_client.get_azure_slm().http_client
+    assert cliente.timeout.read == 7 and cliente.timeout.connect == 5
+    assert cliente._transport._pool._max_connections == 2
+
+    # A API garante uma conexão por chamada ao SLM em voo, sem reduzir limites maiores
+    azure_client.garantir_conexoes(68)
+    assert cliente.is_closed and azure_client.cliente_http()._transport._pool._max_connections == 68
+    assert azure_client.configuracao_http()["conexoes_ociosas"] == 68
+    atual = azure_client.cliente_http()
+    azure_client.garantir_conexoes(8)
+    assert azure_client.cliente_http() is atual and not atual.is_closed
+
+    with pytest.raises(ValueError):
+        azure_client.configurar_http(conexoes=3)
+
+    print("✅ SUCESSO: Pool e timeouts configuráveis.")
+
+
+def test_reconfiguracao_fecha_pool_assincrono(azure_falso):
+    """Testa se reconfigurar o HTTP fecha as conexões assíncronas abertas no event loop em uso."""
+    async def perguntar_e_reconfigurar():
+        slm = azure_client.get_azure_slm()
+        assert (await slm.ainvoke("Qual a projeção do IPCA?")).content == "4,8%"
+        pool = azure_client._CLIENTES_HTTP["transporte_async"]._pools[asyncio.get_running_loop()]
+        assert pool._pool.connections, "❌ ERRO: Nenhuma conexão assíncrona mantida no pool."
+
+        azure_client.configurar_http(timeout_segundos=30)
+        await asyncio.sleep(0.05)
+        return pool._pool.connections
+
+    assert asyncio.run(perguntar_e_reconfigurar()) == [], "❌ ERRO: Pool assíncrono substituído continuou com conexões abertas."
+    assert "transporte_async" not in azure_client._CLIENTES_HTTP
+
+    print("✅ SUCESSO: Conexões assíncronas fechadas ao reconfigurar o HTTP.")
+
+
+def test_env_carregado_so_ao_criar_clientes():
+    """Testa se importar o módulo não lê o `.env`, carregado uma única vez ao configurar os clientes."""
+    codigo = (
+        "import dotenv; chamadas = []; dotenv.load_dotenv = lambda *a, **k: chamadas.append(1); "
+        "from src.utils import azure_client; print(len(chamadas)); "
+        "azure_client.configuracao_http(); azure_client.configuracao_http(); print(len(chamadas))"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+
+    assert saida.stdout.split() == ["0", "1"], f"❌ ERRO: Leituras do `.env` inesperadas: {saida.stdout.split()}"
+
+    print("✅ SUCESSO: `.env` lido na configuração dos clientes, e não na importação.")
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
+from src.utils.indice_faiss import carregar_indice
+from src.utils.versoes_indice import diretorio_atual
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
@@ -42,11 +43,7 @@ def test_rag_chain_creation():
         embeddings_model = get_azure_embeddings()
         llm = get_azure_slm()
 
-        vectorstore = FAISS.load_local(
-            VECTORSTORE_PATH,
-            embeddings_model,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = carregar_indice(diretorio_atual(VECTORSTORE_PATH), embeddings_model)
 
         retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
 
@@ -100,11 +97,7 @@ def test_rag_bot_response():
         embeddings_model = get_azure_embeddings()
         llm = get_azure_slm()
 
-        vectorstore = FAISS.load_local(
-            VECTORSTORE_PATH,
-            embeddings_model,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = carregar_indice(diretorio_atual(VECTORSTORE_PATH), embeddings_model)
 
         retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
 
@@ -0,0 +1,57 @@
+from src.utils.cache_embeddings import CacheEmbeddings
+from src.pipelines.pipeline_ingestao import gerar_embeddings
+
+
+class EmbeddingsContador:
+    """Modelo de embeddings falso que conta as chamadas à 'API'."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def embed_documents(self, textos):
+        self.chamadas += 1
+        return [[float(len(t)), 1.0, 0.5] for t in textos]
+
+
+def test_cache_persiste_entre_execucoes(tmp_path):
+    """Testa se os embeddings gravados são recuperados em uma nova instância do cache."""
+    caminho = str(tmp_path / "embeddings.sqlite")
+
+    cache = CacheEmbeddings(caminho, deployment="modelo-a")
+    cache.salvar(["texto um"], [[0.25, 0.5, 0.75]])
+    cache.fechar()
+
+    cache = CacheEmbeddings(caminho, deployment="modelo-a")
+    assert cache.buscar(["texto um", "texto dois"]) == [[0.25, 0.5, 0.75], None]
+    assert cache.hits == 1 and cache.misses == 1
+
+    print("✅ SUCESSO: Cache de embeddings persistido em disco.")
+
+
+def test_cache_separa_deployments(tmp_path):
+    """Testa se a chave do cache inclui o nome do deployment de embedding."""
+    caminho = str(tmp_path / "embeddings.sqlite")
+
+    CacheEmbeddings(caminho, deployment="modelo-a").salvar(["texto"], [[1.0]])
+    cache_b = CacheEmbeddings(caminho, deployment="modelo-b")
+
+    assert cache_b.buscar(["texto"]) == [None], "❌ ERRO: Cache reaproveitado entre deployments."
+
+    print("✅ SUCESSO: Deployments diferentes não compartilham embeddings.")
+
+
+def test_gerar_embeddings_evita_chamadas(tmp_path):
+    """Testa se chunks já embedados não geram novas chamadas à API."""
+    cache = CacheEmbeddings(str(tmp_path / "embeddings.sqlite"), deployment="modelo-a")
+    modelo = EmbeddingsContador()
+    textos = ["a" * 10, "b" * 20, "a" * 10]
+
+    primeira = gerar_embeddings(textos, modelo, batch_size=25, cache=cache)
+    assert modelo.chamadas == 1
+
+    segunda = gerar_embeddings(textos + ["c" * 5], modelo, batch_size=25, cache=cache)
+    assert modelo.chamadas == 2, "❌ ERRO: Chunks em cache foram reenviados à API."
+    assert segunda[:3] == primeira
+    assert segunda[3] == [5.0, 1.0, 0.5]
+
+    print("✅ SUCESSO: Embeddings em cache reaproveitados sem chamar a API.")
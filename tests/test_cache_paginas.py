@@ -0,0 +1,68 @@
+from benchmarks.corpus_sintetico import escrever_pdf
+from src.pipelines import processar_dados as modulo
+from src.pipelines.cache_paginas import CachePaginas
+
+
+def escrever_relatorios(diretorio, n=2):
+    for i in range(n):
+        paginas = [
+            [f"Relatorio {i} pagina {p} linha {l} sobre inflacao, juros e atividade." for l in range(8)]
+            for p in range(3)
+        ]
+        escrever_pdf(str(diretorio / f"RPM_{i}.pdf"), paginas)
+
+
+def test_cache_paginas_evita_nova_extracao(tmp_path, monkeypatch):
+    """Testa se PDFs já extraídos saem do cache com os mesmos chunks e metadados, sem nova extração."""
+    escrever_relatorios(tmp_path)
+    cache = CachePaginas(str(tmp_path / "paginas.sqlite"))
+
+    sem_cache = modulo.processar_dados(str(tmp_path), 300, 50)
+    primeira = modulo.processar_dados(str(tmp_path), 300, 50, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    def extracao_proibida(pdf_files, *args):
+        assert not pdf_files, "❌ ERRO: PDFs em cache foram extraídos novamente."
+        return iter(())
+
+    monkeypatch.setattr(modulo, "_extrair_serial", extracao_proibida)
+    segunda = modulo.processar_dados(str(tmp_path), 300, 50, cache=cache)
+
+    assert len(sem_cache) > 0 and cache.hits == 2
+    for chunks in (primeira, segunda):
+        assert [d.page_content for d in chunks] == [d.page_content for d in sem_cache]
+        assert [d.metadata for d in chunks] == [d.metadata for d in sem_cache]
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas["pdfs"] == 2 and estatisticas["paginas"] == 6
+    cache.fechar()
+
+    print(f"✅ SUCESSO: {len(segunda)} chunks gerados a partir do cache de páginas.")
+
+
+def test_cache_paginas_invalidacao(tmp_path):
+    """Testa a invalidação por conteúdo do PDF, por versão do extrator e por comando."""
+    escrever_relatorios(tmp_path)
+    caminho = str(tmp_path / "paginas.sqlite")
+    cache = CachePaginas(caminho, versao="v1")
+    modulo.processar_dados(str(tmp_path), 300, 50, cache=cache)
+
+    # Conteúdo alterado: o hash muda e o PDF deixa de estar no cache
+    escrever_pdf(str(tmp_path / "RPM_1.pdf"), [["Pagina nova com outro texto sobre o cambio e o credito." * 3]])
+    assert cache.contem(str(tmp_path / "RPM_0.pdf"))
+    assert not cache.contem(str(tmp_path / "RPM_1.pdf"))
+    cache.fechar()
+
+    # Outra versão do extrator não reaproveita as páginas da anterior
+    cache = CachePaginas(caminho, versao="v2")
+    assert not cache.contem(str(tmp_path / "RPM_0.pdf"))
+    modulo.processar_dados(str(tmp_path), 300, 50, cache=cache)
+    assert cache.estatisticas()["pdfs_outras_versoes"] == 2
+
+    assert cache.invalidar(outras_versoes=True) == 2
+    assert cache.invalidar(["RPM_0.pdf"]) == 1
+    assert cache.estatisticas()["pdfs"] == 1
+    assert cache.invalidar() == 1 and cache.estatisticas()["pdfs"] == 0
+    cache.fechar()
+
+    print("✅ SUCESSO: Cache de páginas invalidado por conteúdo, versão e comando.")
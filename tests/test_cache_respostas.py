@@ -0,0 +1,118 @@
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import RunnableLambda
+
+from src.agente.cache_respostas import CacheRespostas
+
+
+class EmbeddingsPalavras(Embeddings):
+    """Embeddings de saco de palavras: perguntas parecidas geram vetores próximos."""
+
+    VOCABULARIO = ["ipca", "selic", "projeção", "2025", "2026", "câmbio", "qual", "a", "do", "para"]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        palavras = text.lower().replace("?", "").split()
+        return [float(palavras.count(p)) for p in self.VOCABULARIO] + [0.01]
+
+
+def _cadeia_contadora():
+    chamadas = []
+
+    def responder(pergunta):
+        chamadas.append(pergunta)
+        return {
+            "result": f"resposta para {pergunta}",
+            "source_documents": [Document(page_content="trecho", metadata={"source": "RPM_Dez_2024.pdf", "page": 3})],
+        }
+
+    return RunnableLambda(responder), chamadas
+
+
+def test_hits_exatos_e_semanticos(tmp_path):
+    """Testa se perguntas repetidas ou quase idênticas não chamam a cadeia novamente."""
+    cache = CacheRespostas(str(tmp_path / "respostas.sqlite"), EmbeddingsPalavras(), versao="v1", limiar=0.8)
+    cadeia, chamadas = _cadeia_contadora()
+    cadeia_com_cache = cache.envolver(cadeia)
+
+    primeira = cadeia_com_cache.invoke("Qual a projeção do IPCA para 2025?")
+    exata = cadeia_com_cache.invoke("  qual a projeção do ipca para 2025 ")
+    semantica = cadeia_com_cache.invoke("Projeção do IPCA para 2025")
+    outra = cadeia_com_cache.invoke("Qual a Selic para 2026?")
+
+    assert len(chamadas) == 2
+    assert exata["result"] == semantica["result"] == primeira["result"]
+    assert semantica["source_documents"][0].metadata["page"] == 3
+    assert outra["result"] == "resposta para Qual a Selic para 2026?"
+    assert cache.metricas == {"hits_exatos": 1, "hits_semanticos": 1, "misses": 2}
+
+    print(f"✅ SUCESSO: Cache de respostas ({cache.resumo()}).")
+
+
+def test_invalidacao_por_versao_ttl_e_lru(tmp_path):
+    """Testa a invalidação pela versão do índice, o TTL e o limite de entradas."""
+    caminho = str(tmp_path / "respostas.sqlite")
+    resposta = {"result": "ok", "source_documents": []}
+
+    cache = CacheRespostas(caminho, EmbeddingsPalavras(), versao="v1", max_entradas=2)
+    cache.salvar("ipca", resposta)
+    cache.salvar("selic", resposta)
+    cache.salvar("câmbio", resposta)
+    assert cache.buscar("ipca")[0] is None, "❌ ERRO: LRU deveria ter descartado a entrada mais antiga."
+    assert cache.buscar("câmbio")[0] is not None
+    cache.fechar()
+
+    cache = CacheRespostas(caminho, EmbeddingsPalavras(), versao="v2")
+    assert cache.buscar("câmbio")[0] is None, "❌ ERRO: Nova versão do índice deveria invalidar o cache."
+
+    cache = CacheRespostas(caminho, EmbeddingsPalavras(), versao="v2", ttl=0.05)
+    cache.salvar("selic", resposta)
+    time.sleep(0.1)
+    assert cache.buscar("selic")[0] is None, "❌ ERRO: Entrada expirada retornada."
+
+    print("✅ SUCESSO: Cache invalidado por versão, TTL e LRU.")
+
+
+def test_sem_hit_semantico_entre_anos(tmp_path):
+    """Testa se perguntas que só diferem no ano não reaproveitam a resposta uma da outra."""
+    cache = CacheRespostas(str(tmp_path / "respostas.sqlite"), EmbeddingsPalavras(), versao="v1", limiar=0.5)
+    cadeia, chamadas = _cadeia_contadora()
+    cadeia_com_cache = cache.envolver(cadeia)
+
+    cadeia_com_cache.invoke("Projeção do IPCA para 2025")
+    resposta = cadeia_com_cache.invoke("Projeção do IPCA para 2026")
+    cadeia_com_cache.invoke("Qual a projeção do IPCA para 2026?")
+
+    assert resposta["result"] == "resposta para Projeção do IPCA para 2026", "❌ ERRO: Resposta de outro ano servida pelo cache."
+    assert len(chamadas) == 2
+    assert cache.metricas == {"hits_exatos": 0, "hits_semanticos": 1, "misses": 2}
+
+    print("✅ SUCESSO: Hits semânticos exigem os mesmos anos e valores.")
+
+
+def test_salvar_atualiza_a_matriz_sem_recarregar(tmp_path, monkeypatch):
+    """Testa se `salvar` anexa, substitui e descarta linhas sem reler o cache inteiro."""
+    caminho = str(tmp_path / "respostas.sqlite")
+    resposta = {"result": "ok", "source_documents": []}
+    cache = CacheRespostas(caminho, EmbeddingsPalavras(), versao="v1", max_entradas=3)
+
+    def recarregar():
+        raise AssertionError("❌ ERRO: salvar releu todos os vetores do cache.")
+
+    monkeypatch.setattr(cache, "_carregar_vetores", recarregar)
+    for pergunta in ("ipca 2025", "selic 2026", "câmbio", "selic 2026", "projeção do ipca"):
+        cache.salvar(pergunta, resposta)
+        time.sleep(0.01)
+
+    novo = CacheRespostas(caminho, EmbeddingsPalavras(), versao="v1")
+    em_memoria = dict(zip(cache._chaves, cache._matriz.tolist()))
+    assert len(cache._chaves) == len(cache._numeros) == len(cache._matriz) == 3
+    assert em_memoria == dict(zip(novo._chaves, novo._matriz.tolist())), "❌ ERRO: Matriz em memória divergiu do SQLite."
+    assert cache.buscar("ipca 2025")[0] is None, "❌ ERRO: Entrada descartada pelo LRU continua na matriz."
+    assert cache.buscar("Projeção do IPCA")[0] is not None
+
+    print("✅ SUCESSO: Matriz do cache atualizada de forma incremental.")
@@ -0,0 +1,50 @@
+import os
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.pipelines import pipeline_ingestao as modulo
+from src.utils.indice_faiss import carregar_indice
+from src.pipelines.checkpoint import CheckpointIngestao
+from src.utils.versoes_indice import diretorio_atual
+
+
+class QuedaSimulada(BaseException):
+    """Simula a queda do processo no meio da geração de embeddings."""
+
+
+class EmbeddingsQueCaem(DeterministicFakeEmbedding):
+    """Embeddings falsos que derrubam o processo após `limite` chamadas."""
+
+    limite: int = 1_000_000
+    chamadas: int = 0
+
+    def embed_documents(self, texts):
+        self.chamadas += 1
+        if self.chamadas > self.limite:
+            raise QuedaSimulada()
+        return super().embed_documents(texts)
+
+
+def test_resume_continua_do_checkpoint(ambiente_ingestao, monkeypatch):
+    """Testa se --resume reaproveita os batches concluídos antes da queda."""
+    ambiente_ingestao("RPM_A.pdf", "|".join(f"trecho {i}" for i in range(100)))
+
+    modelo = EmbeddingsQueCaem(size=8, limite=2)
+    monkeypatch.setattr(modulo, "get_azure_embeddings", lambda: modelo)
+
+    with pytest.raises(QuedaSimulada):
+        modulo.pipeline_ingestao()
+
+    # Sem o cache de embeddings, apenas o checkpoint pode evitar o retrabalho
+    os.remove("cache/embeddings.sqlite")
+    modelo_retomada = EmbeddingsQueCaem(size=8)
+    monkeypatch.setattr(modulo, "get_azure_embeddings", lambda: modelo_retomada)
+
+    modulo.pipeline_ingestao(retomar=True)
+
+    vector_store = carregar_indice(diretorio_atual("faiss_index"), DeterministicFakeEmbedding(size=8))
+    assert vector_store.index.ntotal == 100
+    assert modelo_retomada.chamadas == 2, "❌ ERRO: Batches concluídos foram refeitos."
+    assert not CheckpointIngestao("cache/checkpoint_ingestao", "").existe(), "❌ ERRO: Checkpoint não foi removido."
+
+    print("✅ SUCESSO: Ingestão retomada a partir do checkpoint.")
@@ -0,0 +1,52 @@
+from langchain_core.documents import Document
+
+from src.agente.contexto import mesclar_trechos, montar_contexto, sobreposicao
+from src.pipelines.processar_dados import criar_text_splitter
+
+PAGINA = " ".join(
+    f"O Copom avaliou na frase {i} a trajetória da inflação, da Selic e das expectativas para {2020 + i % 8}."
+    for i in range(40)
+)
+
+
+def _chunks(source="dados_rpm/RPM_Dez_2024.pdf", page=3):
+    pagina = Document(page_content=PAGINA, metadata={"source": source, "page": page})
+    return criar_text_splitter(400, 100).split_documents([pagina])
+
+
+def test_mescla_chunks_sobrepostos():
+    """Testa a mescla de chunks consecutivos da mesma página e o descarte de repetições."""
+    chunks = _chunks()
+    assert sobreposicao(chunks[0].page_content, chunks[1].page_content) > 0
+    assert sobreposicao(chunks[0].page_content, chunks[5].page_content) == 0
+
+    # Chunks 1 e 3 chegam antes do 2, que os liga; o 1 repetido em outra página é descartado
+    repetido = Document(page_content=chunks[1].page_content, metadata={"source": "dados_rpm/RPM_Mar_2024.pdf", "page": 9})
+    outra_pagina = _chunks(page=4)[0]
+    trechos = mesclar_trechos([chunks[3], chunks[1], outra_pagina, chunks[2], repetido])
+
+    assert len(trechos) == 2, f"❌ ERRO: Esperados 2 trechos, obtidos {len(trechos)}."
+    continuo = trechos[0].texto
+    assert continuo in PAGINA and continuo.startswith(chunks[1].page_content) and continuo.endswith(chunks[3].page_content)
+    assert len(trechos[0].documentos) == 4
+
+    print("✅ SUCESSO: Chunks sobrepostos mesclados em um trecho contínuo.")
+
+
+def test_orcamento_de_tokens():
+    """Testa o orçamento de tokens do contexto e a contagem de tokens economizados."""
+    chunks = _chunks()
+    docs = [chunks[0], chunks[1], chunks[6]]
+
+    completo = montar_contexto(docs)
+    assert completo.tokens_economizados > 0, "❌ ERRO: Sobreposição não removida do contexto."
+    assert completo.documentos == docs
+
+    limitado = montar_contexto(docs, max_tokens=completo.tokens - 10)
+    assert limitado.tokens <= completo.tokens - 10
+    assert limitado.documentos == [chunks[0], chunks[1]], "❌ ERRO: Trecho menos relevante deveria ter saído."
+
+    cortado = montar_contexto(docs, max_tokens=20)
+    assert 0 < cortado.tokens <= 20 and cortado.documentos == [chunks[0], chunks[1]]
+
+    print(f"✅ SUCESSO: Contexto empacotado com {completo.tokens_economizados} tokens economizados.")
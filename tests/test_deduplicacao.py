@@ -0,0 +1,78 @@
+import os
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.pipelines import pipeline_ingestao as modulo
+from src.pipelines.deduplicacao import deduplicar, economia
+from src.pipelines.manifesto import carregar_manifesto
+from src.utils.indice_faiss import carregar_indice
+from src.utils.versoes_indice import diretorio_atual
+
+METODOLOGIA = (
+    "Box metodológico: as projeções apresentadas neste relatório são condicionais a hipóteses sobre a "
+    "trajetória da taxa Selic e do câmbio e não representam compromisso do Comitê de Política Monetária "
+    "com qualquer valor específico, servindo apenas como referência para as decisões de política {}."
+)
+
+
+def documentos_do_indice():
+    vector_store = carregar_indice(diretorio_atual("faiss_index"), DeterministicFakeEmbedding(size=8))
+    return [vector_store.docstore.search(i) for i in vector_store.index_to_docstore_id.values()]
+
+
+def test_deduplicar_quase_duplicatas():
+    """Testa se cópias quase idênticas viram um único chunk com as referências de todas."""
+    chunks = [
+        Document(page_content=METODOLOGIA.format("monetária"), metadata={"source": "dados_rpm/RPM_A.pdf", "page": 1}),
+        Document(page_content="O PIB cresceu 0,4% no trimestre.", metadata={"source": "dados_rpm/RPM_A.pdf", "page": 2}),
+        Document(page_content=METODOLOGIA.format("monetaria."), metadata={"source": "dados_rpm/RPM_B.pdf", "page": 3}),
+        Document(page_content=METODOLOGIA[:150] + " no horizonte relevante.", metadata={"source": "dados_rpm/RPM_B.pdf", "page": 4}),
+    ]
+    resultado = deduplicar(chunks, ["a-0", "a-1", "b-0", "b-1"])
+
+    assert resultado.ids == ["a-0", "a-1", "b-1"], "❌ ERRO: Só a cópia quase idêntica deveria ser descartada."
+    assert resultado.representantes == {"b-0": "a-0"}
+    assert chunks[0].metadata["referencias"] == [
+        {"source": "dados_rpm/RPM_A.pdf", "page": 1}, {"source": "dados_rpm/RPM_B.pdf", "page": 3}
+    ]
+    assert resultado.duplicados_por_arquivo == {"RPM_B.pdf": ["a-0"]}
+
+    # Em partições diferentes, as cópias não são comparadas
+    separados = deduplicar(chunks, ["a-0", "a-1", "b-0", "b-1"], grupo=lambda m: m["source"])
+    assert len(separados.chunks) == 4
+
+    ganho = economia(resultado, batch_size=1, dimensao=8)
+    assert ganho["duplicados"] == 1 and ganho["chamadas_evitadas"] == 1 and ganho["bytes_evitados"] > 32
+
+    print("✅ SUCESSO: Quase duplicatas colapsadas com todas as referências.")
+
+
+def test_pipeline_deduplica_entre_edicoes(ambiente_ingestao):
+    """Testa a deduplicação na ingestão, entre PDFs da mesma execução e com vetores já indexados."""
+    ambiente_ingestao("RPM_A.pdf", f"{METODOLOGIA.format('monetária')}|inflação")
+    ambiente_ingestao("RPM_B.pdf", f"{METODOLOGIA.format('monetária')}|câmbio")
+    modulo.pipeline_ingestao()
+
+    documentos = documentos_do_indice()
+    assert len(documentos) == 3, "❌ ERRO: O box repetido deveria gerar um único vetor."
+    box = next(d for d in documentos if "referencias" in d.metadata)
+    assert sorted(os.path.basename(r["source"]) for r in box.metadata["referencias"]) == ["RPM_A.pdf", "RPM_B.pdf"]
+    assert carregar_manifesto(diretorio_atual("faiss_index"))["arquivos"]["RPM_B.pdf"]["duplicados"] == [box.id]
+
+    # Uma nova edição reaproveita o vetor já indexado
+    ambiente_ingestao("RPM_C.pdf", f"{METODOLOGIA.format('monetária')}|crédito")
+    modulo.pipeline_ingestao()
+    documentos = documentos_do_indice()
+    assert len(documentos) == 4
+    box = next(d for d in documentos if "referencias" in d.metadata)
+    assert len(box.metadata["referencias"]) == 3
+
+    # Remover o PDF dono do vetor compartilhado reconstrói o índice sem perder o box
+    os.remove(os.path.join("dados_rpm", "RPM_A.pdf"))
+    modulo.pipeline_ingestao()
+    documentos = documentos_do_indice()
+    assert sorted(d.page_content for d in documentos if "referencias" not in d.metadata) == ["crédito", "câmbio"]
+    box = next(d for d in documentos if "referencias" in d.metadata)
+    assert sorted(os.path.basename(r["source"]) for r in box.metadata["referencias"]) == ["RPM_B.pdf", "RPM_C.pdf"]
+
+    print("✅ SUCESSO: Ingestão armazena um único vetor por trecho repetido entre edições.")
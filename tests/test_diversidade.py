@@ -0,0 +1,63 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+from src.agente.diversidade import selecionar_mmr
+from src.agente.recuperacao import RetrieverHibrido
+
+VETORES = {
+    "IPCA projetado em 4,8% para 2025.": [1.0, 0.0, 0.0],
+    "IPCA projetado em 4,8% para 2025 (repetido da edição anterior).": [0.99, 0.05, 0.0],
+    "Expectativas de inflação seguem desancoradas.": [0.8, 0.0, 0.6],
+    "O PIB cresceu 0,4% no trimestre.": [0.0, 1.0, 0.0],
+    "inflação": [1.0, 0.0, 0.1],
+}
+
+
+class EmbeddingsFixos(Embeddings):
+    """Vetores fixos por texto, contando as chamadas."""
+
+    def __init__(self):
+        self.chamadas = 0
+
+    def embed_documents(self, texts):
+        self.chamadas += 1
+        return [VETORES[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_selecao_mmr():
+    """Testa se o MMR troca a quase duplicata por um candidato diverso."""
+    vetores = np.array([[1.0, 0.0], [0.99, 0.05], [0.6, 0.8], [0.0, 1.0]], dtype=np.float32)
+    relevancias = [0.9, 0.89, 0.85, 0.3]
+
+    assert selecionar_mmr(relevancias, vetores, k=2, lambda_mult=1.0) == [0, 1]
+    assert selecionar_mmr(relevancias, vetores, k=2, lambda_mult=0.5) == [0, 2], "❌ ERRO: Quase duplicata mantida."
+    assert selecionar_mmr(relevancias, vetores, k=5, lambda_mult=0.5) == [0, 2, 1, 3]
+
+    print("✅ SUCESSO: MMR vetorizado seleciona candidatos diversos.")
+
+
+def test_retriever_com_diversidade_e_reranqueador():
+    """Testa o MMR sobre os vetores do índice (sem novos embeddings) e o reranqueador plugável."""
+    modelo = EmbeddingsFixos()
+    textos = [t for t in VETORES if t != "inflação"]
+    vector_store = FAISS.from_texts(textos, modelo)
+    modelo.chamadas = 0
+
+    def retriever(**kwargs):
+        return RetrieverHibrido(vector_store=vector_store, k=2, k_candidatos=4, **kwargs)
+
+    assert [d.page_content for d in retriever().invoke("inflação")] == textos[:2]
+
+    docs = retriever(lambda_mmr=0.5).invoke("inflação")
+    assert [d.page_content for d in docs] == [textos[0], textos[2]], "❌ ERRO: MMR não aplicado aos candidatos."
+    assert modelo.chamadas == 2, "❌ ERRO: Candidatos foram embedados novamente."
+
+    # Reranqueador que prefere o trecho sobre o PIB
+    docs = retriever(reranqueador=lambda consulta, textos: [float("PIB" in t) for t in textos]).invoke("inflação")
+    assert docs[0].page_content == textos[3]
+
+    print("✅ SUCESSO: Candidatos diversificados com os vetores do índice e reranqueados.")
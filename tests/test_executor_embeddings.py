@@ -0,0 +1,128 @@
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from src.utils.executor_embeddings import ExecutorEmbeddings, ErroEmbedding, TokenBucket
+
+
+class ServidorEmbeddingsStub(ThreadingHTTPServer):
+    """Servidor local de embeddings que responde 429 a cada `throttle_a_cada` requisições."""
+
+    def __init__(self, throttle_a_cada=3, retry_after_ms=50, falhas_500=1):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.throttle_a_cada = throttle_a_cada
+        self.retry_after_ms = retry_after_ms
+        self.falhas_500 = falhas_500
+        self.requisicoes = 0
+        self.throttles = 0
+        self.em_voo = 0
+        self.pico_em_voo = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/embeddings"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, corpo, cabecalhos=None):
+        dados = json.dumps(corpo).encode()
+        self.send_response(status)
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        servidor = self.server
+        textos = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["input"]
+        with servidor.lock:
+            servidor.requisicoes += 1
+            numero = servidor.requisicoes
+            servidor.em_voo += 1
+            servidor.pico_em_voo = max(servidor.pico_em_voo, servidor.em_voo)
+        try:
+            if numero % servidor.throttle_a_cada == 0:
+                with servidor.lock:
+                    servidor.throttles += 1
+                return self._responder(429, {"erro": "limite"}, {"retry-after-ms": str(servidor.retry_after_ms)})
+            if servidor.falhas_500 and numero == 2:
+                return self._responder(500, {"erro": "interno"})
+            self._responder(200, {"data": [[float(len(t)), float(t.split()[-1])] for t in textos]})
+        finally:
+            with servidor.lock:
+                servidor.em_voo -= 1
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorEmbeddingsStub()
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _cliente(url):
+    """Cliente HTTP mínimo: erros HTTP chegam como urllib.error.HTTPError (com .code e .headers)."""
+    def embed(textos):
+        requisicao = urllib.request.Request(
+            url, data=json.dumps({"input": textos}).encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(requisicao, timeout=5) as resposta:
+            return json.loads(resposta.read())["data"]
+    return embed
+
+
+def test_executor_refaz_batches_sem_descartar(servidor):
+    """Testa se batches com 429 e 500 são refeitos e o resultado mantém o alinhamento."""
+    textos = [f"chunk número {i}" for i in range(200)]
+    executor = ExecutorEmbeddings(_cliente(servidor.url), batch_size=8, max_concorrencia=4, backoff_base=0.01)
+
+    vetores = executor.embed(textos)
+
+    assert len(vetores) == len(textos)
+    assert [v[1] for v in vetores] == [float(i) for i in range(200)], "❌ ERRO: Embeddings desalinhados."
+    assert executor.estatisticas["throttles"] == servidor.throttles > 0
+    assert executor.estatisticas["erros"] == 1
+    assert servidor.pico_em_voo > 1, "❌ ERRO: Batches não foram executados em paralelo."
+
+    print(f"✅ SUCESSO: {servidor.requisicoes} requisições, {servidor.throttles} respostas 429, nenhum batch perdido.")
+
+
+def test_executor_reduz_concorrencia_com_429(servidor):
+    """Testa se respostas 429 reduzem concorrência e tamanho dos batches."""
+    servidor.throttle_a_cada = 1  # todas as requisições são limitadas
+    executor = ExecutorEmbeddings(
+        _cliente(servidor.url), batch_size=16, max_concorrencia=4, max_tentativas=3, backoff_base=0.01
+    )
+
+    with pytest.raises(ErroEmbedding):
+        executor.embed([f"chunk {i}" for i in range(64)])
+
+    assert executor.concorrencia == 1
+    assert executor.batch_size < 16
+
+    print("✅ SUCESSO: Concorrência e batch reduzidos; erro reportado em vez de descartar o batch.")
+
+
+def test_token_bucket_limita_taxa():
+    """Testa se o token bucket respeita a taxa configurada."""
+    import time
+
+    bucket = TokenBucket(taxa=50, capacidade=1)
+    inicio = time.monotonic()
+    for _ in range(11):
+        bucket.adquirir()
+
+    assert time.monotonic() - inicio >= 0.18
+
+    print("✅ SUCESSO: Token bucket limitou a taxa de requisições.")
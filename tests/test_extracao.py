@@ -49,3 +49,54 @@ def test_pdf_content_not_empty():
 
     except Exception as e:
         pytest.fail(f"❌ ERRO: {str(e)}")
+
+
+def test_extracao_paralela_equivale_serial(tmp_path, monkeypatch):
+    """Testa se a extração paralela gera os mesmos chunks, na mesma ordem, que a serial."""
+    from src.pipelines import processar_dados as modulo
+    from benchmarks.corpus_sintetico import escrever_pdf
+
+    # Intervalos pequenos para forçar a divisão de páginas entre processos
+    monkeypatch.setattr(modulo, "PAGINAS_POR_TAREFA", 2)
+
+    for n in range(3):
+        paginas = [
+            [f"Relatorio {n} pagina {p} linha {l} sobre inflacao, juros e atividade." for l in range(8)]
+            for p in range(5)
+        ]
+        escrever_pdf(str(tmp_path / f"RPM_{n}.pdf"), paginas)
+
+    serial = modulo.processar_dados(str(tmp_path), 300, 50, workers=1)
+    paralelo = modulo.processar_dados(str(tmp_path), 300, 50, workers=4)
+
+    assert len(serial) > 0, "❌ ERRO: Nenhum chunk extraído."
+    assert [d.page_content for d in paralelo] == [d.page_content for d in serial]
+    assert [d.metadata for d in paralelo] == [d.metadata for d in serial]
+
+    print(f"✅ SUCESSO: Extração paralela equivalente à serial ({len(paralelo)} chunks).")
+
+
+def test_extratores_equivalentes(tmp_path):
+    """Testa se o extrator pdfium gera o mesmo texto, chunks e metadados que o pdfplumber."""
+    from src.pipelines import processar_dados as modulo
+    from benchmarks.bench_extracao import comparar_extratores
+    from benchmarks.corpus_sintetico import gerar_corpus, escrever_pdf
+
+    pdf_files = gerar_corpus(str(tmp_path), n_pdfs=2, paginas_por_pdf=3)
+    # Página curta: descartada pelo filtro em qualquer extrator
+    escrever_pdf(str(tmp_path / "RPM_Capa.pdf"), [["Relatorio de Politica Monetaria"]])
+
+    resultados = comparar_extratores(pdf_files + [str(tmp_path / "RPM_Capa.pdf")], 300, 50)
+    pdfium = resultados["pdfium"]
+    assert pdfium["paginas_identicas"] == pdfium["paginas"] == 7
+    assert pdfium["paginas_mantidas"] == resultados["pdfplumber"]["paginas_mantidas"] == 6
+    assert pdfium["chunks"] == resultados["pdfplumber"]["chunks"]
+
+    pdfplumber = modulo.processar_dados(str(tmp_path), 300, 50)
+    rapido = modulo.processar_dados(str(tmp_path), 300, 50, extrator="pdfium")
+    assert [d.metadata for d in rapido] == [d.metadata for d in pdfplumber]
+
+    with pytest.raises(ValueError):
+        modulo.processar_dados(str(tmp_path), 300, 50, extrator="inexistente")
+
+    print(f"✅ SUCESSO: Extratores equivalentes ({pdfium['aceleracao']}x mais rápido com pdfium).")
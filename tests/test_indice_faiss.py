@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.indice_faiss import (
+    DocstoreSQLite, TIPOS_INDICE, carregar_indice, converter_indice, criar_vector_store, salvar_indice
+)
+from src.utils.versoes_indice import diretorio_atual
+
+
+def test_conversao_preserva_buscas(tmp_path):
+    """Testa se o índice convertido para SQLite retorna os mesmos documentos do index.pkl."""
+    modelo = DeterministicFakeEmbedding(size=16)
+    textos = [f"Trecho {i} sobre inflação, juros e atividade." for i in range(50)]
+    metadatas = [{"source": "dados_rpm/RPM_Dez_2024.pdf", "page": i} for i in range(50)]
+    diretorio = str(tmp_path / "faiss_index")
+    FAISS.from_texts(textos, modelo, metadatas=metadatas).save_local(diretorio)
+    original = FAISS.load_local(diretorio, modelo, allow_dangerous_deserialization=True)
+
+    converter_indice(diretorio)
+    assert not os.path.exists(os.path.join(diretorio, "index.pkl"))
+    convertido = carregar_indice(diretorio, modelo)
+
+    assert isinstance(convertido.docstore, DocstoreSQLite)
+    for pergunta in ["inflação", "Trecho 7", "juros e atividade"]:
+        esperado = original.similarity_search(pergunta, k=3)
+        obtido = convertido.similarity_search(pergunta, k=3)
+        assert [(d.page_content, d.metadata) for d in obtido] == [(d.page_content, d.metadata) for d in esperado]
+
+    print("✅ SUCESSO: Índice convertido retorna os mesmos documentos.")
+
+
+def test_alteracoes_em_memoria_ate_salvar(tmp_path):
+    """Testa inclusões e remoções sobre o docstore SQLite e a gravação de um novo docstore."""
+    modelo = DeterministicFakeEmbedding(size=16)
+    diretorio = str(tmp_path / "faiss_index")
+    salvar_indice(FAISS.from_texts(["a", "b", "c"], modelo, ids=["id-a", "id-b", "id-c"]), diretorio)
+
+    vector_store = carregar_indice(diretorio, modelo, mmap=False)
+    vector_store.delete(["id-b"])
+    vector_store.add_texts(["d"], ids=["id-d"])
+    salvar_indice(vector_store, diretorio)
+
+    recarregado = carregar_indice(diretorio, modelo)
+    assert list(recarregado.index_to_docstore_id.values()) == ["id-a", "id-c", "id-d"]
+    assert recarregado.docstore.search("id-d").page_content == "d"
+    assert isinstance(recarregado.docstore.search("id-b"), str)
+
+    print("✅ SUCESSO: Inclusões e remoções gravadas no novo docstore.")
+
+
+def test_tipos_de_indice_recall(tmp_path):
+    """Testa se cada tipo de índice é salvo, carregado e mantém o recall@3 em relação ao flat."""
+    import faiss
+
+    rng = np.random.default_rng(0)
+    centros = rng.standard_normal((50, 16))
+    vetores = (centros[rng.integers(0, 50, 10000)] + 0.3 * rng.standard_normal((10000, 16))).astype(np.float32)
+    consultas = vetores[:100] + 0.05 * rng.standard_normal((100, 16)).astype(np.float32)
+    text_embeddings = [(f"chunk {i}", v) for i, v in enumerate(vetores)]
+    modelo = DeterministicFakeEmbedding(size=16)
+
+    exato = faiss.IndexFlatL2(16)
+    exato.add(vetores)
+    _, esperado = exato.search(consultas, 3)
+
+    for tipo in TIPOS_INDICE:
+        diretorio = str(tmp_path / tipo)
+        salvar_indice(criar_vector_store(text_embeddings, modelo, tipo=tipo), diretorio)
+        vector_store = carregar_indice(diretorio, modelo)
+        _, obtido = vector_store.index.search(consultas, 3)
+
+        recall = np.mean([len(set(e) & set(o)) / 3 for e, o in zip(esperado, obtido)])
+        # PQ comprime 8 dimensões em 1 byte: a perda de recall é esperada
+        minimo = 0.5 if tipo == "pq" else 0.9
+        assert recall >= minimo, f"❌ ERRO: Recall@3 de '{tipo}' muito baixo ({recall:.2f})."
+        assert vector_store.docstore.search(vector_store.index_to_docstore_id[int(obtido[0][0])]).page_content.startswith("chunk")
+
+    print("✅ SUCESSO: Todos os tipos de índice salvos, carregados e com recall@3 adequado.")
+
+
+def test_hnsw_reconstruido_ao_remover(ambiente_ingestao):
+    """Testa se o pipeline reconstrói o índice HNSW quando há PDFs a remover."""
+    from src.pipelines import pipeline_ingestao as modulo
+
+    ambiente_ingestao("RPM_A.pdf", "inflação|juros")
+    ambiente_ingestao("RPM_B.pdf", "câmbio")
+    modulo.pipeline_ingestao(tipo_indice="hnsw")
+
+    os.remove(os.path.join("dados_rpm", "RPM_B.pdf"))
+    modulo.pipeline_ingestao(tipo_indice="hnsw")
+
+    vector_store = carregar_indice(diretorio_atual("faiss_index"), DeterministicFakeEmbedding(size=8))
+    assert type(vector_store.index).__name__ == "IndexHNSWFlat"
+    assert vector_store.index.ntotal == 2
+
+    print("✅ SUCESSO: Índice HNSW reconstruído sem os vetores removidos.")
+
+
+def test_ivf_e_pq_removem_sem_corromper(ambiente_ingestao):
+    """Testa se remover um PDF de índices IVF e PQ mantém cada vetor ligado ao seu chunk."""
+    from src.pipelines import pipeline_ingestao as modulo
+
+    # O PQ só é treinado (sem recair para flat) com ao menos 39 * 256 vetores
+    for tipo, quantidade, nome_faiss in (("ivf", 400, "IndexIVFFlat"), ("pq", 10000, "IndexIVFPQ")):
+        ambiente_ingestao("RPM_A.pdf", "|".join(f"inflação {tipo} {i}" for i in range(quantidade // 4)))
+        ambiente_ingestao("RPM_B.pdf", "|".join(f"câmbio {tipo} {i}" for i in range(quantidade)))
+        modulo.pipeline_ingestao(tipo_indice=tipo)
+
+        os.remove(os.path.join("dados_rpm", "RPM_A.pdf"))
+        modulo.pipeline_ingestao(tipo_indice=tipo)
+
+        modelo = DeterministicFakeEmbedding(size=8)
+        vector_store = carregar_indice(diretorio_atual("faiss_index"), modelo)
+        assert type(vector_store.index).__name__ == nome_faiss and vector_store.index.ntotal == quantidade
+
+        # Cada posição do índice guarda o vetor (codificado) do chunk que o docstore associa a ela
+        index = vector_store.index
+        for posicao in (0, quantidade // 2, quantidade - 1):
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[posicao])
+            esperado = index.sa_decode(index.sa_encode(np.asarray([modelo.embed_query(doc.page_content)], dtype=np.float32)))[0]
+            assert np.allclose(index.reconstruct(posicao), esperado), f"❌ ERRO: Índice '{tipo}' com o vetor da posição {posicao} trocado."
+
+        texto = f"câmbio {tipo} {quantidade - 1}"
+        assert texto in [d.page_content for d in vector_store.similarity_search_by_vector(modelo.embed_query(texto), k=10)]
+        os.remove(os.path.join("dados_rpm", "RPM_B.pdf"))
+
+    print("✅ SUCESSO: Remoção em índices IVF e PQ sem vetores trocados.")
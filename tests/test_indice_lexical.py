@@ -0,0 +1,84 @@
+import os
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from src.agente.recuperacao import RetrieverHibrido
+from src.utils.indice_faiss import carregar_indice, criar_vector_store, salvar_indice
+from src.utils.indice_lexical import LEXICAL_ARQUIVO, IndiceLexical, tokenizar
+
+TEXTOS = [
+    "A projeção do IPCA para 2025 é de 4,8%.",
+    "O Copom manteve a taxa Selic em 15% ao ano.",
+    "O câmbio apresentou volatilidade elevada no trimestre.",
+    "O PIB cresceu 0,4% no segundo trimestre.",
+    "Os preços livres de alimentação no domicílio desaceleraram.",
+    "A inflação de serviços segue resiliente.",
+]
+
+
+class EmbeddingsContadores(Embeddings):
+    """Repassa para outro modelo de embeddings registrando o número de chamadas."""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.chamadas = 0
+
+    def embed_documents(self, texts):
+        self.chamadas += 1
+        return self.modelo.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _indice(diretorio, modelo):
+    modelo_base = DeterministicFakeEmbedding(size=16)
+    text_embeddings = list(zip(TEXTOS, modelo_base.embed_documents(TEXTOS)))
+    salvar_indice(criar_vector_store(text_embeddings, modelo_base), diretorio)
+    return carregar_indice(diretorio, modelo), IndiceLexical(os.path.join(diretorio, LEXICAL_ARQUIVO))
+
+
+def test_tokenizacao():
+    """Testa caixa baixa, remoção de acentos e stopwords e números inteiros."""
+    assert tokenizar("A Projeção do IPCA é de 4,8% em 2.025") == ["projecao", "ipca", "4,8", "2.025"]
+
+    print("✅ SUCESSO: Tokenização em português correta.")
+
+
+def test_bm25_termo_exato(tmp_path):
+    """Testa se o BM25 coloca em primeiro o chunk com o termo exato da consulta."""
+    diretorio = str(tmp_path / "faiss_index")
+    _, indice = _indice(diretorio, DeterministicFakeEmbedding(size=16))
+
+    assert os.path.exists(os.path.join(diretorio, LEXICAL_ARQUIVO))
+    resultado = indice.buscar("Selic Copom", k=3)
+    assert len(resultado) == 1
+    assert indice.buscar("inexistente") == []
+    indice.fechar()
+
+    vector_store = carregar_indice(diretorio, DeterministicFakeEmbedding(size=16))
+    assert vector_store.docstore.search(resultado[0][0]).page_content == TEXTOS[1]
+
+    print("✅ SUCESSO: BM25 encontrou o chunk com o termo exato.")
+
+
+def test_retriever_hibrido(tmp_path):
+    """Testa a fusão híbrida e se consultas lexicais dispensam o embedding."""
+    modelo = EmbeddingsContadores(DeterministicFakeEmbedding(size=16))
+    vector_store, indice = _indice(str(tmp_path / "faiss_index"), modelo)
+    retriever = RetrieverHibrido(vector_store=vector_store, indice_lexical=indice, k=3)
+
+    docs = retriever.invoke("alimentação no domicílio")
+    assert len(docs) == 3
+    assert docs[0].page_content == TEXTOS[4], "❌ ERRO: Termo exato não ficou em primeiro na fusão."
+    assert modelo.chamadas == 1
+
+    docs = retriever.invoke('"PIB"')
+    assert [d.page_content for d in docs] == [TEXTOS[3]]
+    assert modelo.chamadas == 1, "❌ ERRO: Consulta entre aspas gerou embedding."
+
+    lexical = RetrieverHibrido(vector_store=vector_store, indice_lexical=indice, k=3, modo="lexical")
+    assert lexical.invoke("câmbio")[0].page_content == TEXTOS[2]
+    assert modelo.chamadas == 1
+
+    print("✅ SUCESSO: Recuperação híbrida e lexical corretas.")
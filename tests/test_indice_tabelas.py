@@ -0,0 +1,98 @@
+import os
+
+from benchmarks.corpus_sintetico import escrever_pdf
+from src.agente.respostas_diretas import interpretar, responder_por_tabela
+from src.utils.indice_tabelas import TABELAS_ARQUIVO, IndiceTabelas, extrair_tabelas_pdfs
+
+
+def escrever_relatorio(caminho, ipca_2025):
+    """Grava um relatório com uma tabela de projeções na segunda página."""
+    tabela = [
+        ["Indicador", "2024", "2025", "2026"],
+        ["IPCA", "4,9", ipca_2025, "4,0"],
+        ["IPCA livres", "5,1", "4,6", "3,9"],
+        ["Selic (% a.a.)", "12,25", "15,00", "12,50"],
+    ]
+    escrever_pdf(str(caminho), [["Sumario executivo do relatorio."] * 5, ["Tabela 2.1 - Projecoes"]], {1: tabela})
+    return str(caminho)
+
+
+def criar_indice(diretorio):
+    pdfs = [
+        escrever_relatorio(diretorio / "RPM_Jun_2024.pdf", "3,8"),
+        escrever_relatorio(diretorio / "RPM_Dez_2024.pdf", "4,8"),
+    ]
+    indice = IndiceTabelas(str(diretorio / TABELAS_ARQUIVO), somente_leitura=False)
+    indice.atualizar(extrair_tabelas_pdfs(pdfs))
+    return indice
+
+
+def test_respostas_diretas_pela_tabela(tmp_path):
+    """Testa a extração das tabelas e as respostas diretas por indicador, horizonte e edição."""
+    indice = criar_indice(tmp_path)
+    assert indice.total == 18
+
+    resposta = responder_por_tabela(indice, "Qual a projeção do IPCA para 2025?")
+    assert "4,8" in resposta["result"] and "dezembro de 2024" in resposta["result"]
+    fonte = resposta["source_documents"][0].metadata
+    assert os.path.basename(fonte["source"]) == "RPM_Dez_2024.pdf" and fonte["page"] == 1
+
+    # A edição citada não é confundida com o horizonte, e o indicador mais específico vence
+    resposta = responder_por_tabela(indice, "Qual a projeção do IPCA livres para 2025 no RPM de junho de 2024?")
+    assert "IPCA livres — 2025: 4,6" in resposta["result"] and "junho de 2024" in resposta["result"]
+    assert "15,00 (% a.a.)" in responder_por_tabela(indice, "Qual a taxa Selic em 2025?")["result"]
+
+    # Perguntas que não são consultas de valor seguem para o SLM
+    assert interpretar("Por que o IPCA deve subir em 2025?", indice.indicadores()) is None
+    assert responder_por_tabela(indice, "Qual a projeção do IPCA?") is None
+    assert responder_por_tabela(indice, "Qual a projeção do PIB para 2025?") is None
+
+    # PDFs removidos deixam de responder
+    indice.atualizar({}, remover=["RPM_Dez_2024.pdf"])
+    assert "3,8" in responder_por_tabela(indice, "Qual a projeção do IPCA para 2025?")["result"]
+    indice.fechar()
+
+    print("✅ SUCESSO: Consultas de valor respondidas direto das tabelas, com página de origem.")
+
+
+def test_cadeia_responde_pela_tabela(agente_offline, tmp_path):
+    """Testa se a cadeia responde consultas de valor sem o SLM e encaminha as demais."""
+    criar_indice(tmp_path / "faiss_index").fechar()
+    rag_chain = agente_offline.create_rag_chain()
+
+    partes = list(rag_chain.stream("Qual a projeção do IPCA para 2025?"))
+    assert len(partes) == 1, "❌ ERRO: Resposta direta não veio em um único pedaço."
+    assert "4,8" in partes[0]["result"] and partes[0]["source_documents"][0].metadata["tabela"]
+
+    resposta = rag_chain.invoke("O que o relatório diz sobre o câmbio?")
+    assert resposta["result"] == "A projeção do IPCA para 2025 é de 4,8%."
+    assert all("tabela" not in d.metadata for d in resposta["source_documents"])
+
+    print("✅ SUCESSO: Cadeia usa o índice de tabelas antes da recuperação e do SLM.")
+
+
+def test_rotulos_genericos_e_indicadores_ambiguos(tmp_path):
+    """Testa se rótulos genéricos das tabelas não viram indicadores e se perguntas com dois indicadores seguem para o SLM."""
+    tabela = [
+        ["Crescimento", "2024", "2025"],
+        ["PIB", "3,4", "2,0"],
+        ["Brasil", "3,1", "2,1"],
+        ["Mundo", "3,2", "3,0"],
+        ["Total", "9,7", "7,1"],
+    ]
+    escrever_pdf(str(tmp_path / "RPM_Mar_2025.pdf"), [["Sumario executivo do relatorio."], ["Tabela 1.1 - PIB"]], {1: tabela})
+    indice = criar_indice(tmp_path)
+    indice.atualizar(extrair_tabelas_pdfs([str(tmp_path / "RPM_Mar_2025.pdf")]))
+
+    for pergunta in ("Qual a projeção do PIB do Brasil para 2025?", "Qual o total de crescimento do PIB em 2025?"):
+        assert interpretar(pergunta, indice.indicadores())["chave"] == "pib", f"❌ ERRO: Rótulo genérico escolhido em '{pergunta}'."
+        assert "PIB — 2025: 2,0" in responder_por_tabela(indice, pergunta)["result"]
+    assert interpretar("Qual a projeção do produto interno bruto para 2025?", indice.indicadores())["chave"] == "pib"
+
+    # Só rótulos genéricos, ou mais de um indicador citado: sem resposta direta
+    assert responder_por_tabela(indice, "Qual o crescimento do mundo em 2025?") is None
+    assert responder_por_tabela(indice, "Qual a projeção do IPCA e da Selic para 2025?") is None
+    assert interpretar("Qual a projeção do PIB e do IPCA para 2025?", indice.indicadores()) is None
+    indice.fechar()
+
+    print("✅ SUCESSO: Rótulos genéricos ignorados e perguntas com vários indicadores encaminhadas ao SLM.")
@@ -0,0 +1,32 @@
+import sys
+import subprocess
+
+
+def test_importacao_sem_dependencias_pesadas():
+    """Testa se importar o agente não carrega LangChain, FAISS nem o SDK da OpenAI."""
+    codigo = (
+        "import sys, src.agente.agente; "
+        "print(','.join(m for m in ('langchain_core', 'langchain_openai', 'langchain_community', 'faiss', 'openai') if m in sys.modules))"
+    )
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+
+    assert saida.stdout.strip() == "", f"❌ ERRO: Módulos carregados na importação: {saida.stdout.strip()}"
+
+    print("✅ SUCESSO: Agente importado sem as dependências pesadas.")
+
+
+def test_cadeia_preguicosa(agente_offline):
+    """Testa se a cadeia preguiçosa retorna antes de carregar o índice e responde como a imediata."""
+    pergunta = "Qual a projeção do IPCA para 2025?"
+    esperada = agente_offline.create_rag_chain().invoke(pergunta)
+
+    cadeia = agente_offline.CadeiaAdiada(lambda: agente_offline.create_rag_chain(preguicoso=False))
+    assert not cadeia.pronta
+    cadeia.aquecer().join()
+    assert cadeia.pronta, "❌ ERRO: Aquecimento não construiu a cadeia."
+
+    resposta = agente_offline.create_rag_chain(preguicoso=True).invoke(pergunta)
+    assert resposta["result"] == esperada["result"]
+    assert [d.page_content for d in resposta["source_documents"]] == [d.page_content for d in esperada["source_documents"]]
+
+    print("✅ SUCESSO: Cadeia preguiçosa aquecida em segundo plano e com as mesmas respostas.")
@@ -0,0 +1,55 @@
+import json
+import asyncio
+
+from src.api.lote import ler_perguntas, responder_lote
+from tests.test_api import EmbeddingsContadores
+
+
+def test_respostas_em_lote(agente_offline, tmp_path):
+    """Testa se um arquivo de perguntas é respondido com um único embedding e gravado em JSONL."""
+    componentes = agente_offline.carregar_componentes()
+    componentes.embeddings_model = EmbeddingsContadores(componentes.embeddings_model)
+    arquivo = tmp_path / "perguntas.txt"
+    arquivo.write_text(
+        "# relatório trimestral\n" + "\n".join(f"Pergunta {i} sobre o IPCA" for i in range(12)) + "\n\nPergunta 0 sobre o IPCA\n",
+        encoding="utf-8"
+    )
+    perguntas = ler_perguntas(str(arquivo))
+    saida = str(tmp_path / "respostas.jsonl")
+
+    estatisticas = asyncio.run(responder_lote(componentes, perguntas, saida, max_llm=3))
+    with open(saida, encoding="utf-8") as f:
+        registros = [json.loads(linha) for linha in f]
+
+    assert len(perguntas) == 12, "❌ ERRO: Comentários, linhas vazias e repetições deveriam ser ignorados."
+    assert componentes.embeddings_model.chamadas == [12], f"❌ ERRO: Esperado um lote com 12 perguntas, obtido {componentes.embeddings_model.chamadas}."
+    assert sorted(r["id"] for r in registros) == sorted(id_ for id_, _ in perguntas)
+    assert all(r["resposta"] == "A projeção do IPCA para 2025 é de 4,8%." and r["fontes"] for r in registros)
+    assert estatisticas["respondidas"] == 12 and estatisticas["erros"] == 0 and estatisticas["lotes_recuperacao"] == 1
+
+    print(f"✅ SUCESSO: 12 perguntas respondidas em lote ({estatisticas['perguntas_por_s']} perguntas/s).")
+
+
+def test_lote_retoma_apos_falha(agente_offline, tmp_path):
+    """Testa se a retomada pula as perguntas já gravadas e refaz as que falharam."""
+    componentes = agente_offline.carregar_componentes()
+    componentes.embeddings_model = EmbeddingsContadores(componentes.embeddings_model)
+    perguntas = [(f"q{i}", f"Pergunta {i} sobre a Selic") for i in range(6)]
+    saida = str(tmp_path / "respostas.jsonl")
+
+    # Execução anterior interrompida no meio da gravação da terceira resposta
+    with open(saida, "w", encoding="utf-8") as f:
+        for id_, pergunta in perguntas[:2]:
+            f.write(json.dumps({"id": id_, "pergunta": pergunta, "resposta": "anterior", "fontes": []}) + "\n")
+        f.write('{"id": "q2", "perg')
+
+    estatisticas = asyncio.run(responder_lote(componentes, perguntas, saida, max_llm=2, tamanho_lote=2))
+    with open(saida, encoding="utf-8") as f:
+        linhas = f.read().splitlines()
+    registros = [json.loads(linha) for linha in linhas]
+
+    assert componentes.embeddings_model.chamadas == [2, 2], "❌ ERRO: Só as 4 perguntas pendentes deveriam ser recuperadas."
+    assert sorted(r["id"] for r in registros) == [f"q{i}" for i in range(6)]
+    assert estatisticas["retomadas"] == 2 and estatisticas["respondidas"] == 4 and estatisticas["lotes_recuperacao"] == 2
+
+    print("✅ SUCESSO: Lote retomado sem refazer as respostas já gravadas.")
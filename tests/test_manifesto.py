@@ -0,0 +1,90 @@
+import os
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.pipelines import pipeline_ingestao as modulo
+from src.pipelines import processar_dados as extracao
+from src.utils.indice_faiss import carregar_indice
+from src.pipelines.manifesto import planejar_atualizacao, carregar_manifesto
+from src.utils.versoes_indice import diretorio_atual
+
+
+PARAMETROS = {"chunk_size": 1000, "chunk_overlap": 250, "embedding_deployment": "modelo"}
+
+
+def test_planejar_atualizacao():
+    """Testa a detecção de PDFs novos, alterados e removidos."""
+    manifesto = {
+        "parametros": PARAMETROS,
+        "arquivos": {
+            "RPM_A.pdf": {"hash": "a", "chunk_ids": ["a-0"], "completo": True},
+            "RPM_B.pdf": {"hash": "b", "chunk_ids": ["b-0"], "completo": True},
+            "RPM_C.pdf": {"hash": "c", "chunk_ids": ["c-0"], "completo": True},
+        }
+    }
+    atuais = {"RPM_A.pdf": "a", "RPM_B.pdf": "b2", "RPM_D.pdf": "d"}
+
+    adicionar, remover, reconstruir = planejar_atualizacao(manifesto, atuais, PARAMETROS)
+
+    assert adicionar == ["RPM_B.pdf", "RPM_D.pdf"]
+    assert remover == ["RPM_B.pdf", "RPM_C.pdf"]
+    assert not reconstruir
+
+    _, _, reconstruir = planejar_atualizacao(manifesto, atuais, {**PARAMETROS, "chunk_size": 500})
+    assert reconstruir, "❌ ERRO: Mudança de parâmetros deveria reconstruir o índice."
+
+    print("✅ SUCESSO: Plano de atualização incremental correto.")
+
+
+def test_pipeline_incremental(ambiente_ingestao):
+    """Testa se o pipeline adiciona e remove apenas os vetores dos PDFs alterados."""
+    ambiente_ingestao("RPM_A.pdf", "inflação|juros")
+    ambiente_ingestao("RPM_B.pdf", "câmbio")
+    modulo.pipeline_ingestao()
+
+    manifesto = carregar_manifesto(diretorio_atual("faiss_index"))
+    assert sorted(manifesto["arquivos"]) == ["RPM_A.pdf", "RPM_B.pdf"]
+    assert len(manifesto["arquivos"]["RPM_A.pdf"]["chunk_ids"]) == 2
+
+    os.remove(os.path.join("dados_rpm", "RPM_B.pdf"))
+    ambiente_ingestao("RPM_A.pdf", "inflação|juros|atividade")
+    ambiente_ingestao("RPM_C.pdf", "crédito")
+    modulo.pipeline_ingestao()
+
+    vector_store = carregar_indice(diretorio_atual("faiss_index"), DeterministicFakeEmbedding(size=8))
+    textos = sorted(vector_store.docstore.search(i).page_content for i in vector_store.index_to_docstore_id.values())
+
+    assert vector_store.index.ntotal == 4
+    assert textos == ["atividade", "crédito", "inflação", "juros"]
+
+    print("✅ SUCESSO: Índice FAISS atualizado de forma incremental.")
+
+
+def test_pdf_com_erro_na_extracao_e_refeito(ambiente_ingestao, monkeypatch):
+    """Testa se um PDF cuja extração falhou fica incompleto no manifesto e é refeito na execução seguinte."""
+    def paginas_falsas(caminho, inicio=0, fim=None):
+        conteudo = open(caminho, encoding="utf-8").read()
+        if conteudo.startswith("corrompido"):
+            raise ValueError("PDF corrompido")
+        yield Document(page_content=conteudo * 20, metadata={"source": caminho, "page": 0})
+
+    monkeypatch.setitem(extracao.EXTRATORES, "pdfplumber", paginas_falsas)
+    monkeypatch.setattr(modulo, "processar_dados", lambda *args, **kwargs: extracao.processar_dados(*args, **{**kwargs, "workers": 1}))
+    monkeypatch.setattr(modulo, "extrair_tabelas_pdfs", lambda arquivos, workers: {})
+
+    ambiente_ingestao("RPM_A.pdf", "inflação ")
+    ambiente_ingestao("RPM_B.pdf", "corrompido ")
+    modulo.pipeline_ingestao()
+
+    arquivos = carregar_manifesto(diretorio_atual("faiss_index"))["arquivos"]
+    assert arquivos["RPM_A.pdf"]["completo"] and not arquivos["RPM_B.pdf"]["completo"], "❌ ERRO: PDF com erro registrado como completo."
+
+    # Na execução seguinte, o PDF volta para a fila mesmo com o mesmo conteúdo
+    monkeypatch.setitem(extracao.EXTRATORES, "pdfplumber", lambda caminho, inicio=0, fim=None: iter(
+        [Document(page_content="câmbio " * 20, metadata={"source": caminho, "page": 0})]
+    ))
+    modulo.pipeline_ingestao()
+
+    arquivos = carregar_manifesto(diretorio_atual("faiss_index"))["arquivos"]
+    assert arquivos["RPM_B.pdf"]["completo"] and arquivos["RPM_B.pdf"]["chunk_ids"]
+    print("✅ SUCESSO: PDF com erro na extração refeito na execução seguinte.")
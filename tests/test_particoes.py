@@ -0,0 +1,55 @@
+import os
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.agente.roteador import extrair_escopo
+from src.agente.recuperacao import RetrieverParticionado
+from src.utils.particoes import carregar_mapa_particoes, carregar_particoes, data_relatorio
+from src.utils.versoes_indice import diretorio_atual
+
+
+def test_escopo_da_pergunta():
+    """Testa a data dos relatórios pelo nome do arquivo e o escopo extraído das perguntas."""
+    assert data_relatorio("dados_rpm/RPM_Dez_2024.pdf") == (2024, 12)
+    assert data_relatorio("RPM_2023_03.pdf") == (2023, 3)
+    assert data_relatorio("relatorio.pdf") is None
+
+    assert extrair_escopo("O que o RPM de dezembro de 2024 diz sobre câmbio?").datas == [(2024, 12)]
+    assert extrair_escopo("Compare os relatórios de março e junho de 2024").datas == [(2024, 3), (2024, 6)]
+    assert extrair_escopo("Relatórios de 2021 a 2023").datas == [(2021, None), (2022, None), (2023, None)]
+    assert extrair_escopo("Qual a projeção do IPCA para 2025?").vazio, "❌ ERRO: Horizonte da projeção tratado como edição."
+    assert extrair_escopo("O que diz o último RPM?").recente
+
+    print("✅ SUCESSO: Datas e escopos das perguntas identificados.")
+
+
+def test_indice_particionado(ambiente_ingestao):
+    """Testa partições por relatório, o roteamento das perguntas e a remoção de uma partição."""
+    from src.pipelines import pipeline_ingestao as modulo
+
+    ambiente_ingestao("RPM_Mar_2024.pdf", "câmbio em março|juros em março")
+    ambiente_ingestao("RPM_Dez_2024.pdf", "câmbio em dezembro|juros em dezembro|inflação em dezembro")
+    modulo.pipeline_ingestao(particionar="relatorio")
+
+    mapa = carregar_mapa_particoes(diretorio_atual("faiss_index"))
+    assert sorted(mapa["particoes"]) == ["2024-03", "2024-12"]
+    assert not os.path.exists(os.path.join(diretorio_atual("faiss_index"), "index.faiss"))
+
+    particoes = carregar_particoes(diretorio_atual("faiss_index"), DeterministicFakeEmbedding(size=8))
+    assert [p.chave for p in particoes] == ["2024-12", "2024-03"]
+    retriever = RetrieverParticionado(particoes=particoes, k=3)
+
+    docs = retriever.invoke("O que o RPM de dezembro de 2024 diz sobre câmbio?")
+    assert {d.metadata["data_relatorio"] for d in docs} == {"2024-12"}, "❌ ERRO: Edição citada não foi respeitada."
+
+    lexical = RetrieverParticionado(particoes=particoes, k=3, modo="lexical")
+    assert [d.page_content for d in lexical.invoke("RPM de dezembro de 2024: câmbio")][0] == "câmbio em dezembro"
+    docs = lexical.invoke("câmbio")
+    assert {d.page_content for d in docs} == {"câmbio em março", "câmbio em dezembro"}, "❌ ERRO: Partições não consultadas juntas."
+
+    os.remove(os.path.join("dados_rpm", "RPM_Mar_2024.pdf"))
+    modulo.pipeline_ingestao(particionar="relatorio")
+    assert sorted(carregar_mapa_particoes(diretorio_atual("faiss_index"))["particoes"]) == ["2024-12"]
+    assert not os.path.exists(os.path.join(diretorio_atual("faiss_index"), "particoes", "2024-03"))
+
+    print("✅ SUCESSO: Índice particionado com roteamento por edição.")
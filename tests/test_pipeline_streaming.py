@@ -0,0 +1,78 @@
+import os
+from langchain_core.documents import Document
+
+from benchmarks.corpus_sintetico import gerar_corpus
+from benchmarks.falsos import EmbeddingsFalsos
+from src.pipelines.processar_dados import processar_dados
+from src.pipelines import pipeline_streaming as modulo
+from src.pipelines.pipeline_streaming import pipeline_ingestao_streaming, _em_thread
+from src.pipelines.manifesto import carregar_manifesto
+from src.utils.versoes_indice import diretorio_atual
+
+
+def test_em_thread_repassa_erros():
+    """Testa se uma exceção em um estágio chega a quem consome a fila."""
+    def estagio():
+        yield 1
+        raise ValueError("falha no estágio")
+
+    itens = []
+    try:
+        for item in _em_thread(estagio(), 2, "teste"):
+            itens.append(item)
+        assert False, "❌ ERRO: Exceção do estágio foi engolida."
+    except ValueError:
+        pass
+
+    assert itens == [1]
+    print("✅ SUCESSO: Erros dos estágios são propagados.")
+
+
+def test_streaming_indexa_os_mesmos_chunks(tmp_path, monkeypatch):
+    """Testa se o pipeline em streaming indexa os mesmos chunks da ingestão completa."""
+    monkeypatch.chdir(tmp_path)
+    gerar_corpus("dados_rpm", n_pdfs=2, paginas_por_pdf=2)
+
+    vector_store = pipeline_ingestao_streaming(
+        "dados_rpm", "faiss_index", chunk_size=800, chunk_overlap=100,
+        batch_size=4, tamanho_fila=2, embeddings_model=EmbeddingsFalsos(dimensao=16)
+    )
+    esperados = processar_dados("dados_rpm", 800, 100)
+
+    indexados = [vector_store.docstore.search(i) for i in vector_store.index_to_docstore_id.values()]
+    assert [d.page_content for d in indexados] == [d.page_content for d in esperados]
+    assert all(isinstance(d, Document) for d in indexados)
+
+    manifesto = carregar_manifesto(diretorio_atual("faiss_index"))
+    assert sum(len(a["chunk_ids"]) for a in manifesto["arquivos"].values()) == len(esperados)
+
+    print(f"✅ SUCESSO: Streaming indexou {len(indexados)} chunks, idênticos à ingestão completa.")
+
+
+def test_streaming_descarta_pdf_com_erro(tmp_path, monkeypatch):
+    """Testa se os chunks de um PDF que falha no meio da extração ficam fora do índice."""
+    monkeypatch.chdir(tmp_path)
+    arquivos = gerar_corpus("dados_rpm", n_pdfs=3, paginas_por_pdf=3)
+    quebrado = os.path.basename(arquivos[1])
+    iterar_paginas = modulo._iterar_paginas
+
+    def falhar_no_meio(file_path, **kwargs):
+        paginas = iterar_paginas(file_path, **kwargs)
+        if os.path.basename(file_path) == quebrado:
+            yield next(paginas)
+            raise ValueError("PDF truncado")
+        yield from paginas
+
+    monkeypatch.setattr(modulo, "_iterar_paginas", falhar_no_meio)
+    vector_store = pipeline_ingestao_streaming(
+        "dados_rpm", "faiss_index", chunk_size=800, chunk_overlap=100,
+        batch_size=2, tamanho_fila=2, embeddings_model=EmbeddingsFalsos(dimensao=16)
+    )
+
+    fontes = {os.path.basename(vector_store.docstore.search(i).metadata["source"]) for i in vector_store.index_to_docstore_id.values()}
+    assert quebrado not in fontes and len(fontes) == 2, "❌ ERRO: Chunks do PDF com erro foram indexados."
+    manifesto = carregar_manifesto(diretorio_atual("faiss_index"))
+    assert manifesto["arquivos"][quebrado]["chunk_ids"] == [] and not manifesto["arquivos"][quebrado]["completo"]
+    assert vector_store.index.ntotal == sum(len(a["chunk_ids"]) for a in manifesto["arquivos"].values())
+
+    print("✅ SUCESSO: PDF com erro descartado do índice em streaming.")
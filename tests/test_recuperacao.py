@@ -1,7 +1,8 @@
 import os
 from dotenv import load_dotenv
 from langchain_openai import AzureOpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
+from src.utils.indice_faiss import carregar_indice
+from src.utils.versoes_indice import diretorio_atual
 import pytest
 
 
@@ -38,11 +39,7 @@ def test_load_vectorstore():
             api_version=api_version
         )
 
-        vectorstore = FAISS.load_local(
-            VECTORSTORE_PATH,
-            embeddings_model,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = carregar_indice(diretorio_atual(VECTORSTORE_PATH), embeddings_model)
 
         print("✅ SUCESSO: Vetorstore FAISS carregado com sucesso.")
 
@@ -74,11 +71,7 @@ def test_similarity_search():
             api_version=api_version
         )
 
-        vectorstore = FAISS.load_local(
-            VECTORSTORE_PATH,
-            embeddings_model,
-            allow_dangerous_deserialization=True
-        )
+        vectorstore = carregar_indice(diretorio_atual(VECTORSTORE_PATH), embeddings_model)
 
         pergunta_usuario = "Quais são os principais riscos para a estabilidade financeira?"
         chunks_relevantes = vectorstore.similarity_search_with_score(
@@ -0,0 +1,29 @@
+import os
+import sys
+import json
+import subprocess
+
+from benchmarks.suite import comparar
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_suite_offline(tmp_path, capsys):
+    """Testa se a suíte roda sem o Azure e grava as métricas em JSON comparáveis."""
+    saida = tmp_path / "suite.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--pdfs", "1", "--paginas", "2", "--consultas", "5",
+         "--dimensao", "32", "--saida", str(saida)],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    resultado = json.loads(saida.read_text(encoding="utf-8"))
+
+    assert resultado["ingestao"]["paginas"] == 2
+    assert resultado["ingestao"]["chunks"] > 0 and resultado["ingestao"]["chunks_por_s"] > 0
+    for metrica in ("recuperacao_p99_ms", "cadeia_p50_ms", "inicializacao_s", "rss_pico_mb"):
+        assert resultado["consulta"][metrica] > 0, f"❌ ERRO: Métrica '{metrica}' não medida."
+
+    comparar(str(saida), str(saida))
+    assert "+0.0%" in capsys.readouterr().out
+
+    print("✅ SUCESSO: Suíte de benchmarks executada offline.")
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+import subprocess
+
+from aiohttp.test_utils import TestServer, TestClient
+
+from src.api.servidor import criar_app
+from src.utils.setup_log import FormatadorJSON
+from src.utils.telemetria import METRICAS, RegistroMetricas, span, anotar
+
+
+class ColetorSpans(logging.Handler):
+    """Guarda os registros de spans emitidos pelo logger da telemetria."""
+
+    def __init__(self):
+        super().__init__()
+        self.spans = []
+
+    def emit(self, record):
+        if isinstance(getattr(record, "span", None), dict):
+            self.spans.append(record.span)
+
+
+def coletar_spans():
+    coletor = ColetorSpans()
+    logger = logging.getLogger("telemetria")
+    logger.addHandler(coletor)
+    logger.setLevel(logging.DEBUG)
+    return coletor
+
+
+def test_spans_e_exportacao():
+    """Testa spans aninhados, os atributos anotados, o log JSON e o formato Prometheus."""
+    coletor = coletar_spans()
+    registro = RegistroMetricas(buckets=(0.1, 1.0))
+    registro.incrementar("fib_tokens_total", 10, tipo="entrada")
+    registro.incrementar("fib_tokens_total", 5, tipo="entrada")
+    registro.observar("fib_etapa_duracao_segundos", 0.05, etapa="slm")
+    registro.observar("fib_etapa_duracao_segundos", 2.0, etapa="slm")
+
+    texto = registro.exportar()
+    assert '# TYPE fib_tokens_total counter' in texto
+    assert 'fib_tokens_total{tipo="entrada"} 15' in texto
+    assert 'fib_etapa_duracao_segundos_bucket{etapa="slm",le="0.1"} 1' in texto
+    assert 'fib_etapa_duracao_segundos_bucket{etapa="slm",le="+Inf"} 2' in texto
+    assert 'fib_etapa_duracao_segundos_count{etapa="slm"} 2' in texto
+
+    try:
+        with span("externo") as externo:
+            with span("interno", consultas=2):
+                anotar(documentos=3)
+    finally:
+        logging.getLogger("telemetria").removeHandler(coletor)
+
+    interno, fechado = coletor.spans
+    assert interno["etapa"] == "interno" and interno["span_pai"] == externo.id
+    assert interno["consultas"] == 2 and interno["documentos"] == 3
+    assert fechado["etapa"] == "externo" and "span_pai" not in fechado
+
+    linha = logging.LogRecord("telemetria", logging.DEBUG, __file__, 0, "span interno", None, None)
+    linha.span = interno
+    dados = json.loads(FormatadorJSON().format(linha))
+    assert dados["nivel"] == "DEBUG" and dados["etapa"] == "interno" and "duracao_ms" in dados
+
+    print("✅ SUCESSO: Spans aninhados e métricas exportadas no formato Prometheus.")
+
+
+def test_etapas_da_cadeia_e_endpoint(agente_offline):
+    """Testa os spans e contadores de uma pergunta na cadeia RAG e a rota /metrics da API."""
+    METRICAS.limpar()
+    coletor = coletar_spans()
+    try:
+        resposta = agente_offline.create_rag_chain().invoke("Qual a projeção do IPCA?")
+    finally:
+        logging.getLogger("telemetria").removeHandler(coletor)
+
+    etapas = {s["etapa"]: s for s in coletor.spans}
+    assert {"recuperacao", "embedding_consulta", "busca_faiss", "prompt", "slm"} <= set(etapas)
+    assert etapas["embedding_consulta"]["span_pai"] == etapas["recuperacao"]["span_id"]
+    assert etapas["recuperacao"]["documentos"] == len(resposta["source_documents"])
+    assert etapas["slm"]["tokens_saida"] > 0 and "primeiro_token_ms" in etapas["slm"]
+    assert METRICAS.valor("fib_tokens_total", tipo="entrada") == etapas["slm"]["tokens_entrada"]
+    assert METRICAS.valor("fib_etapa_duracao_segundos", etapa="slm") == 1
+
+    async def executar():
+        componentes = agente_offline.carregar_componentes()
+        async with TestClient(TestServer(criar_app(componentes, janela_ms=0))) as cliente:
+            await cliente.post("/perguntar", json={"pergunta": "E a Selic?"})
+            resposta = await cliente.get("/metrics")
+            return resposta.status, resposta.headers["Content-Type"], await resposta.text()
+
+    status, tipo, texto = asyncio.run(executar())
+    assert status == 200 and tipo.startswith("text/plain")
+    assert 'fib_etapa_duracao_segundos_count{etapa="api_lote"} 1' in texto
+    assert 'fib_tokens_total{tipo="saida"}' in texto
+
+    print("✅ SUCESSO: Etapas da cadeia cronometradas e expostas em /metrics.")
+
+
+def registros_de_log(**ambiente):
+    """Roda um span em um processo novo, com o logging de `setup_logging()`, e devolve as linhas do stderr."""
+    codigo = (
+        "import logging; from src.utils.setup_log import setup_logging; setup_logging(); "
+        "from src.utils.telemetria import span\n"
+        "with span('interno', documentos=3): logging.info('pergunta recebida')"
+    )
+    ambiente = {**{k: v for k, v in os.environ.items() if not k.startswith("LOG_")}, **ambiente}
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True, env=ambiente)
+    return saida.stderr.strip().splitlines()
+
+
+def test_spans_nos_logs_configurados():
+    """Testa se `setup_logging()` emite os spans em JSON e, no texto, só com LOG_NIVEL=DEBUG."""
+    registros = [json.loads(linha) for linha in registros_de_log(LOG_FORMATO="json")]
+    spans = [r for r in registros if r.get("etapa") == "interno"]
+    assert len(spans) == 1 and spans[0]["documentos"] == 3, f"❌ ERRO: Span ausente do log JSON: {registros}"
+    assert any(r["mensagem"] == "pergunta recebida" for r in registros)
+
+    texto = registros_de_log()
+    assert not any("span interno" in linha for linha in texto) and any("pergunta recebida" in linha for linha in texto)
+    assert any("span interno" in linha for linha in registros_de_log(LOG_NIVEL="DEBUG"))
+    assert not any("pergunta recebida" in linha for linha in registros_de_log(LOG_NIVEL="WARNING"))
+
+    print("✅ SUCESSO: Spans emitidos no log JSON e no texto com LOG_NIVEL=DEBUG.")
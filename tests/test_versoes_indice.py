@@ -0,0 +1,186 @@
+import os
+import sqlite3
+import threading
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agente.agente import CadeiaAdiada, ComponentesRAG
+from src.pipelines import pipeline_ingestao as modulo
+from src.utils.indice_faiss import carregar_indice, criar_vector_store, salvar_indice
+from src.utils.versoes_indice import (
+    PONTEIRO_ARQUIVO, diretorio_atual, listar_versoes, preparar_versao, publicar_versao, versao_atual
+)
+
+
+def test_ingestao_publica_versoes(ambiente_ingestao):
+    """Testa a publicação de cada ingestão como nova versão, a migração do índice legado e a coleta."""
+    modelo = DeterministicFakeEmbedding(size=8)
+    salvar_indice(criar_vector_store([("legado", modelo.embed_query("legado"))], modelo), "faiss_index")
+    legado = carregar_indice(diretorio_atual("faiss_index"), modelo)
+    assert diretorio_atual("faiss_index") == "faiss_index"
+
+    ambiente_ingestao("RPM_A.pdf", "inflação|juros")
+    modulo.pipeline_ingestao()
+    primeira = versao_atual("faiss_index")
+    assert primeira and not os.path.exists(os.path.join("faiss_index", "index.faiss")), "❌ ERRO: Índice legado na raiz não foi coletado."
+
+    ambiente_ingestao("RPM_B.pdf", "câmbio")
+    modulo.pipeline_ingestao()
+    em_uso = carregar_indice(diretorio_atual("faiss_index"), modelo)
+
+    ambiente_ingestao("RPM_C.pdf", "crédito")
+    modulo.pipeline_ingestao()
+
+    versoes = listar_versoes("faiss_index")
+    assert len(versoes) == 2 and primeira not in versoes and versoes[-1] == versao_atual("faiss_index")
+    assert carregar_indice(diretorio_atual("faiss_index"), modelo).index.ntotal == 4
+
+    # Processos que ainda usam versões apagadas seguem respondendo até recarregar
+    assert em_uso.similarity_search("câmbio", k=3)
+    assert legado.similarity_search("legado", k=1)[0].page_content == "legado"
+
+    print(f"✅ SUCESSO: Ingestões publicadas como versões ({', '.join(versoes)}).")
+
+
+def test_recarga_sem_interromper_perguntas(tmp_path):
+    """Testa se uma nova versão troca a cadeia sem afetar respostas em andamento."""
+    raiz = str(tmp_path / "faiss_index")
+    publicar_versao(raiz, preparar_versao(raiz))
+    construcoes = []
+
+    def fabrica():
+        if os.path.exists(os.path.join(raiz, "falhar")):
+            raise RuntimeError("índice corrompido")
+        versao = versao_atual(raiz)
+        construcoes.append(versao)
+
+        def responder(pergunta):
+            yield versao
+            yield "|fim"
+
+        return RunnableLambda(responder)
+
+    cadeia = CadeiaAdiada(fabrica)
+    vigia = cadeia.vigiar(raiz, intervalo=3600)
+    primeira = versao_atual(raiz)
+    em_andamento = cadeia.stream("pergunta")
+    assert next(em_andamento) == primeira
+    assert not vigia.verificar(), "❌ ERRO: Recarga sem nova versão publicada."
+
+    segunda = publicar_versao(raiz, preparar_versao(raiz))
+    assert vigia.verificar()
+    assert next(em_andamento) == "|fim", "❌ ERRO: Resposta em andamento interrompida pela recarga."
+    assert cadeia.invoke("pergunta") == f"{segunda}|fim"
+
+    # Falha ao carregar uma versão mantém a cadeia em uso
+    open(os.path.join(raiz, "falhar"), "w").close()
+    publicar_versao(raiz, preparar_versao(raiz))
+    assert not vigia.verificar()
+    assert cadeia.invoke("pergunta") == f"{segunda}|fim"
+    vigia.parar()
+
+    assert construcoes == [primeira, segunda] and os.path.exists(os.path.join(raiz, PONTEIRO_ARQUIVO))
+    print("✅ SUCESSO: Nova versão do índice em uso sem interromper a resposta em andamento.")
+
+
+class IndiceFalso:
+    """Índice lexical ou de tabelas que só registra se foi fechado."""
+
+    def __init__(self):
+        self.fechado = False
+
+    def indicadores(self):
+        return []
+
+    def fechar(self):
+        self.fechado = True
+
+
+def test_componentes_fechados_apos_perguntas_em_andamento(tmp_path):
+    """Testa se os componentes de uma versão substituída só são fechados quando a última pergunta termina."""
+    raiz = str(tmp_path / "faiss_index")
+    publicar_versao(raiz, preparar_versao(raiz))
+    carregados = []
+
+    def carregar():
+        componentes = ComponentesRAG(
+            None, None, None, None, indice_lexical=IndiceFalso(), indice_tabelas=IndiceFalso(), diretorio=versao_atual(raiz)
+        )
+        carregados.append(componentes)
+        return componentes
+
+    def fabrica(componentes):
+        def responder(pergunta):
+            yield componentes.diretorio
+            yield "|fim"
+
+        return RunnableLambda(responder)
+
+    cadeia = CadeiaAdiada(fabrica, carregar=carregar)
+    vigia = cadeia.vigiar(raiz, intervalo=3600)
+    em_andamento = cadeia.stream("pergunta")
+    next(em_andamento)
+
+    publicar_versao(raiz, preparar_versao(raiz))
+    assert vigia.verificar()
+    primeira = carregados[0]
+    assert not primeira.fechado and not primeira.indice_lexical.fechado, "❌ ERRO: Componentes fechados com uma pergunta em andamento."
+    assert list(em_andamento) == ["|fim"]
+    assert primeira.fechado and primeira.indice_lexical.fechado and primeira.indice_tabelas.fechado
+
+    # Sem perguntas em andamento, a versão substituída é fechada na troca
+    segunda = publicar_versao(raiz, preparar_versao(raiz))
+    assert vigia.verificar()
+    assert carregados[1].fechado and not carregados[2].fechado
+    assert cadeia.invoke("pergunta") == f"{segunda}|fim"
+    vigia.parar()
+
+    print("✅ SUCESSO: Componentes substituídos fechados ao fim das perguntas em andamento.")
+
+
+def test_recarga_durante_a_primeira_construcao(tmp_path):
+    """Testa se uma recarga concluída durante a primeira construção vence e a outra versão é fechada."""
+    raiz = str(tmp_path / "faiss_index")
+    publicar_versao(raiz, preparar_versao(raiz))
+    carregando, liberar_primeira = threading.Event(), threading.Event()
+    carregados = []
+
+    def carregar():
+        componentes = ComponentesRAG(None, None, None, None, indice_tabelas=IndiceFalso(), diretorio=versao_atual(raiz))
+        carregados.append(componentes)
+        if len(carregados) == 1:
+            carregando.set()
+            liberar_primeira.wait(10)
+        return componentes
+
+    cadeia = CadeiaAdiada(lambda c: RunnableLambda(lambda pergunta: c.diretorio), carregar=carregar)
+    vigia = cadeia.vigiar(raiz, intervalo=3600)
+    aquecimento = cadeia.aquecer()
+    carregando.wait(10)
+
+    segunda = publicar_versao(raiz, preparar_versao(raiz))
+    assert vigia.verificar()
+    liberar_primeira.set()
+    aquecimento.join()
+    vigia.parar()
+
+    assert cadeia.invoke("pergunta") == segunda, "❌ ERRO: A primeira construção sobrescreveu a recarga."
+    assert carregados[0].fechado and carregados[0].indice_tabelas.fechado and not carregados[1].fechado
+
+    print("✅ SUCESSO: Construção e recarga simultâneas sem componentes abertos esquecidos.")
+
+
+def test_cache_de_respostas_fechado_com_os_componentes(agente_offline):
+    """Testa se o cache de respostas de cada cadeia é fechado com os componentes da versão substituída."""
+    componentes = agente_offline.carregar_componentes()
+    cadeia = agente_offline.create_rag_chain(usar_cache=True, componentes=componentes)
+    assert cadeia.invoke("Qual a projeção do IPCA para 2025?")["result"]
+
+    cache, = componentes._recursos
+    componentes.aposentar()
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache._conn.execute("SELECT 1")
+
+    print("✅ SUCESSO: Cache de respostas fechado junto com os componentes.")